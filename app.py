@@ -1,87 +1,318 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
-from fastapi.responses import JSONResponse
-import shutil
-import os
-import uuid
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import FastAPI, File, Form, Header, Request, UploadFile
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+import asyncio
+import hmac
+import json
+import logging
 import traceback
-from main import process_document
+import config
+import main
+from main import process_document, process_pages
+from preprocess import ImageTooLargeError, PREPROCESS_PROFILES
+from quality_gate import ImageQualityError
+from orientation import ANGLE_CLS_MODES
+from document_detector import group_pages, merge_id_sides, missing_required_fields
+from ingest import document_kind, page_count
+from batcher import BATCH_SIZE, BATCH_WAIT_SECONDS
+from ocr_engine import warmup, enable_batching
+from worker_pool import OCRWorkerPool, OverloadedError, QueueFullError
+from deadline import DeadlineExceeded, start_deadline
+from jobs import JobStore, JobQueueFullError
+from phash import hamming
+from metrics import Counter, Gauge, render_prometheus, span
 
-app = FastAPI()
+logging.basicConfig(level=config.LOG_LEVEL)
+logger = logging.getLogger(__name__)
 
-TEMP_DIR = "temp_uploads"
-os.makedirs(TEMP_DIR, exist_ok=True)
+ocr_pool = OCRWorkerPool(
+    config.OCR_WORKERS, config.OCR_QUEUE_DEPTH,
+    initializer=warmup if config.OCR_WARMUP else None,
+    max_queue_wait=config.QUEUE_WAIT_TARGET_SECONDS
+)
+
+job_store = JobStore(config.JOB_MAX_PENDING, config.JOB_TTL_SECONDS)
+# Strong references to running job tasks so they are not garbage collected
+_job_tasks = set()
+
+REQUESTS = Counter("ekyc_http_requests_total", "HTTP requests by route and status code")
+ERRORS = Counter("ekyc_errors_total", "Failed /ekyc requests by error type")
+Gauge("ekyc_ocr_queue_depth", "Sides waiting for a free OCR worker", callback=lambda: ocr_pool.pending)
+Gauge("ekyc_ocr_queue_wait_seconds", "How long the oldest queued side has waited", callback=lambda: ocr_pool.queue_wait)
+BACK_SIDES = Counter(
+    "ekyc_back_side_total",
+    "Back sides by outcome: processed, skipped (never run) or abandoned (already running when the front sufficed)"
+)
+OCR_SECONDS_SAVED = Counter(
+    "ekyc_ocr_seconds_saved_total",
+    "Estimated OCR seconds saved by skipped back sides, from the mean back-side processing time"
+)
+DUPLICATES = Counter(
+    "ekyc_duplicate_submissions_total",
+    "Submissions flagged by duplicate check (front_matches_back, replayed_front, replayed_back)"
+)
+Gauge("ekyc_jobs_pending", "Async jobs queued or running", callback=lambda: job_store.pending)
+
+@asynccontextmanager
+async def lifespan(app):
+    if config.OCR_BATCH_MAX_SIZE > 1:
+        enable_batching(config.OCR_BATCH_MAX_SIZE, config.OCR_BATCH_MAX_WAIT_MS)
+    ocr_pool.start()
+    yield
+    ocr_pool.shutdown(wait=False)
+
+app = FastAPI(lifespan=lifespan)
+
+@app.middleware("http")
+async def count_requests(request: Request, call_next):
+    response = await call_next(request)
+    route = request.scope.get("route")
+    REQUESTS.inc(route=route.path if route else "unmatched", status=response.status_code)
+    return response
+
+async def read_upload(upload_file: UploadFile) -> bytes:
+    """
+    Read an upload into memory, refusing to buffer more than the size limit.
+    """
+    data = await upload_file.read(config.MAX_UPLOAD_BYTES + 1)
+    if len(data) > config.MAX_UPLOAD_BYTES:
+        raise ImageTooLargeError(f"{upload_file.filename} exceeds the {config.MAX_UPLOAD_BYTES} byte upload limit")
+    return data
+
+def error_response(status_code, message, headers=None, **details):
+    return JSONResponse(
+        status_code=status_code,
+        headers=headers,
+        content={
+            "status": "error",
+            "message": message,
+            **details
+        }
+    )
+
+# Per-field confidences and line geometry, only returned with include_geometry
+GEOMETRY_KEYS = ("field_confidence", "lines", "lines_front", "lines_back")
+
+def without_geometry(result):
+    if result is None:
+        return None
+    return {key: value for key, value in result.items() if key not in GEOMETRY_KEYS}
+
+def check_options(profile, angle_cls):
+    if profile and profile not in PREPROCESS_PROFILES:
+        return error_response(400, f"Unknown profile '{profile}', expected one of {sorted(PREPROCESS_PROFILES)}")
+    if angle_cls and angle_cls not in ANGLE_CLS_MODES:
+        return error_response(400, f"Unknown angle_cls '{angle_cls}', expected one of {list(ANGLE_CLS_MODES)}")
+    return None
+
+def check_admin(token):
+    if not config.ADMIN_TOKEN:
+        return error_response(404, "Admin endpoints are disabled")
+    if token is None or not hmac.compare_digest(token.encode(), config.ADMIN_TOKEN.encode()):
+        return error_response(403, "Missing or wrong X-Admin-Token header")
+    return None
+
+def merge_sides(front, back):
+    """
+    merge_id_sides, plus duplicate_checks when the duplicate index is on:
+    whether the front and back are the same picture, and any recent
+    sighting of either side.
+    """
+    merged = merge_id_sides(front, back)
+    merged.pop("image_hash", None)
+    merged.pop("replay", None)
+    merged.pop("degradation", None)
+    if main.duplicate_index is None:
+        return merged
+
+    back = back or {}
+    checks = {
+        "front_matches_back": None,
+        "replayed_front": front.get("replay"),
+        "replayed_back": back.get("replay")
+    }
+    if front.get("image_hash") and back.get("image_hash"):
+        distance = hamming(int(front["image_hash"], 16), int(back["image_hash"], 16))
+        checks["front_matches_back"] = distance <= config.DUPLICATE_MAX_DISTANCE
+    for check, flagged in checks.items():
+        if flagged:
+            DUPLICATES.inc(check=check)
+    merged["duplicate_checks"] = checks
+    return merged
+
+def worst_degradation(*results):
+    """
+    The most degraded level among the processed sides, None without deadlines.
+    """
+    levels = [result["degradation"] for result in results if result and result.get("degradation")]
+    return max(levels, key=lambda level: level["level"]) if levels else None
+
+def deadline_timeout(deadline):
+    # Answer when the budget is spent, even if a worker is still mid-stage
+    return max(deadline.remaining(), 0) if deadline is not None else None
+
+def deadline_response(error, deadline):
+    ERRORS.inc(type="deadline")
+    stage = getattr(error, "stage", "response")
+    return error_response(504, f"Request deadline of {deadline.seconds:g}s exceeded", stage=stage)
+
+def overloaded_response(error):
+    # Shed before any work is queued; the client should retry later
+    ERRORS.inc(type="overloaded")
+    return error_response(503, str(error), headers={"Retry-After": str(config.RETRY_AFTER_SECONDS)},
+                          reason="overloaded")
+
+def back_side_estimate():
+    """
+    Mean seconds a back side has taken so far, used to report OCR time saved.
+    """
+    snapshot = main.SIDE_SECONDS.snapshot(side="back")
+    return snapshot["sum"] / snapshot["count"] if snapshot["count"] else 0.0
+
+async def submit_to_pool(fn, *args, wait_for_slot=False, **kwargs):
+    """
+    Submit work to the OCR worker pool. With `wait_for_slot`, a full queue
+    is retried instead of raising QueueFullError.
+    """
+    while True:
+        try:
+            return ocr_pool.submit(fn, *args, **kwargs)
+        except QueueFullError:
+            if not wait_for_slot:
+                raise
+            await asyncio.sleep(config.JOB_RETRY_INTERVAL_SECONDS)
+
+async def ocr_sides(id_front_bytes, id_back_bytes, profile, angle_cls=None,
+                    wait_for_slot=False, on_started=None, on_side=None, deadline=None):
+    """
+    OCR the front and, as config.BACK_SIDE_POLICY allows, the back on the
+    worker pool. Returns (front result, back result or None, sides processed).
+    With `wait_for_slot`, a full worker queue is retried instead of raising
+    QueueFullError. `on_started()` is called once the front is queued and
+    `on_side(side, result)` as each side finishes. Each side carries the
+    request's `deadline`, if any.
+    """
+    policy = config.BACK_SIDE_POLICY
+
+    async def submit(data, side):
+        return await submit_to_pool(process_document, data, profile, side, angle_cls=angle_cls,
+                                    deadline=deadline, wait_for_slot=wait_for_slot)
+
+    def finished(side, result):
+        if on_side:
+            on_side(side, result)
+        return result
+
+    front_future = await submit(id_front_bytes, "front")
+    back_future = None
+    if policy != "sequential":
+        try:
+            back_future = await submit(id_back_bytes, "back")
+        except QueueFullError:
+            # Both sides or neither
+            front_future.cancel()
+            raise
+    if on_started:
+        on_started()
 
-def save_upload_file(upload_file: UploadFile) -> str:
     try:
-        file_extension = os.path.splitext(upload_file.filename)[1]
-        file_name = f"{uuid.uuid4()}{file_extension}"
-        file_path = os.path.join(TEMP_DIR, file_name)
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(upload_file.file, buffer)
-        return file_path
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Could not save file: {e}")
+        if policy == "always":
+            sides = {
+                asyncio.wrap_future(front_future): "front",
+                asyncio.wrap_future(back_future): "back"
+            }
+            results = {}
+            pending = set(sides)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    results[sides[task]] = finished(sides[task], task.result())
+            BACK_SIDES.inc(outcome="processed")
+            return results["front"], results["back"], ["front", "back"]
+
+        ocr_result_front = finished("front", await asyncio.wrap_future(front_future))
+        missing = missing_required_fields(ocr_result_front, config.REQUIRED_FIELDS,
+                                          config.REQUIRED_FIELD_MIN_CONFIDENCE)
+        if not missing:
+            if back_future is None or back_future.cancel():
+                BACK_SIDES.inc(outcome="skipped")
+                OCR_SECONDS_SAVED.inc(back_side_estimate())
+            else:
+                # Already running on a worker; its result is simply not waited for
+                BACK_SIDES.inc(outcome="abandoned")
+            logger.debug("Front filled all required fields, back side not processed")
+            return ocr_result_front, None, ["front"]
+
+        logger.debug("Front is missing %s, processing the back side", missing)
+        if back_future is None:
+            back_future = await submit(id_back_bytes, "back")
+        ocr_result_back = finished("back", await asyncio.wrap_future(back_future))
+        BACK_SIDES.inc(outcome="processed")
+        return ocr_result_front, ocr_result_back, ["front", "back"]
+    except BaseException:
+        front_future.cancel()
+        if back_future is not None:
+            back_future.cancel()
+        raise
 
 @app.post("/ekyc")
 async def ekyc_verification(
     id_front: UploadFile = File(...), 
-    id_back: UploadFile = File(...)
+    id_back: UploadFile = File(...),
+    profile: Optional[str] = Form(None),
+    include_geometry: bool = Form(False),
+    angle_cls: Optional[str] = Form(None)
 ):
-    id_front_path = None
-    id_back_path = None
-    
+    invalid = check_options(profile, angle_cls)
+    if invalid:
+        return invalid
+    # The budget includes reading the uploads and waiting for a worker
+    deadline = start_deadline()
+
     try:
-        # Save files temporarily
-        id_front_path = save_upload_file(id_front)
-        id_back_path = save_upload_file(id_back)
-        
-        # 1. Perform OCR on ID Front
-        print(f"Processing OCR for Front ID: {id_front_path}")
-        ocr_result_front = process_document(id_front_path)
-        
-        # 2. Perform OCR on ID Back
-        print(f"Processing OCR for Back ID: {id_back_path}")
-        ocr_result_back = process_document(id_back_path)
-        
-        # Combine OCR results: Merge logic
-        # Initialize with front data (primary source for Name, ID, DOB)
-        merged_ocr = ocr_result_front.copy()
-        
-        # Helper to update if missing or empty
-        def update_if_missing(key, source):
-            if not merged_ocr.get(key) and source.get(key):
-                merged_ocr[key] = source[key]
-        
-        # Fill in missing details from Back ID (especially Issue Date, Expiry)
-        update_if_missing('date_of_issue', ocr_result_back)
-        update_if_missing('date_of_expiry', ocr_result_back)
-        update_if_missing('place_of_birth', ocr_result_back)
+        # Uploads stay in memory and are decoded by the workers
+        id_front_bytes = await read_upload(id_front)
+        id_back_bytes = await read_upload(id_back)
         
-        # If front failed to extract important fields, fallback to back
-        update_if_missing('full_name', ocr_result_back)
-        update_if_missing('id_number', ocr_result_back)
+        # Run OCR on the worker pool so the event loop stays free
+        logger.debug("Submitting ID sides for OCR")
+        ocr_result_front, ocr_result_back, sides_processed = await asyncio.wait_for(
+            ocr_sides(id_front_bytes, id_back_bytes, profile, angle_cls, deadline=deadline),
+            deadline_timeout(deadline)
+        )
         
-        # Include raw text from both for auditing
-        merged_ocr['raw_text_front'] = ocr_result_front.get('raw_text')
-        merged_ocr['raw_text_back'] = ocr_result_back.get('raw_text')
-        # Remove individual raw_text to keep it clean, or keep them as 'raw_text_front' etc.
-        if 'raw_text' in merged_ocr:
-            del merged_ocr['raw_text']
-
-        # Simplify debug info
-        merged_ocr['confidence_front'] = ocr_result_front.get('confidence')
-        merged_ocr['confidence_back'] = ocr_result_back.get('confidence')
-        if 'confidence' in merged_ocr: del merged_ocr['confidence']
+        with span("merge"):
+            merged_ocr = merge_sides(ocr_result_front, ocr_result_back)
+        if not include_geometry:
+            merged_ocr = without_geometry(merged_ocr)
         
         response_data = {
             "status": "success",
+            "sides_processed": sides_processed,
+            "degradation": worst_degradation(ocr_result_front, ocr_result_back),
             "ocr_data": merged_ocr
         }
         
         return JSONResponse(content=response_data)
         
+    except ImageTooLargeError as e:
+        ERRORS.inc(type="too_large")
+        return error_response(413, str(e))
+    except ImageQualityError as e:
+        # A structured reason so the client can ask for a better photo
+        ERRORS.inc(type="quality")
+        return error_response(422, str(e), reason=e.reason, side=e.side, measurements=e.measurements)
+    except (DeadlineExceeded, asyncio.TimeoutError) as e:
+        return deadline_response(e, deadline)
+    except OverloadedError as e:
+        return overloaded_response(e)
+    except QueueFullError as e:
+        ERRORS.inc(type="queue_full")
+        return error_response(503, str(e), headers={"Retry-After": str(config.RETRY_AFTER_SECONDS)})
     except Exception as e:
-        print(traceback.format_exc())
+        ERRORS.inc(type="internal")
+        logger.exception("eKYC request failed")
         return JSONResponse(
             status_code=500,
             content={
@@ -90,19 +321,266 @@ async def ekyc_verification(
                 "traceback": traceback.format_exc()
             }
         )
-    finally:
-        # Cleanup temp files
-        for path in [id_front_path, id_back_path]:
-            if path and os.path.exists(path):
-                try:
-                    os.remove(path)
-                except Exception as e:
-                    print(f"Error removing temp file {path}: {e}")
+
+async def run_job(job, id_front_bytes, id_back_bytes, profile, include_geometry=False, angle_cls=None):
+    """
+    Process an async job on the worker pool, publishing each side as soon
+    as it is done and the merged record at the end.
+    """
+    try:
+        # Jobs wait for room on the worker pool instead of failing with 503
+        ocr_result_front, ocr_result_back, sides_processed = await ocr_sides(
+            id_front_bytes, id_back_bytes, profile, angle_cls,
+            wait_for_slot=True,
+            on_started=lambda: job_store.update(job, status="running"),
+            on_side=lambda side, result: job_store.update(
+                job, **{side: result if include_geometry else without_geometry(result)}
+            )
+        )
+
+        with span("merge"):
+            merged_ocr = merge_sides(ocr_result_front, ocr_result_back)
+        if not include_geometry:
+            merged_ocr = without_geometry(merged_ocr)
+        job_store.update(job, status="done", sides_processed=sides_processed, result=merged_ocr)
+    except ImageTooLargeError as e:
+        ERRORS.inc(type="too_large")
+        job_store.update(job, status="failed", error=str(e))
+    except ImageQualityError as e:
+        ERRORS.inc(type="quality")
+        job_store.update(job, status="failed", error=f"{e.side or 'image'} rejected ({e.reason}): {e}")
+    except Exception as e:
+        ERRORS.inc(type="internal")
+        logger.exception("eKYC job %s failed", job.id)
+        job_store.update(job, status="failed", error=str(e))
+
+@app.post("/ekyc/jobs", status_code=202)
+async def create_ekyc_job(
+    id_front: UploadFile = File(...),
+    id_back: UploadFile = File(...),
+    profile: Optional[str] = Form(None),
+    include_geometry: bool = Form(False),
+    angle_cls: Optional[str] = Form(None)
+):
+    invalid = check_options(profile, angle_cls)
+    if invalid:
+        return invalid
+
+    try:
+        id_front_bytes = await read_upload(id_front)
+        id_back_bytes = await read_upload(id_back)
+        job = job_store.create()
+    except ImageTooLargeError as e:
+        ERRORS.inc(type="too_large")
+        return error_response(413, str(e))
+    except JobQueueFullError as e:
+        ERRORS.inc(type="queue_full")
+        return error_response(503, str(e), headers={"Retry-After": str(config.RETRY_AFTER_SECONDS)})
+
+    task = asyncio.create_task(run_job(job, id_front_bytes, id_back_bytes, profile, include_geometry, angle_cls))
+    _job_tasks.add(task)
+    task.add_done_callback(_job_tasks.discard)
+    return {"job_id": job.id, "status": job.status}
+
+# Async so that it runs on the event loop thread, like every JobStore call
+@app.get("/ekyc/jobs/{job_id}")
+async def get_ekyc_job(job_id: str):
+    job = job_store.get(job_id)
+    if job is None:
+        return error_response(404, "Unknown or expired job")
+    return job.to_dict()
+
+@app.get("/ekyc/jobs/{job_id}/events")
+async def ekyc_job_events(job_id: str):
+    """
+    Server-sent events: one event per job update, named after the job
+    status, until the job is done or failed.
+    """
+    job = job_store.get(job_id)
+    if job is None:
+        return error_response(404, "Unknown or expired job")
+
+    async def stream():
+        sent_version = None
+        while True:
+            if job.version != sent_version:
+                sent_version = job.version
+                yield f"event: {job.status}\ndata: {json.dumps(job.to_dict())}\n\n"
+                if job.finished:
+                    return
+            elif not await job_store.wait_for_change(job, sent_version, config.JOB_EVENTS_KEEPALIVE_SECONDS):
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.post("/ekyc/document")
+async def ekyc_document(
+    document: UploadFile = File(...),
+    profile: Optional[str] = Form(None),
+    include_geometry: bool = Form(False),
+    angle_cls: Optional[str] = Form(None)
+):
+    """
+    OCR a PDF or multi-page TIFF. The response streams one JSON line per
+    page as soon as it is done, then a last line with the documents found
+    in it, ID fronts merged with their backs, the document's page_count
+    and whether pages past EKYC_PDF_MAX_PAGES were left out (truncated).
+    """
+    invalid = check_options(profile, angle_cls)
+    if invalid:
+        return invalid
+    try:
+        data = await read_upload(document)
+    except ImageTooLargeError as e:
+        ERRORS.inc(type="too_large")
+        return error_response(413, str(e))
+    if document_kind(data) is None:
+        return error_response(415, "Expected a PDF or multi-page TIFF document")
+
+    def strip(result):
+        return result if include_geometry else without_geometry(result)
+
+    async def stream():
+        pages = process_pages(data, profile, angle_cls=angle_cls)
+        results = []
+        processed = 0
+        try:
+            while True:
+                # Pages are rendered and OCR'd one at a time on the worker
+                # pool, so only one page image exists at once
+                future = await submit_to_pool(next, pages, None, wait_for_slot=True)
+                record = await asyncio.wrap_future(future)
+                if record is None:
+                    break
+                processed += 1
+                if record["status"] == "ok":
+                    results.append((record["page"], record["result"]))
+                    record = {**record, "result": strip(record["result"])}
+                yield json.dumps(record) + "\n"
+
+            with span("merge"):
+                documents = group_pages(results)
+            count = page_count(data)
+            yield json.dumps({
+                "documents": [{**d, "result": strip(d["result"])} for d in documents],
+                "page_count": count,
+                "truncated": count > processed
+            }) + "\n"
+        except Exception as e:
+            ERRORS.inc(type="internal")
+            logger.exception("Document request failed")
+            yield json.dumps({"status": "error", "message": str(e)}) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@app.post("/ekyc/passport")
+async def ekyc_passport(
+    passport: UploadFile = File(...),
+    profile: Optional[str] = Form(None),
+    include_geometry: bool = Form(False),
+    angle_cls: Optional[str] = Form(None)
+):
+    """
+    OCR the data page of a passport in MRZ mode: only the two machine
+    readable lines are recognized when their check digits pass, otherwise
+    the page gets full-page OCR.
+    """
+    invalid = check_options(profile, angle_cls)
+    if invalid:
+        return invalid
+    deadline = start_deadline()
+    try:
+        data = await read_upload(passport)
+        future = await submit_to_pool(process_document, data, profile, "passport", mode="mrz",
+                                      angle_cls=angle_cls, deadline=deadline)
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), deadline_timeout(deadline))
+        except asyncio.TimeoutError:
+            future.cancel()
+            raise
+        degradation = result.pop("degradation", None)
+        if not include_geometry:
+            result = without_geometry(result)
+        return JSONResponse(content={"status": "success", "degradation": degradation, "ocr_data": result})
+    except ImageTooLargeError as e:
+        ERRORS.inc(type="too_large")
+        return error_response(413, str(e))
+    except ImageQualityError as e:
+        ERRORS.inc(type="quality")
+        return error_response(422, str(e), reason=e.reason, side=e.side, measurements=e.measurements)
+    except (DeadlineExceeded, asyncio.TimeoutError) as e:
+        return deadline_response(e, deadline)
+    except OverloadedError as e:
+        return overloaded_response(e)
+    except QueueFullError as e:
+        ERRORS.inc(type="queue_full")
+        return error_response(503, str(e), headers={"Retry-After": str(config.RETRY_AFTER_SECONDS)})
+    except Exception as e:
+        ERRORS.inc(type="internal")
+        logger.exception("Passport request failed")
+        return error_response(500, str(e))
 
 @app.get("/")
 def home():
     return {"message": "eKYC System API is running"}
 
+# Async: the ekyc_jobs_pending gauge reads the JobStore
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+@app.get("/ready")
+def ready():
+    if not ocr_pool.ready:
+        return JSONResponse(status_code=503, content={"status": "warming_up"})
+    return {"status": "ready"}
+
+@app.get("/stats/batching")
+def batching_stats():
+    return {
+        "enabled": config.OCR_BATCH_MAX_SIZE > 1,
+        "max_batch_size": config.OCR_BATCH_MAX_SIZE,
+        "max_wait_ms": config.OCR_BATCH_MAX_WAIT_MS,
+        "batch_size": BATCH_SIZE.snapshot(),
+        "wait_seconds": BATCH_WAIT_SECONDS.snapshot()
+    }
+
+@app.get("/admin/cache")
+def cache_stats(x_admin_token: Optional[str] = Header(None)):
+    denied = check_admin(x_admin_token)
+    if denied:
+        return denied
+    if main.result_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **main.result_cache.stats()}
+
+@app.post("/admin/cache/clear")
+def clear_cache(x_admin_token: Optional[str] = Header(None)):
+    denied = check_admin(x_admin_token)
+    if denied:
+        return denied
+    if main.result_cache is None:
+        return {"enabled": False, "cleared": 0}
+    return {"enabled": True, "cleared": main.result_cache.clear()}
+
+@app.get("/admin/duplicates")
+def duplicate_stats(x_admin_token: Optional[str] = Header(None)):
+    denied = check_admin(x_admin_token)
+    if denied:
+        return denied
+    if main.duplicate_index is None:
+        return {"enabled": False}
+    return {"enabled": True, **main.duplicate_index.stats()}
+
+@app.post("/admin/duplicates/clear")
+def clear_duplicates(x_admin_token: Optional[str] = Header(None)):
+    denied = check_admin(x_admin_token)
+    if denied:
+        return denied
+    if main.duplicate_index is None:
+        return {"enabled": False, "cleared": 0}
+    return {"enabled": True, "cleared": main.duplicate_index.clear()}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,143 @@
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = Histogram(
+    "ocr_batch_size", "Images per batched predict call",
+    buckets=(1, 2, 4, 8, 16, 32)
+)
+BATCH_WAIT_SECONDS = Histogram(
+    "ocr_batch_wait_seconds", "Time an image waited in the batcher before predict",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+
+
+class OCRBatcher:
+    """
+    Collects images submitted by concurrent requests and runs them through
+    one `predict` call, up to `max_batch_size` images or `max_wait_ms` after
+    the first image of the batch arrived, whichever comes first. Only images
+    submitted with the same predict options share a batch.
+    The OCR instance is built by `ocr_factory` on the batcher thread, which
+    is the only thread that uses it. If building it fails, every image
+    submitted then fails with that error instead of waiting forever.
+    """
+
+    def __init__(self, max_batch_size, max_wait_ms, ocr_factory):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._ocr_factory = ocr_factory
+        self._queue = queue.Queue()
+        # Items taken off the queue that did not match the batch being built;
+        # only touched by the batcher thread
+        self._backlog = deque()
+        self._thread = None
+        # Set when ocr_factory failed
+        self._error = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name="ocr-batcher", daemon=True)
+        self._thread.start()
+
+    def shutdown(self):
+        self._queue.put(None)
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def submit(self, image, options=None):
+        """
+        Queue one image; the returned future resolves to its raw
+        PaddleOCR result dict. `options` are keyword arguments for predict.
+        """
+        future = Future()
+        if self._error is not None:
+            future.set_exception(self._error)
+            return future
+        options = options or {}
+        key = tuple(sorted(options.items()))
+        self._queue.put((future, image, time.monotonic(), key))
+        return future
+
+    def _collect(self, first):
+        batch = [first]
+        key = first[3]
+        for item in list(self._backlog):
+            if len(batch) >= self.max_batch_size:
+                break
+            if item[3] == key:
+                self._backlog.remove(item)
+                batch.append(item)
+
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Put the stop marker back so the loop exits after this batch
+                self._queue.put(None)
+                break
+            if item[3] == key:
+                batch.append(item)
+            else:
+                self._backlog.append(item)
+        return batch
+
+    def _fail_all(self, error):
+        # Items already queued, and any submitted before submit() saw the error
+        for item in self._backlog:
+            if item[0].set_running_or_notify_cancel():
+                item[0].set_exception(error)
+        self._backlog.clear()
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            if item[0].set_running_or_notify_cancel():
+                item[0].set_exception(error)
+
+    def _loop(self):
+        try:
+            ocr = self._ocr_factory()
+        except Exception as e:
+            logger.exception("Building the batcher's OCR engine failed")
+            self._error = e
+            self._fail_all(e)
+            return
+        while True:
+            first = self._backlog.popleft() if self._backlog else self._queue.get()
+            if first is None:
+                break
+            batch = [item for item in self._collect(first) if item[0].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            now = time.monotonic()
+            BATCH_SIZE.observe(len(batch))
+            for _, _, enqueued, _ in batch:
+                BATCH_WAIT_SECONDS.observe(now - enqueued)
+
+            try:
+                images = [item[1] for item in batch]
+                results = list(ocr.predict(images, **dict(batch[0][3])))
+                if len(results) != len(batch):
+                    raise RuntimeError(f"predict returned {len(results)} results for {len(batch)} images")
+            except Exception as e:
+                for item in batch:
+                    item[0].set_exception(e)
+                continue
+
+            for item, result in zip(batch, results):
+                item[0].set_result(result)
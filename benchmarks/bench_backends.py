@@ -0,0 +1,105 @@
+"""
+Compare OCR inference backends on a fixture set.
+
+    python benchmarks/bench_backends.py FIXTURE_DIR [--backends paddle onnx openvino] [--int8] [--repeat 3]
+
+Each backend runs in its own fresh interpreter so that resident memory is
+not shared between them. For every backend the script reports the model
+load time, per-image OCR latency (mean / p50 / p95 ms over all fixture
+images x --repeat, after one warm-up image), the resident set size after
+loading and the peak RSS of the run. --int8 sets EKYC_ONNX_INT8=1 for the
+ONNX backends; models are taken from EKYC_ONNX_MODEL_DIR.
+"""
+import argparse
+import glob
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+
+def run_worker(backend, fixture_dir, repeat):
+    os.environ["EKYC_OCR_BACKEND"] = backend
+    from preprocess import preprocess_image
+    from ocr_engine import get_ocr, run_ocr
+
+    images = [
+        preprocess_image(path)
+        for path in sorted(glob.glob(os.path.join(fixture_dir, "*")))
+        if path.lower().endswith(IMAGE_EXTENSIONS)
+    ]
+    if not images:
+        raise SystemExit(f"no images found in {fixture_dir}")
+
+    start = time.perf_counter()
+    get_ocr()
+    load_seconds = time.perf_counter() - start
+    loaded_rss = rss_mb()
+
+    run_ocr(images[0])
+    latencies = []
+    lines = 0
+    for _ in range(repeat):
+        for image in images:
+            start = time.perf_counter()
+            result, _ = run_ocr(image)
+            latencies.append((time.perf_counter() - start) * 1000)
+            lines += len(result)
+
+    latencies.sort()
+    return {
+        "load_s": round(load_seconds, 2),
+        "mean_ms": round(statistics.mean(latencies), 1),
+        "p50_ms": round(latencies[len(latencies) // 2], 1),
+        "p95_ms": round(latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)], 1),
+        "lines_per_image": round(lines / len(latencies), 1),
+        "rss_loaded_mb": round(loaded_rss, 1),
+        # ru_maxrss is in KiB on Linux
+        "rss_peak_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("fixture_dir")
+    parser.add_argument("--backends", nargs="+", default=["paddle", "onnx"])
+    parser.add_argument("--int8", action="store_true", help="quantize the ONNX models to INT8")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.fixture_dir, args.repeat)))
+        return
+
+    env = dict(os.environ, EKYC_ONNX_INT8="1" if args.int8 else "0")
+    report = {}
+    for backend in args.backends:
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), args.fixture_dir,
+             "--repeat", str(args.repeat), "--worker", backend],
+            env=env, capture_output=True, text=True
+        )
+        if proc.returncode != 0:
+            report[backend] = {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else proc.returncode}
+            continue
+        report[backend] = json.loads(proc.stdout.strip().splitlines()[-1])
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Measure cross-request OCR batching on a fixture set.
+
+    python benchmarks/bench_batching.py FIXTURE_DIR [--batch-sizes 1 2 4 8] [--threads 8] [--repeat 3]
+
+Each batch size runs in its own fresh interpreter. --threads threads call
+run_ocr concurrently, as the /ekyc worker pool does; batch size 1 uses one
+engine per thread, larger sizes send every image through the single
+batcher engine (see OCRBatcher). For every batch size the script reports
+images per second, per-image latency (mean / p95 ms) and the mean batch
+size actually formed, after one warm-up image.
+"""
+import argparse
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+
+
+def run_worker(batch_size, fixture_dir, threads, repeat):
+    from preprocess import preprocess_image
+    import ocr_engine
+    from batcher import BATCH_SIZE
+
+    images = [
+        preprocess_image(path)
+        for path in sorted(glob.glob(os.path.join(fixture_dir, "*")))
+        if path.lower().endswith(IMAGE_EXTENSIONS)
+    ]
+    if not images:
+        raise SystemExit(f"no images found in {fixture_dir}")
+    if batch_size > 1:
+        ocr_engine.enable_batching(batch_size, 20.0)
+
+    def timed(image):
+        start = time.perf_counter()
+        ocr_engine.run_ocr(image)
+        return (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(threads) as pool:
+        # One warm-up image per thread, so every engine is built
+        list(pool.map(timed, [images[0]] * threads))
+        batches = BATCH_SIZE.snapshot()
+        start = time.perf_counter()
+        latencies = list(pool.map(timed, images * repeat))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    after = BATCH_SIZE.snapshot()
+    calls = after["count"] - batches["count"]
+    return {
+        "images_per_s": round(len(latencies) / elapsed, 2),
+        "mean_ms": round(statistics.mean(latencies), 1),
+        "p95_ms": round(latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)], 1),
+        "mean_batch": round((after["sum"] - batches["sum"]) / calls, 2) if calls else 1
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("fixture_dir")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 2, 4, 8])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.fixture_dir, args.threads, args.repeat)))
+        return
+
+    report = {}
+    for batch_size in args.batch_sizes:
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), args.fixture_dir, "--threads", str(args.threads),
+             "--repeat", str(args.repeat), "--worker", str(batch_size)],
+            capture_output=True, text=True
+        )
+        if proc.returncode != 0:
+            report[batch_size] = {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else proc.returncode}
+            continue
+        report[batch_size] = json.loads(proc.stdout.strip().splitlines()[-1])
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
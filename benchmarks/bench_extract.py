@@ -0,0 +1,50 @@
+"""
+Micro-benchmark for field extraction.
+
+    python benchmarks/bench_extract.py [--repeat 2000]
+
+Times utils.extract_all_details (one indexing pass) against calling every
+extractor separately, and detect_document end to end, on the golden texts
+from test_utils.py.
+"""
+import argparse
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import utils  # noqa: E402
+from document_detector import detect_document  # noqa: E402
+from test_utils import GOLDEN_TEXTS  # noqa: E402
+
+PER_FIELD = (
+    utils.extract_full_name, utils.extract_id_number, utils.extract_date_of_birth,
+    utils.extract_birthplace, utils.extract_gender, utils.extract_date_of_issue,
+    utils.extract_date_of_expiry
+)
+
+
+def per_field(texts):
+    return [extract(texts) for extract in PER_FIELD]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    samples = list(GOLDEN_TEXTS.values())
+    for label, fn in (
+        ("extract_all_details", utils.extract_all_details),
+        ("per-field extractors", per_field),
+        ("detect_document", detect_document)
+    ):
+        seconds = timeit.timeit(lambda: [fn(texts) for texts in samples], number=args.repeat)
+        per_call_us = seconds / (args.repeat * len(samples)) * 1e6
+        print(f"{label:<22} {per_call_us:8.1f} us per text list")
+
+
+if __name__ == "__main__":
+    main()
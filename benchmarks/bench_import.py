@@ -0,0 +1,62 @@
+"""
+Measure how long it takes to import the API and CLI modules, and how long
+an explicit warmup takes afterwards.
+
+    python benchmarks/bench_import.py --runs 5 [--warmup]
+
+Each run uses a fresh interpreter so module caches do not skew the numbers.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = """
+import time
+t = time.perf_counter()
+import {module}
+print(time.perf_counter() - t)
+"""
+
+WARMUP_SNIPPET = """
+import time
+import ocr_engine
+t = time.perf_counter()
+ocr_engine.warmup()
+print(time.perf_counter() - t)
+"""
+
+
+def time_snippet(snippet, runs):
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", snippet], cwd=ROOT,
+            capture_output=True, text=True, check=True
+        )
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def report(label, samples):
+    print(f"{label:<24} median {statistics.median(samples) * 1000:9.1f} ms   "
+          f"min {min(samples) * 1000:9.1f} ms   max {max(samples) * 1000:9.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warmup", action="store_true", help="also time ocr_engine.warmup()")
+    args = parser.parse_args()
+
+    for module in ("ocr_engine", "main", "app"):
+        report(f"import {module}", time_snippet(IMPORT_SNIPPET.format(module=module), args.runs))
+    if args.warmup:
+        report("warmup (load + infer)", time_snippet(WARMUP_SNIPPET, args.runs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Measure the memory of a multi-process API server.
+
+    python benchmarks/bench_memory.py [--workers 1 2 4] [--modes preload independent]
+                                      [--image card.jpg --requests 4]
+
+Modes:
+  preload      python serve.py, models built once before forking
+  fork         python serve.py with EKYC_PRELOAD_MODELS=0, so each forked
+               process builds its own engines (modules are still shared)
+  independent  uvicorn app:app --workers N, N unrelated processes
+
+For each worker count the server is started, /ready is polled until every
+process has warmed up, optionally --image is posted to /ekyc --requests
+times, and RSS and PSS are read from /proc/<pid>/smaps_rollup for every
+server process. PSS divides shared pages between the processes that map
+them, so the PSS total is the real footprint; RSS counts shared pages once
+per process. Linux only.
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = ("preload", "fork", "independent")
+
+
+def command(mode, workers, port):
+    if mode == "independent":
+        return [sys.executable, "-m", "uvicorn", "app:app", "--workers", str(workers), "--port", str(port)], {}
+    env = {"EKYC_PRELOAD_MODELS": "1" if mode == "preload" else "0"}
+    return [sys.executable, "serve.py", "--workers", str(workers), "--port", str(port)], env
+
+
+def descendants(pid):
+    pids = []
+    for task in os.listdir(f"/proc/{pid}/task"):
+        try:
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                children = [int(child) for child in f.read().split()]
+        except FileNotFoundError:
+            continue
+        for child in children:
+            pids.append(child)
+            pids.extend(descendants(child))
+    return pids
+
+
+def memory_mb(pid):
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if name in ("Rss", "Pss"):
+                values[name.lower()] = round(int(rest.split()[0]) / 1024, 1)
+    return values
+
+
+def wait_ready(port, workers, timeout):
+    """
+    Poll /ready until enough consecutive 200s that every process answered.
+    """
+    deadline = time.monotonic() + timeout
+    streak = 0
+    while streak < 4 * workers:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"server on port {port} not ready after {timeout}s")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/ready", timeout=5):
+                streak += 1
+        except (urllib.error.URLError, ConnectionError):
+            streak = 0
+            time.sleep(0.5)
+
+
+def post_image(port, image):
+    boundary = uuid.uuid4().hex
+    with open(image, "rb") as f:
+        data = f.read()
+    parts = []
+    for field in ("id_front", "id_back"):
+        parts.append(
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"{field}\"; "
+            f"filename=\"{os.path.basename(image)}\"\r\nContent-Type: application/octet-stream\r\n\r\n".encode()
+            + data + b"\r\n"
+        )
+    body = b"".join(parts) + f"--{boundary}--\r\n".encode()
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}/ekyc", data=body,
+        headers={"Content-Type": f"multipart/form-data; boundary={boundary}"}
+    )
+    with urllib.request.urlopen(request, timeout=300) as response:
+        response.read()
+
+
+def measure(mode, workers, port, args):
+    cmd, env = command(mode, workers, port)
+    process = subprocess.Popen(
+        cmd, cwd=ROOT, env={**os.environ, **env},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_ready(port, workers, args.timeout)
+        for _ in range(args.requests if args.image else 0):
+            post_image(port, args.image)
+        time.sleep(1)
+        processes = {pid: memory_mb(pid) for pid in descendants(process.pid)}
+        processes[process.pid] = memory_mb(process.pid)
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+    # The largest processes are the servers; the rest are supervisors
+    servers = sorted(processes.values(), key=lambda m: m["rss"], reverse=True)[:workers]
+    return {
+        "mode": mode,
+        "workers": workers,
+        "rss_per_worker_mb": round(sum(m["rss"] for m in servers) / workers, 1),
+        "pss_per_worker_mb": round(sum(m["pss"] for m in servers) / workers, 1),
+        "pss_total_mb": round(sum(m["pss"] for m in processes.values()), 1),
+        "processes": len(processes)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--image", help="image posted as both sides before measuring")
+    parser.add_argument("--requests", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=600)
+    args = parser.parse_args()
+
+    results = [measure(mode, workers, args.port, args) for mode in args.modes for workers in args.workers]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
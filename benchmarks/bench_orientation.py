@@ -0,0 +1,80 @@
+"""
+Latency of skipping the orientation classifiers, on upright and rotated
+copies of a fixture set.
+
+    python benchmarks/bench_orientation.py FIXTURE_DIR [--rotations 0 90 180] [--repeat 2]
+
+FIXTURE_DIR holds upright images and optional `<name>.json` files with
+expected field values (see bench_preprocess.py). Every image is also
+rotated by each of --rotations degrees (clockwise). Each variant is run
+through process_document with angle_cls=on (classifiers on every image,
+the old behaviour) and angle_cls=auto, reporting mean milliseconds, field
+accuracy and how auto decided (aspect, exif, probe_<angle>, unknown).
+The result cache is disabled.
+"""
+import argparse
+import collections
+import json
+import os
+import statistics
+import sys
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main as pipeline  # noqa: E402
+from bench_preprocess import load_fixtures, normalize  # noqa: E402
+
+ROTATIONS = {0: None, 90: cv2.ROTATE_90_CLOCKWISE, 180: cv2.ROTATE_180, 270: cv2.ROTATE_90_COUNTERCLOCKWISE}
+
+
+def bench(images, angle_cls, repeat):
+    latencies = []
+    matched = total = 0
+    reasons = collections.Counter()
+    for _ in range(repeat):
+        for data, expected in images:
+            start = time.perf_counter()
+            result = pipeline.process_document(data, angle_cls=angle_cls)
+            latencies.append((time.perf_counter() - start) * 1000)
+            reasons[result["orientation"]["reason"]] += 1
+            for field, value in expected.items():
+                total += 1
+                matched += normalize(result.get(field)) == normalize(value)
+    return {
+        "mean_ms": round(statistics.mean(latencies), 1),
+        "field_accuracy": round(matched / total, 4) if total else None,
+        "decisions": dict(reasons)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("fixture_dir")
+    parser.add_argument("--rotations", nargs="+", type=int, default=[0, 90, 180], choices=sorted(ROTATIONS))
+    parser.add_argument("--repeat", type=int, default=2)
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixture_dir)
+    if not fixtures:
+        parser.error(f"no images found in {args.fixture_dir}")
+    pipeline.result_cache = None
+    pipeline.warmup()
+
+    report = {}
+    for rotation in args.rotations:
+        images = []
+        for _, data, expected in fixtures:
+            image = pipeline.load_image(data)
+            if ROTATIONS[rotation] is not None:
+                image = cv2.rotate(image, ROTATIONS[rotation])
+            # Re-encoded without EXIF, like a photo taken with the card rotated
+            images.append((cv2.imencode(".png", image)[1].tobytes(), expected))
+        report[f"rotated_{rotation}"] = {mode: bench(images, mode, args.repeat) for mode in ("on", "auto")}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
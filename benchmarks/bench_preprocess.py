@@ -0,0 +1,101 @@
+"""
+Compare preprocessing profiles on a fixture set.
+
+    python benchmarks/bench_preprocess.py FIXTURE_DIR [--profiles fast balanced quality] [--no-ocr]
+
+FIXTURE_DIR holds images (png/jpg) and, next to each image, an optional
+`<name>.json` with the expected field values, e.g.
+{"id_number": "00-127039", "full_name": "JOHN DOE"}.
+
+For each profile the script reports the mean milliseconds of every
+preprocessing stage, OCR and field extraction, and the fraction of
+expected fields that were extracted exactly (case/space-insensitive).
+Use --no-ocr to time preprocessing alone.
+"""
+import argparse
+import glob
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from preprocess import preprocess_image, detection_options, PREPROCESS_PROFILES  # noqa: E402
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+
+
+def load_fixtures(fixture_dir):
+    fixtures = []
+    for path in sorted(glob.glob(os.path.join(fixture_dir, "*"))):
+        if not path.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        expected_path = os.path.splitext(path)[0] + ".json"
+        expected = {}
+        if os.path.exists(expected_path):
+            with open(expected_path) as f:
+                expected = json.load(f)
+        with open(path, "rb") as f:
+            fixtures.append((path, f.read(), expected))
+    return fixtures
+
+
+def normalize(value):
+    return " ".join(str(value).upper().split()) if value is not None else None
+
+
+def bench_profile(profile, fixtures, with_ocr):
+    if with_ocr:
+        from ocr_engine import run_ocr
+        from document_detector import detect_document
+
+    stages = {}
+    matched = total = 0
+    for path, data, expected in fixtures:
+        timings = {}
+        processed = preprocess_image(data, profile, timings=timings)
+        if with_ocr:
+            start = time.perf_counter()
+            texts, _ = run_ocr(processed, **detection_options(profile))
+            timings["ocr"] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            result = detect_document(texts)
+            timings["extract"] = time.perf_counter() - start
+
+            for field, value in expected.items():
+                total += 1
+                matched += normalize(result.get(field)) == normalize(value)
+        for stage, seconds in timings.items():
+            stages.setdefault(stage, []).append(seconds * 1000)
+
+    return {
+        "stages_ms": {stage: round(statistics.mean(values), 2) for stage, values in stages.items()},
+        "total_ms": round(sum(statistics.mean(values) for values in stages.values()), 2),
+        "field_accuracy": round(matched / total, 4) if total else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("fixture_dir")
+    parser.add_argument("--profiles", nargs="+", default=list(PREPROCESS_PROFILES))
+    parser.add_argument("--no-ocr", action="store_true", help="only time preprocessing")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixture_dir)
+    if not fixtures:
+        parser.error(f"no images found in {args.fixture_dir}")
+
+    if not args.no_ocr:
+        from ocr_engine import warmup
+        warmup()
+
+    report = {profile: bench_profile(profile, fixtures, not args.no_ocr) for profile in args.profiles}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Offline latency, throughput and accuracy regression suite.
+
+    python benchmarks/run_suite.py [--fixtures DIR] [--count 4] [--concurrency 1 2 4]
+                                   [--output report.json] [--baseline baseline.json]
+
+Runs the full pipeline (main.process_document) on synthetic cards from
+synthetic_cards.py, or on a fixture directory in bench_preprocess.py's
+format, with the result cache and duplicate index off. The report holds:
+
+- per-stage latency (decode, preprocess, ocr, extract, ...) and the total
+  per image: mean, p50, p95 and p99 in milliseconds
+- throughput in images per second at each --concurrency level, each
+  worker thread with its own warmed engine
+- peak RSS of the process
+- field accuracy overall, per field and per variant (exact match,
+  case/space-insensitive)
+
+With --baseline the report is compared to an earlier one: latency, RSS
+or throughput worse by more than --tolerance (relative), or accuracy
+lower by more than --accuracy-tolerance (absolute), is printed and the
+script exits with status 1.
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main as pipeline  # noqa: E402
+from metrics import trace  # noqa: E402
+from ocr_engine import warmup  # noqa: E402
+from bench_preprocess import load_fixtures, normalize  # noqa: E402
+from synthetic_cards import generate  # noqa: E402
+
+
+def percentiles(values):
+    values = sorted(values)
+
+    def at(fraction):
+        return round(values[min(len(values) - 1, int(fraction * len(values)))], 2)
+
+    return {
+        "mean": round(statistics.mean(values), 2),
+        "p50": at(0.50),
+        "p95": at(0.95),
+        "p99": at(0.99)
+    }
+
+
+def load_samples(args):
+    """
+    [(name, side, variant, image bytes, expected fields)]
+    """
+    if not args.fixtures:
+        return list(generate(args.count, args.seed))
+    samples = []
+    for path, data, expected in load_fixtures(args.fixtures):
+        name = os.path.splitext(os.path.basename(path))[0]
+        side = "back" if "back" in name else "front"
+        samples.append((name, side, "fixture", data, expected))
+    return samples
+
+
+def run_accuracy(samples, profile):
+    """
+    Process every sample once, in order; returns (latency, accuracy) sections.
+    """
+    stages = {}
+    totals = []
+    by_field, by_variant = {}, {}
+    for _, side, variant, data, expected in samples:
+        with trace() as timings:
+            start = time.perf_counter()
+            result = pipeline.process_document(data, profile, side)
+            totals.append((time.perf_counter() - start) * 1000)
+        for stage, seconds in timings.items():
+            stages.setdefault(stage, []).append(seconds * 1000)
+        for field, value in expected.items():
+            hit = normalize(result.get(field)) == normalize(value)
+            for counts, key in ((by_field, field), (by_variant, variant)):
+                matched, total = counts.get(key, (0, 0))
+                counts[key] = (matched + hit, total + 1)
+
+    def ratio(counts):
+        return {key: round(matched / total, 4) for key, (matched, total) in sorted(counts.items())}
+
+    matched = sum(m for m, _ in by_field.values())
+    total = sum(t for _, t in by_field.values())
+    latency = {"total": percentiles(totals)}
+    latency.update({stage: percentiles(values) for stage, values in sorted(stages.items())})
+    accuracy = {
+        "overall": round(matched / total, 4) if total else None,
+        "by_field": ratio(by_field),
+        "by_variant": ratio(by_variant)
+    }
+    return latency, accuracy
+
+
+def run_throughput(samples, profile, concurrency):
+    """
+    Images per second with `concurrency` worker threads, after warmup.
+    """
+    with ThreadPoolExecutor(concurrency, initializer=warmup) as executor:
+        # Let every worker build its engine before the clock starts
+        list(executor.map(lambda _: None, range(concurrency)))
+        start = time.perf_counter()
+        list(executor.map(lambda sample: pipeline.process_document(sample[3], profile, sample[1]), samples))
+        elapsed = time.perf_counter() - start
+    return round(len(samples) / elapsed, 3)
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def compare(report, baseline, tolerance, accuracy_tolerance):
+    """
+    List regressions of `report` against `baseline` as readable strings.
+    """
+    regressions = []
+    for stage, stats in report["latency_ms"].items():
+        before = baseline.get("latency_ms", {}).get(stage)
+        if not before:
+            continue
+        for key in ("p50", "p95"):
+            if before[key] and stats[key] > before[key] * (1 + tolerance):
+                regressions.append(f"latency {stage} {key}: {before[key]} -> {stats[key]} ms")
+    for level, value in report["throughput_ips"].items():
+        before = baseline.get("throughput_ips", {}).get(level)
+        if before and value < before * (1 - tolerance):
+            regressions.append(f"throughput x{level}: {before} -> {value} images/s")
+    before = baseline.get("peak_rss_mb")
+    if before and report["peak_rss_mb"] > before * (1 + tolerance):
+        regressions.append(f"peak RSS: {before} -> {report['peak_rss_mb']} MB")
+
+    accuracy, before = report["accuracy"], baseline.get("accuracy", {})
+    pairs = [("overall", accuracy["overall"], before.get("overall"))]
+    for section in ("by_field", "by_variant"):
+        for key, value in accuracy[section].items():
+            pairs.append((f"{section} {key}", value, before.get(section, {}).get(key)))
+    for name, value, previous in pairs:
+        if previous is not None and value is not None and value < previous - accuracy_tolerance:
+            regressions.append(f"accuracy {name}: {previous} -> {value}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", help="fixture directory instead of synthetic cards")
+    parser.add_argument("--count", type=int, default=4, help="synthetic card holders (x2 sides x5 variants)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--profile", default=None)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="relative latency/throughput/RSS slack")
+    parser.add_argument("--accuracy-tolerance", type=float, default=0.01, help="absolute accuracy slack")
+    args = parser.parse_args()
+
+    samples = load_samples(args)
+    if not samples:
+        parser.error(f"no images found in {args.fixtures}")
+
+    # Every image must go through the pipeline, not the caches
+    pipeline.result_cache = None
+    pipeline.duplicate_index = None
+    warmup()
+
+    latency, accuracy = run_accuracy(samples, args.profile)
+    report = {
+        "samples": len(samples),
+        "profile": args.profile,
+        "ocr_mode": pipeline.config.OCR_MODE,
+        "latency_ms": latency,
+        "throughput_ips": {
+            str(level): run_throughput(samples, args.profile, level) for level in args.concurrency
+        },
+        "peak_rss_mb": peak_rss_mb(),
+        "accuracy": accuracy
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance, args.accuracy_tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
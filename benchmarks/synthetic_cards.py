@@ -0,0 +1,198 @@
+"""
+Render synthetic Brunei IC photos with known field values.
+
+    python benchmarks/synthetic_cards.py OUTPUT_DIR [--count 4] [--seed 0]
+
+Each card is drawn on the canonical 1012x638 layout with its values inside
+the card_layout.CARD_LAYOUTS zones, then photographed: warped onto a darker
+background with a little perspective. Every card is saved in several
+variants (clean, low resolution, skewed, upside down, noisy) as
+`<name>.jpg` plus `<name>.json` with the expected fields, the fixture
+format read by bench_preprocess.py and run_suite.py.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from card_layout import CARD_HEIGHT, CARD_LAYOUTS, CARD_WIDTH  # noqa: E402
+
+VARIANTS = ("clean", "lowres", "skewed", "rotated_180", "noisy")
+
+_FIRST_NAMES = ["AHMAD", "SITI", "MOHAMMAD", "NUR", "HAJAH", "LIM", "ABDUL"]
+_MIDDLE_NAMES = ["BIN ALI", "BINTI YUSOF", "BIN HAJI OMAR", "AH", "BINTI ABDULLAH"]
+_LAST_NAMES = ["RAHMAN", "AMINAH", "KOW", "HASSAN", "ISMAIL"]
+_PLACES = ["BRUNEI MUARA", "TUTONG", "BELAIT", "TEMBURONG"]
+_GENDERS = {"Male": "LELAKI", "Female": "PEREMPUAN"}
+
+# Labels sit in the gap just above each zone, as on the printed card
+_FRONT_LABELS = {
+    "full_name": "NAMA",
+    "date_of_birth": "TARIKH LAHIR",
+    "gender": "JANTINA",
+    "place_of_birth": "TEMPAT LAHIR"
+}
+_BACK_LABELS = {
+    "date_of_issue": "TARIKH DIKELUARKAN",
+    "date_of_expiry": "TARIKH MANSUH"
+}
+
+
+def random_identity(rng):
+    """
+    Field values for one card holder, keyed like extract_all_details().
+    """
+    birth_year = rng.randint(1950, 2005)
+    issue_year = rng.randint(2010, 2022)
+    day, month = rng.randint(1, 28), rng.randint(1, 12)
+    gender = rng.choice(sorted(_GENDERS))
+    return {
+        "id_number": f"{rng.choice(['00', '01', '30', '51'])}-{rng.randint(0, 999999):06d}",
+        "full_name": f"{rng.choice(_FIRST_NAMES)} {rng.choice(_MIDDLE_NAMES)} {rng.choice(_LAST_NAMES)}",
+        "date_of_birth": f"{rng.randint(1, 28):02d}-{rng.randint(1, 12):02d}-{birth_year}",
+        "gender": gender,
+        "place_of_birth": rng.choice(_PLACES),
+        "date_of_issue": f"{day:02d}-{month:02d}-{issue_year}",
+        "date_of_expiry": f"{day:02d}-{month:02d}-{issue_year + 10}"
+    }
+
+
+def _put_text(card, text, zone, scale=1.0, thickness=2):
+    """
+    Draw `text` left-aligned in a (x0, y0, x1, y1) fraction zone, shrunk to fit.
+    """
+    x0, y0, x1, y1 = (int(zone[0] * CARD_WIDTH), int(zone[1] * CARD_HEIGHT),
+                      int(zone[2] * CARD_WIDTH), int(zone[3] * CARD_HEIGHT))
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    (width, height), _ = cv2.getTextSize(text, font, scale, thickness)
+    fit = min(1.0, (x1 - x0 - 8) / width, (y1 - y0 - 8) / height)
+    scale *= fit
+    (_, height), _ = cv2.getTextSize(text, font, scale, thickness)
+    cv2.putText(card, text, (x0 + 4, (y0 + y1 + height) // 2), font, scale, (20, 20, 20), thickness, cv2.LINE_AA)
+
+
+def _label_zone(zone):
+    x0, y0, x1, _ = zone
+    return (x0, max(0.0, y0 - 0.06), x1, y0)
+
+
+def render_card(identity, side):
+    """
+    The rectified CARD_WIDTH x CARD_HEIGHT BGR image of one card side.
+    """
+    card = np.full((CARD_HEIGHT, CARD_WIDTH, 3), (170, 225, 245), np.uint8)
+    layout = CARD_LAYOUTS[side]
+    if side == "front":
+        _put_text(card, "NEGARA BRUNEI DARUSSALAM", (0.04, 0.02, 0.60, 0.10), 0.9)
+        _put_text(card, "KAD PENGENALAN", (0.04, 0.13, 0.40, 0.21), 0.9)
+        values = dict(identity, gender=_GENDERS[identity["gender"]])
+        labels = _FRONT_LABELS
+        # Photo placeholder left of the text zones
+        cv2.rectangle(card, (40, 190), (300, 520), (150, 150, 150), -1)
+    else:
+        _put_text(card, "ALAMAT", (0.04, 0.08, 0.40, 0.15), 0.8)
+        _put_text(card, "KG KIULAP BANDAR SERI BEGAWAN", (0.04, 0.16, 0.80, 0.26), 1.0)
+        values = identity
+        labels = _BACK_LABELS
+
+    for field, spec in layout.items():
+        zones = spec["lines"]
+        if field in labels:
+            _put_text(card, labels[field], _label_zone(zones[0]), 0.6, 1)
+        words = values[field].split()
+        # Split a multi-line field's words evenly over its lines
+        per_line = -(-len(words) // len(zones))
+        for index, zone in enumerate(zones):
+            text = " ".join(words[index * per_line:(index + 1) * per_line])
+            if text:
+                _put_text(card, text, zone, 1.3)
+    return card
+
+
+def photograph(card, rng, skew=0.0):
+    """
+    Warp a rectified card onto a background, as a phone photo would show it.
+    `skew` rotates the card by that many degrees.
+    """
+    height, width = CARD_HEIGHT + 240, CARD_WIDTH + 240
+    background = np.full((height, width, 3), (60, 70, 80), np.uint8)
+    corners = np.float32([[0, 0], [CARD_WIDTH, 0], [CARD_WIDTH, CARD_HEIGHT], [0, CARD_HEIGHT]])
+    jitter = np.float32([[rng.uniform(-15, 15), rng.uniform(-15, 15)] for _ in range(4)])
+    target = corners + 120 + jitter
+    if skew:
+        center = (width / 2, height / 2)
+        rotation = cv2.getRotationMatrix2D(center, skew, 1.0)
+        target = cv2.transform(target[None], rotation)[0]
+    matrix = cv2.getPerspectiveTransform(corners, target.astype(np.float32))
+    return cv2.warpPerspective(card, matrix, (width, height), dst=background, borderMode=cv2.BORDER_TRANSPARENT)
+
+
+def make_variant(photo, variant, rng):
+    """
+    Apply one capture degradation to a photographed card; returns JPEG bytes.
+    """
+    quality = 90
+    if variant == "lowres":
+        scale = 480 / max(photo.shape[:2])
+        photo = cv2.resize(photo, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    elif variant == "rotated_180":
+        photo = cv2.rotate(photo, cv2.ROTATE_180)
+    elif variant == "noisy":
+        noise = np.random.default_rng(rng.randint(0, 2 ** 31)).normal(0, 12, photo.shape)
+        photo = np.clip(photo.astype(np.float32) + noise, 0, 255).astype(np.uint8)
+        photo = cv2.GaussianBlur(photo, (3, 3), 0)
+        quality = 35
+    ok, encoded = cv2.imencode(".jpg", photo, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise RuntimeError("JPEG encoding failed")
+    return encoded.tobytes()
+
+
+def expected_fields(identity, side):
+    return {field: identity[field] for field in CARD_LAYOUTS[side]}
+
+
+def generate(count=4, seed=0, variants=VARIANTS):
+    """
+    Yield (name, side, variant, jpeg bytes, expected fields) for `count`
+    card holders, both sides, every variant. The same seed always renders
+    the same images.
+    """
+    rng = random.Random(seed)
+    for index in range(count):
+        identity = random_identity(rng)
+        for side in ("front", "back"):
+            card = render_card(identity, side)
+            for variant in variants:
+                photo = photograph(card, rng, skew=rng.choice((-8, 8)) if variant == "skewed" else 0.0)
+                name = f"card{index:03d}_{side}_{variant}"
+                yield name, side, variant, make_variant(photo, variant, rng), expected_fields(identity, side)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("output_dir")
+    parser.add_argument("--count", type=int, default=4, help="card holders to render")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--variants", nargs="+", choices=VARIANTS, default=list(VARIANTS))
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    written = 0
+    for name, _, _, data, expected in generate(args.count, args.seed, args.variants):
+        with open(os.path.join(args.output_dir, f"{name}.jpg"), "wb") as f:
+            f.write(data)
+        with open(os.path.join(args.output_dir, f"{name}.json"), "w") as f:
+            json.dump(expected, f, indent=2)
+        written += 1
+    print(f"Wrote {written} images to {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import re
+import cv2
+import numpy as np
+
+# Canonical size of a rectified ID-1 card (85.6 x 54 mm at ~300 dpi)
+CARD_WIDTH = 1012
+CARD_HEIGHT = 638
+CARD_ASPECT = CARD_WIDTH / CARD_HEIGHT
+
+DATE_PATTERN = r'\d{2}-\d{2}-\d{4}|\d{8}'
+
+# Field zones of the Brunei IC, as fractions (x0, y0, x1, y1) of the
+# rectified card. A field may span several text lines, each recognized
+# separately. `pattern` validates the recognized value; fields marked
+# `required` must validate for the card to count as matching the template.
+# The zones were measured on sample cards; re-measure them if the card
+# design changes.
+CARD_LAYOUTS = {
+    "front": {
+        "id_number": {"lines": [(0.60, 0.13, 0.98, 0.25)], "pattern": r'\d{2}-?\d{6}', "required": True},
+        "full_name": {"lines": [(0.33, 0.29, 0.98, 0.39), (0.33, 0.39, 0.98, 0.49)]},
+        "date_of_birth": {"lines": [(0.33, 0.57, 0.66, 0.67)], "pattern": DATE_PATTERN},
+        "gender": {"lines": [(0.66, 0.57, 0.98, 0.67)]},
+        "place_of_birth": {"lines": [(0.33, 0.72, 0.98, 0.82)]}
+    },
+    "back": {
+        "date_of_issue": {"lines": [(0.04, 0.64, 0.40, 0.74)], "pattern": DATE_PATTERN, "required": True},
+        "date_of_expiry": {"lines": [(0.42, 0.64, 0.78, 0.74)], "pattern": DATE_PATTERN}
+    }
+}
+
+# Longest side used when searching for the card outline
+_SEARCH_SIDE = 640
+
+
+def order_corners(points):
+    """
+    Order four points as top-left, top-right, bottom-right, bottom-left.
+    """
+    points = np.asarray(points, dtype=np.float32).reshape(4, 2)
+    sums = points.sum(axis=1)
+    diffs = np.diff(points, axis=1).ravel()
+    return np.array([
+        points[np.argmin(sums)],
+        points[np.argmin(diffs)],
+        points[np.argmax(sums)],
+        points[np.argmax(diffs)]
+    ], dtype=np.float32)
+
+
+def find_card_quad(img, min_area_ratio=0.2):
+    """
+    Find the outline of an ID card in a photo. Returns the four corners in
+    original image coordinates, or None if no card-shaped quadrilateral
+    covering at least `min_area_ratio` of the image is found.
+    """
+    height, width = img.shape[:2]
+    scale = min(1.0, _SEARCH_SIDE / max(height, width))
+    small = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else img
+
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+    gray = cv2.GaussianBlur(gray, (5, 5), 0)
+    edges = cv2.Canny(gray, 50, 150)
+    edges = cv2.dilate(edges, np.ones((3, 3), np.uint8))
+
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    min_area = min_area_ratio * small.shape[0] * small.shape[1]
+    for contour in sorted(contours, key=cv2.contourArea, reverse=True)[:5]:
+        if cv2.contourArea(contour) < min_area:
+            break
+        approx = cv2.approxPolyDP(contour, 0.02 * cv2.arcLength(contour, True), True)
+        if len(approx) != 4:
+            continue
+        corners = order_corners(approx)
+        top = np.linalg.norm(corners[1] - corners[0])
+        left = np.linalg.norm(corners[3] - corners[0])
+        aspect = max(top, left) / max(min(top, left), 1.0)
+        if 1.3 <= aspect <= 1.9:
+            return corners / scale
+    return None
+
+
+def rectify_card(img, corners=None):
+    """
+    Warp the card to CARD_WIDTH x CARD_HEIGHT. Returns None when no card
+    outline is found. Portrait quads are rotated to landscape.
+    """
+    if corners is None:
+        corners = find_card_quad(img)
+        if corners is None:
+            return None
+    corners = order_corners(corners)
+    if np.linalg.norm(corners[1] - corners[0]) < np.linalg.norm(corners[3] - corners[0]):
+        # Card photographed sideways: start from the bottom-left corner
+        corners = np.roll(corners, 1, axis=0)
+
+    target = np.array([
+        [0, 0], [CARD_WIDTH - 1, 0],
+        [CARD_WIDTH - 1, CARD_HEIGHT - 1], [0, CARD_HEIGHT - 1]
+    ], dtype=np.float32)
+    matrix = cv2.getPerspectiveTransform(corners, target)
+    return cv2.warpPerspective(img, matrix, (CARD_WIDTH, CARD_HEIGHT), flags=cv2.INTER_LINEAR)
+
+
+def field_boxes(card, side):
+    """
+    Pixel boxes (x0, y0, x1, y1) of the line crops cut by crop_fields, in
+    the same order.
+    """
+    height, width = card.shape[:2]
+    return [
+        (int(x0 * width), int(y0 * height), int(x1 * width), int(y1 * height))
+        for spec in CARD_LAYOUTS[side].values()
+        for x0, y0, x1, y1 in spec["lines"]
+    ]
+
+
+def crop_fields(card, side):
+    """
+    Cut the line crops of every field in the layout of `side`.
+    Returns a list of (field, crop) pairs in layout order.
+    """
+    fields = [field for field, spec in CARD_LAYOUTS[side].items() for _ in spec["lines"]]
+    return [
+        (field, card[y0:y1, x0:x1])
+        for field, (x0, y0, x1, y1) in zip(fields, field_boxes(card, side))
+    ]
+
+
+def validate_fields(fields, side):
+    """
+    Check recognized field values against the layout patterns. `fields`
+    maps field -> (text, score). Returns False when a required field is
+    missing or does not match, i.e. the image does not fit the template.
+    """
+    for field, spec in CARD_LAYOUTS[side].items():
+        text = fields.get(field, ("", 0.0))[0]
+        pattern = spec.get("pattern")
+        valid = bool(text) and (pattern is None or re.search(pattern, text.replace(" ", "")))
+        if spec.get("required") and not valid:
+            return False
+    return True
@@ -0,0 +1,176 @@
+import os
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_float(name, default):
+    value = os.environ.get(name)
+    return float(value) if value not in (None, "") else default
+
+
+def _env_choice(name, default, choices):
+    value = os.environ.get(name) or default
+    if value not in choices:
+        raise ValueError(f"{name}={value!r} is not one of {', '.join(choices)}")
+    return value
+
+
+# Level for the eKYC loggers. DEBUG adds per-stage details on the hot path
+# (image sizes, line counts), never the recognized text.
+LOG_LEVEL = os.environ.get("EKYC_LOG_LEVEL", "WARNING").upper()
+
+# OCR worker pool: number of threads that own a PaddleOCR instance, and how
+# many submitted sides may wait for a free worker before /ekyc returns 503.
+OCR_WORKERS = _env_int("EKYC_OCR_WORKERS", 2)
+OCR_QUEUE_DEPTH = _env_int("EKYC_OCR_QUEUE_DEPTH", 8)
+RETRY_AFTER_SECONDS = _env_int("EKYC_RETRY_AFTER_SECONDS", 5)
+
+# Time budget of an /ekyc or /ekyc/passport request from arrival (0 disables
+# deadlines). A side that starts with less than DEGRADE_REDUCED_BELOW_SECONDS
+# left skips the orientation classifiers and caps the detector input; below
+# DEGRADE_MINIMAL_BELOW_SECONDS it also uses the fast profile (see
+# deadline.py). New requests get 503 while the oldest queued side has
+# waited longer than QUEUE_WAIT_TARGET_SECONDS (0 disables shedding).
+REQUEST_DEADLINE_SECONDS = _env_float("EKYC_REQUEST_DEADLINE_SECONDS", 20.0)
+DEGRADE_REDUCED_BELOW_SECONDS = _env_float("EKYC_DEGRADE_REDUCED_BELOW_SECONDS", 12.0)
+DEGRADE_MINIMAL_BELOW_SECONDS = _env_float("EKYC_DEGRADE_MINIMAL_BELOW_SECONDS", 6.0)
+QUEUE_WAIT_TARGET_SECONDS = _env_float("EKYC_QUEUE_WAIT_TARGET_SECONDS", 5.0)
+
+# Build and warm each worker's OCR engine at startup; /ready reports 503
+# until this has finished. When off, engines are built on first request.
+OCR_WARMUP = _env_int("EKYC_OCR_WARMUP", 1) == 1
+
+# serve.py: number of server processes forked after the models are loaded
+# once in the parent, and whether the parent builds each process's
+# OCR_WORKERS engines before forking so their weights are shared.
+SERVER_WORKERS = _env_int("EKYC_SERVER_WORKERS", 2)
+PRELOAD_MODELS = _env_int("EKYC_PRELOAD_MODELS", 1) == 1
+
+# Async job API (/ekyc/jobs): how many jobs may be queued or running before
+# new ones get 503, how long finished results are kept, how often a job
+# retries a full worker queue, and the SSE keep-alive interval.
+JOB_MAX_PENDING = _env_int("EKYC_JOB_MAX_PENDING", 32)
+JOB_TTL_SECONDS = _env_float("EKYC_JOB_TTL_SECONDS", 600.0)
+JOB_RETRY_INTERVAL_SECONDS = _env_float("EKYC_JOB_RETRY_INTERVAL_SECONDS", 0.2)
+JOB_EVENTS_KEEPALIVE_SECONDS = _env_float("EKYC_JOB_EVENTS_KEEPALIVE_SECONDS", 15.0)
+
+# When /ekyc processes the back of an ID card:
+#   always      - both sides in parallel, every time
+#   sequential  - the front first; the back only if required fields are missing
+#   speculative - both sides in parallel; the back is cancelled (if it has not
+#                 started yet) once the front fills every required field
+BACK_SIDE_POLICY = _env_choice("EKYC_BACK_SIDE_POLICY", "always", ("always", "sequential", "speculative"))
+# Fields the front must fill for the back to be skipped, and the minimum
+# front recognition confidence for them to count
+REQUIRED_FIELDS = tuple(
+    field.strip()
+    for field in os.environ.get("EKYC_REQUIRED_FIELDS", "id_number,full_name,date_of_birth").split(",")
+    if field.strip()
+)
+REQUIRED_FIELD_MIN_CONFIDENCE = _env_float("EKYC_REQUIRED_FIELD_MIN_CONFIDENCE", 0.8)
+
+# Inference backend: "paddle" (native Paddle inference), "onnx" (ONNX Runtime
+# CPU) or "openvino" (ONNX Runtime with the OpenVINO execution provider).
+# The ONNX backends load det/, rec/ and optionally cls/ models exported
+# under ONNX_MODEL_DIR, optionally with dynamic INT8 quantization; 0 threads
+# keeps ONNX Runtime's default.
+OCR_BACKEND = _env_choice("EKYC_OCR_BACKEND", "paddle", ("paddle", "onnx", "openvino"))
+ONNX_MODEL_DIR = os.environ.get("EKYC_ONNX_MODEL_DIR", "models/onnx")
+ONNX_INT8 = os.environ.get("EKYC_ONNX_INT8", "0") == "1"
+ONNX_INTRA_OP_THREADS = _env_int("EKYC_ONNX_INTRA_OP_THREADS", 0)
+ONNX_INTER_OP_THREADS = _env_int("EKYC_ONNX_INTER_OP_THREADS", 0)
+
+# PaddleOCR's page and per-line orientation classifiers: "on", "off" or
+# "auto", which skips both for images rotated upright by (ORIENTATION_PROBE=1,
+# paddle backend only) one low-resolution orientation prediction with at
+# least ORIENTATION_PROBE_MIN_SCORE, and only the page classifier when an
+# EXIF orientation tag or a landscape card outline rules out a quarter
+# turn. Requests can override this with angle_cls.
+ANGLE_CLS = _env_choice("EKYC_ANGLE_CLS", "auto", ("auto", "on", "off"))
+ORIENTATION_PROBE = os.environ.get("EKYC_ORIENTATION_PROBE", "1") == "1"
+ORIENTATION_PROBE_MIN_SCORE = _env_float("EKYC_ORIENTATION_PROBE_MIN_SCORE", 0.9)
+
+# Preprocessing profile used when a request does not pick one:
+# "quality" (full resolution, strongest filtering), "balanced" or "fast".
+_PROFILES = ("quality", "balanced", "fast")
+PREPROCESS_PROFILE = _env_choice("EKYC_PREPROCESS_PROFILE", "quality", _PROFILES)
+
+# OCR mode: "full" detects and recognizes every line on the page; "roi"
+# rectifies the card and recognizes only the Brunei IC field zones when the
+# side (front/back) is known, falling back to "full" if the card does not
+# match the layout template; "adaptive" runs a cheap full-page pass and
+# re-recognizes only its low-confidence lines (see below); "mrz" locates a
+# passport's machine readable zone and recognizes only its two lines,
+# falling back to "full" when there is none or a check digit fails.
+OCR_MODE = _env_choice("EKYC_OCR_MODE", "full", ("full", "roi", "adaptive", "mrz"))
+
+# Adaptive mode (EKYC_OCR_MODE=adaptive): a first pass with a cheap profile,
+# then only the lines scoring below ADAPTIVE_MIN_LINE_CONFIDENCE are cut from
+# the full-resolution image, enhanced with the retry profile and recognized
+# again (at most ADAPTIVE_MAX_RETRY_LINES of them). The retry only runs when
+# a field of the card layout is missing or below the same confidence.
+ADAPTIVE_FIRST_PROFILE = _env_choice("EKYC_ADAPTIVE_FIRST_PROFILE", "fast", _PROFILES)
+ADAPTIVE_RETRY_PROFILE = _env_choice("EKYC_ADAPTIVE_RETRY_PROFILE", "quality", _PROFILES)
+ADAPTIVE_MIN_LINE_CONFIDENCE = _env_float("EKYC_ADAPTIVE_MIN_LINE_CONFIDENCE", 0.9)
+ADAPTIVE_MAX_RETRY_LINES = _env_int("EKYC_ADAPTIVE_MAX_RETRY_LINES", 12)
+# Recognition model for ROI crops; empty uses the PaddleOCR default.
+REC_MODEL_NAME = os.environ.get("EKYC_REC_MODEL_NAME", "")
+
+# Cross-request micro-batching in front of PaddleOCR predict. A max batch
+# size of 1 disables batching and each worker runs its own predict calls.
+OCR_BATCH_MAX_SIZE = _env_int("EKYC_OCR_BATCH_MAX_SIZE", 1)
+OCR_BATCH_MAX_WAIT_MS = _env_float("EKYC_OCR_BATCH_MAX_WAIT_MS", 20.0)
+
+# Quality gate, run on a downscaled copy right after decoding: images with
+# a short side under QUALITY_MIN_SIDE pixels, more than the given fraction
+# of nearly black or nearly white pixels, or a Laplacian variance (sharpness)
+# under QUALITY_MIN_SHARPNESS are rejected before preprocessing and OCR.
+# With QUALITY_REQUIRE_CARD, images without a card outline (and not cropped
+# to a card's aspect ratio) are rejected too. Off by default: with it on,
+# small uploads that preprocessing would upscale (see upscale_below) and
+# read are rejected instead.
+QUALITY_GATE = _env_int("EKYC_QUALITY_GATE", 0) == 1
+QUALITY_MIN_SIDE = _env_int("EKYC_QUALITY_MIN_SIDE", 300)
+QUALITY_MIN_SHARPNESS = _env_float("EKYC_QUALITY_MIN_SHARPNESS", 15.0)
+QUALITY_MAX_DARK_FRACTION = _env_float("EKYC_QUALITY_MAX_DARK_FRACTION", 0.6)
+QUALITY_MAX_BRIGHT_FRACTION = _env_float("EKYC_QUALITY_MAX_BRIGHT_FRACTION", 0.6)
+QUALITY_REQUIRE_CARD = _env_int("EKYC_QUALITY_REQUIRE_CARD", 0) == 1
+
+# PDF and multi-page TIFF input: resolution pages are rasterized at (capped
+# by the preprocessing profile's max_side) and how many pages are read.
+PDF_DPI = _env_int("EKYC_PDF_DPI", 200)
+PDF_MAX_PAGES = _env_int("EKYC_PDF_MAX_PAGES", 20)
+
+# Upload limits, checked before an image is decoded.
+MAX_UPLOAD_BYTES = _env_int("EKYC_MAX_UPLOAD_BYTES", 10 * 1024 * 1024)
+MAX_IMAGE_PIXELS = _env_int("EKYC_MAX_IMAGE_PIXELS", 40_000_000)
+
+# Result cache for process_document, keyed by image content hash plus the
+# OCR/preprocessing config. Max entries of 0 disables it; an empty DB path
+# keeps the cache in memory only.
+RESULT_CACHE_MAX_ENTRIES = _env_int("EKYC_RESULT_CACHE_MAX_ENTRIES", 256)
+RESULT_CACHE_TTL_SECONDS = _env_float("EKYC_RESULT_CACHE_TTL_SECONDS", 3600.0)
+RESULT_CACHE_DB_PATH = os.environ.get("EKYC_RESULT_CACHE_DB_PATH", "")
+
+# Perceptual-hash index of recently seen images (see phash.py). An image
+# within DUPLICATE_MAX_DISTANCE bits (of 255) of one seen in the last
+# DUPLICATE_TTL_SECONDS, with the same identity fields read from it, is
+# flagged as a replay. Every image is still OCR'd; only identical bytes are
+# answered from the result cache. /ekyc also flags a front and back within
+# DUPLICATE_MAX_DISTANCE of each other. Max entries of 0 disables the
+# index; an empty DB path keeps it in memory only.
+DUPLICATE_INDEX_MAX_ENTRIES = _env_int("EKYC_DUPLICATE_INDEX_MAX_ENTRIES", 4096)
+DUPLICATE_TTL_SECONDS = _env_float("EKYC_DUPLICATE_TTL_SECONDS", 86400.0)
+DUPLICATE_MAX_DISTANCE = _env_int("EKYC_DUPLICATE_MAX_DISTANCE", 16)
+DUPLICATE_DB_PATH = os.environ.get("EKYC_DUPLICATE_DB_PATH", "")
+
+# Shared secret for the /admin routes, sent in the X-Admin-Token header.
+# Empty (the default) disables them.
+ADMIN_TOKEN = os.environ.get("EKYC_ADMIN_TOKEN", "")
+
+# Directory of document templates (*.yaml, see document_templates.py),
+# compiled once when document_detector is imported
+TEMPLATE_DIR = os.environ.get("EKYC_TEMPLATE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates"))
@@ -0,0 +1,79 @@
+import time
+
+import config
+from preprocess import detection_options
+
+# Cheaper settings applied to a side when little of its request's time budget
+# remains: the orientation classifiers are skipped, the text detector gets a
+# smaller input, and at the last level preprocessing uses the fast profile.
+DEGRADATION_LEVELS = (
+    {"name": "full"},
+    {"name": "reduced", "angle_cls": "off", "det_limit_side_len": 960},
+    {"name": "minimal", "angle_cls": "off", "det_limit_side_len": 640, "profile": "fast"}
+)
+
+
+class DeadlineExceeded(Exception):
+    """Raised at a stage boundary once a request's time budget is spent."""
+
+    def __init__(self, stage, seconds):
+        super().__init__(f"Request deadline of {seconds:g}s exceeded at {stage}")
+        self.stage = stage
+        self.seconds = seconds
+
+
+class Deadline:
+    """
+    Time budget of one request, started when it arrives. It goes with each
+    side through the worker queue, preprocessing, OCR and extraction:
+    check() ends the work between stages once the budget is spent, and
+    level() picks cheaper settings when little of it remains.
+    """
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires = time.monotonic() + seconds
+
+    def remaining(self):
+        return self.expires - time.monotonic()
+
+    def check(self, stage):
+        if self.remaining() <= 0:
+            raise DeadlineExceeded(stage, self.seconds)
+
+    def level(self):
+        """
+        Index into DEGRADATION_LEVELS for the remaining budget.
+        """
+        remaining = self.remaining()
+        if remaining < config.DEGRADE_MINIMAL_BELOW_SECONDS:
+            return 2
+        if remaining < config.DEGRADE_REDUCED_BELOW_SECONDS:
+            return 1
+        return 0
+
+
+def start_deadline(seconds=None):
+    """
+    A Deadline of `seconds` (default config.REQUEST_DEADLINE_SECONDS), or
+    None when deadlines are disabled.
+    """
+    seconds = config.REQUEST_DEADLINE_SECONDS if seconds is None else seconds
+    return Deadline(seconds) if seconds > 0 else None
+
+
+def degrade(level, profile=None, angle_cls=None):
+    """
+    (profile, angle_cls, detection options for run_ocr) with the settings
+    of a degradation level applied; level 0 leaves them as they are.
+    """
+    settings = DEGRADATION_LEVELS[level]
+    profile = settings.get("profile", profile)
+    options = detection_options(profile)
+    if "det_limit_side_len" in settings:
+        # A "max" limit bounds the detector input; keep a profile's smaller one
+        limit = settings["det_limit_side_len"]
+        if options.get("text_det_limit_type") == "max":
+            limit = min(limit, options["text_det_limit_side_len"])
+        options = {**options, "text_det_limit_side_len": limit, "text_det_limit_type": "max"}
+    return profile, settings.get("angle_cls", angle_cls), options
@@ -1,93 +1,170 @@
-from utils import extract_id_number, extract_passport_number
+import re
+from document_templates import load_templates
+from utils import extract_id_number, extract_gender, split_name
+
+# Compiled once; every detect_document call scans the texts a single time
+TEMPLATES = load_templates()
+
 
 def classify_brunei_id(id_number):
-    if id_number.startswith(('50', '51')):
-        return "Green", "Foreigner"
-    elif id_number.startswith(('30', '31')):
-        return "Red", "Permanent Resident"
-    elif id_number.startswith(('00', '01')):
-        return "Yellow", "Brunei National"
-    else:
-        return "Unknown", "Unknown"
+    """
+    (card colour, holder type) from the prefix rules of the Brunei IC template.
+    """
+    fields = TEMPLATES["brunei_ic"].classify(id_number)
+    return fields["card_color"], fields["holder_type"]
 
 
 def detect_document(texts):
     """
-    Detect document type: National ID or Passport
-    Check for specific keywords to determine document type
+    Detect the document type (National ID, Passport or Unknown) and extract
+    its fields, using the templates under config.TEMPLATE_DIR. ID card
+    keywords take precedence over passport keywords; without any keyword an
+    ID number, then a passport number, identifies the document.
     """
-    # Convert texts to lowercase for keyword search
-    texts_lower = [t.lower() for t in texts]
-    all_text = ' '.join(texts_lower)
-    
-    # Keywords for National ID (Brunei) - Front and Back
-    id_keywords = ['kad pengenalan', 'pengenalan', 'negara brunei', 'jantina', 'tarikh lahir', 
-                  'dikeluarkan', 'mansuh', 'alamat']
-    
-    # Keywords for Passport
-    passport_keywords = ['passport', 'pasport']
-    
-    # Check for National ID keywords first
-    for keyword in id_keywords:
-        if keyword in all_text:
-            # It matches ID keywords, so we extract details
-            from utils import extract_all_details
-            details = extract_all_details(texts)
-            
-            # Try to classify
-            id_number = extract_id_number(texts)
-            if id_number:
-                color, holder = classify_brunei_id(id_number)
-                details.update({
-                    "document_type": "National ID",
-                    "card_color": color,
-                    "holder_type": holder
-                })
-            else:
-                # Found keywords but no standard ID number (likely Back of ID)
-                details.update({
-                    "document_type": "National ID",
-                    "card_color": "Unknown",
-                    "holder_type": "Unknown"
-                })
-            
-            return details
-    
-    # Check for Passport keywords
-    for keyword in passport_keywords:
-        if keyword in all_text:
-            passport_no = extract_passport_number(texts)
-            if passport_no:
-                return {
-                    "document_type": "Passport",
-                    "passport_number": passport_no
-                }
-    
-    # Fallback: try to extract ID number (more likely to be on ID card)
-    id_number = extract_id_number(texts)
-    if id_number:
-        color, holder = classify_brunei_id(id_number)
-        from utils import extract_all_details
-        details = extract_all_details(texts)
-        details.update({
-            "document_type": "National ID",
-            "card_color": color,
-            "holder_type": holder
-        })
-        return details
-    
-    # Last resort: try passport number
-    passport_no = extract_passport_number(texts)
-    if passport_no:
-        return {
-            "document_type": "Passport",
-            "passport_number": passport_no
-        }
-    
-    # Even if unknown, try to extract details (handles back of ID card)
-    from utils import extract_all_details
-    details = extract_all_details(texts)
+    return TEMPLATES.detect(texts)
+
+
+def detect_from_fields(fields):
+    """
+    Build the detect_document result from values read out of known field
+    zones of a Brunei IC (see card_layout). `fields` maps field name to
+    (text, score); no label searching is needed.
+    """
+    texts = {field: text for field, (text, _) in fields.items() if text}
+    date_pattern = r'\d{2}-\d{2}-\d{4}|\d{8}'
+
+    def date_field(name):
+        match = re.search(date_pattern, texts.get(name, "").replace(" ", ""))
+        return match.group() if match else None
+
+    full_name = texts.get("full_name")
+    name_details = split_name(full_name)
+    id_number = extract_id_number([texts["id_number"]]) if "id_number" in texts else None
+
+    details = {
+        "full_name": full_name,
+        "first_name": name_details["first_name"],
+        "middle_name": name_details["middle_name"],
+        "last_name": name_details["last_name"],
+        "id_number": id_number,
+        "date_of_birth": date_field("date_of_birth"),
+        "place_of_birth": texts.get("place_of_birth"),
+        "gender": extract_gender([texts["gender"]]) if "gender" in texts else None,
+        "date_of_issue": date_field("date_of_issue"),
+        "date_of_expiry": date_field("date_of_expiry"),
+        "raw_text": " ".join(texts.values())
+    }
+    details["field_confidence"] = {
+        field: round(score, 3) for field, (_, score) in fields.items() if details.get(field)
+    }
+
+    color, holder = classify_brunei_id(id_number) if id_number else ("Unknown", "Unknown")
     details.update({
-        "document_type": "Unknown"
+        "document_type": "National ID",
+        "card_color": color,
+        "holder_type": holder
     })
     return details
+
+
+def missing_required_fields(ocr_result, required_fields, min_confidence=0.0):
+    """
+    Required fields that a side's result does not fill with at least
+    `min_confidence`. Results without per-field confidences are judged by
+    their mean recognition confidence.
+    """
+    field_confidence = ocr_result.get('field_confidence')
+    if field_confidence is None:
+        if (ocr_result.get('confidence') or 0.0) < min_confidence:
+            return list(required_fields)
+        return [field for field in required_fields if not ocr_result.get(field)]
+    return [
+        field for field in required_fields
+        if not ocr_result.get(field) or field_confidence.get(field, 0.0) < min_confidence
+    ]
+
+
+def merge_id_sides(ocr_result_front, ocr_result_back=None):
+    """
+    Combine the results of the front and back of an ID card into one record.
+    `ocr_result_back` is None when the back was not processed.
+    """
+    ocr_result_back = ocr_result_back or {}
+    # Initialize with front data (primary source for Name, ID, DOB)
+    merged_ocr = ocr_result_front.copy()
+    field_confidence = dict(ocr_result_front.get('field_confidence') or {})
+
+    # Helper to update if missing or empty
+    def update_if_missing(key, source):
+        if not merged_ocr.get(key) and source.get(key):
+            merged_ocr[key] = source[key]
+            # The confidence follows the side the value came from
+            field_confidence.pop(key, None)
+            if key in (source.get('field_confidence') or {}):
+                field_confidence[key] = source['field_confidence'][key]
+
+    # Fill in missing details from Back ID (especially Issue Date, Expiry)
+    update_if_missing('date_of_issue', ocr_result_back)
+    update_if_missing('date_of_expiry', ocr_result_back)
+    update_if_missing('place_of_birth', ocr_result_back)
+
+    # If front failed to extract important fields, fallback to back
+    update_if_missing('full_name', ocr_result_back)
+    update_if_missing('id_number', ocr_result_back)
+
+    # Include raw text from both for auditing
+    merged_ocr['raw_text_front'] = ocr_result_front.get('raw_text')
+    merged_ocr['raw_text_back'] = ocr_result_back.get('raw_text')
+    # Remove individual raw_text to keep it clean, or keep them as 'raw_text_front' etc.
+    if 'raw_text' in merged_ocr:
+        del merged_ocr['raw_text']
+
+    # Simplify debug info
+    merged_ocr['confidence_front'] = ocr_result_front.get('confidence')
+    merged_ocr['confidence_back'] = ocr_result_back.get('confidence')
+    if 'confidence' in merged_ocr: del merged_ocr['confidence']
+
+    merged_ocr['field_confidence'] = field_confidence
+    merged_ocr['lines_front'] = merged_ocr.pop('lines', None)
+    merged_ocr['lines_back'] = ocr_result_back.get('lines')
+
+    return merged_ocr
+
+
+def group_pages(pages):
+    """
+    Group per-page results of a multi-page document into documents.
+    `pages` is a list of (page number, process_document result). National
+    ID pages with an ID number are fronts; those without are backs, each
+    paired in page order with the nearest unpaired front before it (or
+    after it, for a back scanned first) and merged with merge_id_sides.
+    Every other page is a document of its own.
+    Returns [{"document_type", "pages", "result"}] in page order.
+    """
+    documents = []
+    backs = []
+    for number, result in pages:
+        if result.get('document_type') == 'National ID':
+            if result.get('id_number'):
+                documents.append({"document_type": "National ID", "pages": [number], "result": result, "back": None})
+            else:
+                backs.append((number, result))
+        else:
+            documents.append({"document_type": result.get('document_type', 'Unknown'), "pages": [number], "result": result})
+
+    fronts = [document for document in documents if "back" in document]
+    for number, back in backs:
+        unpaired = [front for front in fronts if front["back"] is None]
+        before = [front for front in unpaired if front["pages"][0] < number]
+        front = before[-1] if before else (unpaired[0] if unpaired else None)
+        if front is None:
+            documents.append({"document_type": "National ID", "pages": [number], "result": back})
+            continue
+        front["back"] = back
+        front["pages"].append(number)
+
+    for document in documents:
+        if "back" in document:
+            document["result"] = merge_id_sides(document["result"], document.pop("back"))
+    documents.sort(key=lambda document: document["pages"][0])
+    return documents
@@ -0,0 +1,262 @@
+import glob
+import os
+import re
+
+import yaml
+
+import config
+from mrz import mrz_fields
+from utils import extract_all_details
+
+# Named extractors a template can run over the texts; their fields are the
+# base of the result, refined by the template's own field patterns
+EXTRACTORS = {
+    "id_card": extract_all_details,
+    "mrz": mrz_fields
+}
+
+_TEMPLATE_KEYS = {
+    "name", "document_type", "priority", "keywords", "extractor", "fields",
+    "require", "fallback", "set", "classify"
+}
+_FIELD_KEYS = {"pattern", "nospace", "letters", "exclude"}
+
+
+class FieldPattern:
+    """
+    A field read by regular expression: the first match in a line is the
+    value, unless it is an `exclude` word or (with `letters`) has no letter,
+    in which case the next line is tried. With `nospace` lines are matched
+    with their spaces removed.
+    """
+
+    def __init__(self, name, spec):
+        self.name = name
+        self.pattern = re.compile(spec["pattern"])
+        self.nospace = bool(spec.get("nospace", False))
+        self.letters = bool(spec.get("letters", False))
+        self.exclude = frozenset(spec.get("exclude", ()))
+
+    def extract(self, texts):
+        for text in texts:
+            match = self.pattern.search(text.replace(" ", "") if self.nospace else text)
+            if not match:
+                continue
+            value = match.group()
+            if value in self.exclude or (self.letters and not any(c.isalpha() for c in value)):
+                continue
+            return value
+        return None
+
+
+class DocumentTemplate:
+    """
+    One document type, as declared in a templates/*.yaml file:
+
+    - keywords: lowercase substrings of the joined texts that identify it
+    - extractor: name of an EXTRACTORS function giving the base fields
+    - fields: {field: {pattern, nospace, letters, exclude}} read by pattern
+    - require: fields that must be found for a keyword match to count
+    - fallback: fields that identify the document when no keyword matched
+    - set: constant fields of the result
+    - classify: prefix rules on a field ({field, rules: [{prefixes, set}],
+      default}) adding fields such as the card colour
+    - priority: keyword matches of a lower priority win over any match of a
+      higher one; within a priority the most keywords win
+    """
+
+    def __init__(self, spec, source="<template>"):
+        unknown = set(spec) - _TEMPLATE_KEYS
+        if unknown:
+            raise ValueError(f"{source}: unknown template keys {sorted(unknown)}")
+        if not spec.get("name") or not spec.get("document_type"):
+            raise ValueError(f"{source}: a template needs a name and a document_type")
+        if spec.get("extractor") and spec["extractor"] not in EXTRACTORS:
+            raise ValueError(f"{source}: unknown extractor {spec['extractor']!r}")
+        for field, field_spec in (spec.get("fields") or {}).items():
+            if "pattern" not in field_spec or set(field_spec) - _FIELD_KEYS:
+                raise ValueError(f"{source}: field {field!r} needs a pattern and only {sorted(_FIELD_KEYS)}")
+
+        self.name = spec["name"]
+        self.document_type = spec["document_type"]
+        self.priority = int(spec.get("priority", 0))
+        self.keywords = tuple(keyword.lower() for keyword in spec.get("keywords") or ())
+        self.extractor = EXTRACTORS.get(spec.get("extractor"))
+        self.fields = [FieldPattern(field, field_spec) for field, field_spec in (spec.get("fields") or {}).items()]
+        self.require = tuple(spec.get("require") or ())
+        self.fallback = tuple(spec.get("fallback") or ())
+        self.set = dict(spec.get("set") or {})
+        classify = spec.get("classify") or {}
+        self.classify_field = classify.get("field")
+        self.classify_rules = [
+            (tuple(str(prefix) for prefix in rule["prefixes"]), dict(rule["set"]))
+            for rule in classify.get("rules") or ()
+        ]
+        self.classify_default = dict(classify.get("default") or {})
+
+    def classify(self, value):
+        """
+        Fields set by the first prefix rule `value` matches, else the default.
+        """
+        if value:
+            for prefixes, fields in self.classify_rules:
+                if value.startswith(prefixes):
+                    return fields
+        return self.classify_default
+
+    def __repr__(self):
+        return f"DocumentTemplate({self.name!r})"
+
+
+class _Extraction:
+    """
+    Field values for one detect() call. Each extractor and field pattern
+    runs at most once, however many templates are tried.
+    """
+
+    def __init__(self, texts):
+        self.texts = texts
+        self._extracted = {}
+        self._fields = {}
+
+    def extracted(self, extractor):
+        if extractor not in self._extracted:
+            self._extracted[extractor] = extractor(self.texts)
+        return self._extracted[extractor]
+
+    def fields(self, template):
+        if template.name not in self._fields:
+            values = dict(self.extracted(template.extractor)) if template.extractor else {}
+            values.update({field.name: field.extract(self.texts) for field in template.fields})
+            self._fields[template.name] = values
+        return self._fields[template.name]
+
+    def has(self, template, names):
+        values = self.fields(template)
+        return all(values.get(name) for name in names)
+
+
+def _trie_pattern(words):
+    """
+    A regex matching the longest of `words`, with common prefixes merged so
+    that its cost grows with keyword length rather than keyword count.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return '(?:' + body + ')?' if '' in node else body
+
+    return build(trie)
+
+
+class TemplateRegistry:
+    """
+    All document templates compiled into one keyword scanner, so the texts
+    are searched once whatever the number of templates.
+    """
+
+    def __init__(self, templates):
+        self.templates = sorted(templates, key=lambda template: template.priority)
+        self._order = {template: index for index, template in enumerate(self.templates)}
+        names = [template.name for template in self.templates]
+        duplicates = {name for name in names if names.count(name) > 1}
+        if duplicates:
+            raise ValueError(f"Duplicate template names {sorted(duplicates)}")
+
+        self._by_keyword = {}
+        for template in self.templates:
+            for keyword in template.keywords:
+                self._by_keyword.setdefault(keyword, []).append(template)
+        keywords = sorted(self._by_keyword)
+        # The overlapping lookahead finds the longest keyword at each
+        # position; shorter keywords it starts with count as found too
+        self._implied = {
+            keyword: [other for other in keywords if keyword.startswith(other)] for keyword in keywords
+        }
+        self._scan = None
+        if keywords:
+            first = ''.join(sorted({keyword[0] for keyword in keywords}))
+            self._scan = re.compile(f'(?=[{re.escape(first)}])(?=({_trie_pattern(keywords)}))')
+
+    def __getitem__(self, name):
+        for template in self.templates:
+            if template.name == name:
+                return template
+        raise KeyError(name)
+
+    def scores(self, texts):
+        """
+        {template: number of its keywords found} for the templates with any.
+        """
+        if self._scan is None:
+            return {}
+        found = set()
+        for keyword in self._scan.findall(' '.join(texts).lower()):
+            found.update(self._implied[keyword])
+        scores = {}
+        for keyword in found:
+            for template in self._by_keyword[keyword]:
+                scores[template] = scores.get(template, 0) + 1
+        return scores
+
+    def match(self, texts):
+        """
+        (template, extraction) for the texts; the template is None when
+        none matches. Keyword matches are tried by priority, then score,
+        then template order; without one, the first template whose
+        fallback fields are found.
+        """
+        extraction = _Extraction(texts)
+        scores = self.scores(texts)
+        candidates = sorted(scores, key=lambda template: (template.priority, -scores[template], self._order[template]))
+        for template in candidates:
+            if extraction.has(template, template.require):
+                return template, extraction
+        for template in self.templates:
+            if template.fallback and extraction.has(template, template.fallback):
+                return template, extraction
+        return None, extraction
+
+    def detect(self, texts):
+        """
+        The detect_document result for the texts: the matched template's
+        fields with its document_type, constant and classified fields, or
+        the ID card fields with document_type "Unknown".
+        """
+        template, extraction = self.match(texts)
+        if template is None:
+            details = dict(extraction.extracted(EXTRACTORS["id_card"]))
+            details["document_type"] = "Unknown"
+            return details
+        details = dict(extraction.fields(template))
+        details["document_type"] = template.document_type
+        details.update(template.set)
+        if template.classify_field:
+            details.update(template.classify(details.get(template.classify_field)))
+        return details
+
+
+def load_templates(directory=None):
+    """
+    Compile every *.yaml template in `directory` (default
+    config.TEMPLATE_DIR) into a TemplateRegistry. Invalid templates raise
+    ValueError naming the file.
+    """
+    directory = directory or config.TEMPLATE_DIR
+    templates = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.yaml"))):
+        with open(path) as f:
+            spec = yaml.safe_load(f)
+        if not isinstance(spec, dict):
+            raise ValueError(f"{path}: a template must be a mapping")
+        templates.append(DocumentTemplate(spec, path))
+    return TemplateRegistry(templates)
@@ -0,0 +1,133 @@
+import io
+import logging
+import cv2
+import numpy as np
+import config
+from preprocess import ImageTooLargeError, open_image
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_EXTENSIONS = (".pdf", ".tif", ".tiff")
+
+_PDF_MAGIC = b"%PDF"
+_TIFF_MAGICS = (b"II*\x00", b"MM\x00*")
+
+
+def _read(source):
+    if hasattr(source, "read"):
+        return source.read()
+    return source
+
+
+def document_kind(source):
+    """
+    "pdf" for a PDF and "tiff" for a multi-page TIFF (path or bytes), else
+    None. A single-page TIFF is an ordinary image.
+    """
+    if isinstance(source, str):
+        extension = source.lower().rsplit(".", 1)[-1]
+        kind = {"pdf": "pdf", "tif": "tiff", "tiff": "tiff"}.get(extension)
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        head = bytes(source[:4])
+        kind = "pdf" if head == _PDF_MAGIC else "tiff" if head in _TIFF_MAGICS else None
+    else:
+        return None
+    if kind == "tiff":
+        try:
+            with open_image(source if isinstance(source, str) else io.BytesIO(source)) as tiff:
+                if getattr(tiff, "n_frames", 1) < 2:
+                    return None
+        except OSError:
+            return None
+    return kind
+
+
+def _pymupdf():
+    # Only needed for PDF input; older releases only install the fitz name
+    try:
+        import pymupdf
+    except ImportError:
+        import fitz as pymupdf
+    return pymupdf
+
+
+def _open_pdf(source):
+    if isinstance(source, str):
+        return _pymupdf().open(source)
+    return _pymupdf().open(stream=bytes(source), filetype="pdf")
+
+
+def _check_pixels(width, height):
+    if width * height > config.MAX_IMAGE_PIXELS:
+        raise ImageTooLargeError(f"Page is {width}x{height} pixels, limit is {config.MAX_IMAGE_PIXELS}")
+
+
+def _render_pdf_page(page, dpi, max_side):
+    # Points are 1/72 inch; lower the DPI for pages that would exceed max_side
+    zoom = dpi / 72
+    if max_side:
+        zoom = min(zoom, max_side / max(page.rect.width, page.rect.height))
+    width, height = round(page.rect.width * zoom), round(page.rect.height * zoom)
+    _check_pixels(width, height)
+    pymupdf = _pymupdf()
+    pixmap = page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom), colorspace=pymupdf.csRGB, alpha=False)
+    rgb = np.frombuffer(pixmap.samples, dtype=np.uint8).reshape(pixmap.height, pixmap.width, 3)
+    return cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+
+
+def _render_tiff_frame(frame, max_side):
+    _check_pixels(*frame.size)
+    rgb = np.asarray(frame.convert("RGB"))
+    image = cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+    scale = min(1.0, max_side / max(image.shape[:2])) if max_side else 1.0
+    if scale < 1.0:
+        image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return image
+
+
+def page_count(source):
+    """
+    Number of pages of a PDF or TIFF, including any past
+    config.PDF_MAX_PAGES that iter_pages skips.
+    """
+    source = _read(source)
+    kind = document_kind(source)
+    if kind == "pdf":
+        with _open_pdf(source) as document:
+            return document.page_count
+    if kind == "tiff":
+        with open_image(source if isinstance(source, str) else io.BytesIO(source)) as tiff:
+            return getattr(tiff, "n_frames", 1)
+    raise ValueError("Not a PDF or TIFF document")
+
+
+def iter_pages(source, dpi=None, max_side=None, max_pages=None):
+    """
+    Yield (page number from 1, BGR image) for each page of a PDF or TIFF
+    given as a path, bytes or file-like object. Pages are rasterized one at
+    a time as the caller asks for them, so only one page image is held at
+    once. PDF pages are rendered at `dpi` (default config.PDF_DPI), lowered
+    so the long side stays within `max_side`. Stops after `max_pages`
+    (default config.PDF_MAX_PAGES).
+    """
+    source = _read(source)
+    dpi = dpi or config.PDF_DPI
+    max_pages = max_pages or config.PDF_MAX_PAGES
+    kind = document_kind(source)
+
+    if kind == "pdf":
+        with _open_pdf(source) as document:
+            if document.page_count > max_pages:
+                logger.warning("Document has %d pages, only the first %d are processed", document.page_count, max_pages)
+            for index in range(min(document.page_count, max_pages)):
+                yield index + 1, _render_pdf_page(document[index], dpi, max_side)
+    elif kind == "tiff":
+        with open_image(source if isinstance(source, str) else io.BytesIO(source)) as tiff:
+            frames = getattr(tiff, "n_frames", 1)
+            if frames > max_pages:
+                logger.warning("Document has %d pages, only the first %d are processed", frames, max_pages)
+            for index in range(min(frames, max_pages)):
+                tiff.seek(index)
+                yield index + 1, _render_tiff_frame(tiff, max_side)
+    else:
+        raise ValueError("Not a PDF or TIFF document")
@@ -0,0 +1,101 @@
+import asyncio
+import time
+import uuid
+
+
+class JobQueueFullError(Exception):
+    """Raised when too many jobs are already queued or running."""
+
+
+class Job:
+    """
+    One asynchronous /ekyc request. `front` and `back` hold each side's
+    OCR result as soon as it is available; `result` holds the merged record.
+    """
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.status = "queued"
+        self.created_at = time.time()
+        self.finished_at = None
+        self.front = None
+        self.back = None
+        self.sides_processed = None
+        self.result = None
+        self.error = None
+        self.version = 0
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self):
+        return self.status in ("done", "failed")
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "front": self.front,
+            "back": self.back,
+            "sides_processed": self.sides_processed,
+            "result": self.result,
+            "error": self.error
+        }
+
+
+class JobStore:
+    """
+    In-memory job registry, used only from the event loop thread.
+    At most `max_pending` jobs may be queued or running at once; finished
+    jobs are kept for `ttl_seconds` and then dropped.
+    """
+
+    def __init__(self, max_pending, ttl_seconds):
+        self.max_pending = max_pending
+        self.ttl_seconds = ttl_seconds
+        self._jobs = {}
+
+    @property
+    def pending(self):
+        return sum(1 for job in self._jobs.values() if not job.finished)
+
+    def create(self):
+        self._purge()
+        if self.pending >= self.max_pending:
+            raise JobQueueFullError(f"Too many pending jobs ({self.max_pending})")
+        job = Job()
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id):
+        self._purge()
+        return self._jobs.get(job_id)
+
+    def update(self, job, **fields):
+        for name, value in fields.items():
+            setattr(job, name, value)
+        if job.finished and job.finished_at is None:
+            job.finished_at = time.time()
+        job.version += 1
+        # Wake everyone waiting on the previous version
+        changed, job._changed = job._changed, asyncio.Event()
+        changed.set()
+
+    async def wait_for_change(self, job, version, timeout):
+        """
+        Wait until the job moves past `version`; returns False on timeout.
+        """
+        if job.version != version:
+            return True
+        try:
+            await asyncio.wait_for(job._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def _purge(self):
+        cutoff = time.time() - self.ttl_seconds
+        expired = [job_id for job_id, job in self._jobs.items() if job.finished and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
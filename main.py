@@ -1,21 +1,602 @@
-from preprocess import preprocess_image
-from ocr_engine import run_ocr
-from document_detector import detect_document
+import argparse
+import glob
+import json
+import logging
+import multiprocessing
+import os
+import time
+import numpy as np
+from tqdm import tqdm
+import config
+from preprocess import preprocess_image, load_image, get_profile, enhance_line, PREPROCESS_PROFILES
+from ocr_engine import run_ocr, run_recognition, engine_config, orientation_probe, warmup
+from orientation import ANGLE_CLS_MODES, exif_orientation, resolve_orientation
+from document_detector import detect_document, detect_from_fields, group_pages
+from ingest import DOCUMENT_EXTENSIONS, document_kind, iter_pages, page_count
+from card_layout import CARD_LAYOUTS, rectify_card, crop_fields, field_boxes, validate_fields
+from ocr_lines import OCRLines
+from quality_gate import ImageQualityError, assess_quality
+from result_cache import ResultCache
+from phash import DuplicateIndex, identity_key, perceptual_hash
+from mrz import read_mrz
+from deadline import DEGRADATION_LEVELS, DeadlineExceeded, degrade
+from metrics import Counter, Histogram, LATENCY_BUCKETS, observe_stage, span
 
-def process_document(image_path):
-    image = preprocess_image(image_path)
-    texts, confidence = run_ocr(image)
-    
-    print(f"DEBUG - Extracted texts: {texts}")
-    print(f"DEBUG - Confidence: {confidence}")
+logger = logging.getLogger(__name__)
 
-    result = detect_document(texts)
-    result["confidence"] = round(confidence, 2)
-    result["extracted_texts"] = texts  # Add this for debugging
+OCR_CONFIDENCE = Histogram(
+    "ekyc_ocr_confidence", "Average recognition confidence per processed image",
+    buckets=(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 1.0)
+)
 
+SIDE_SECONDS = Histogram(
+    "ekyc_side_seconds", "Time to process one image, cache hits excluded",
+    buckets=LATENCY_BUCKETS
+)
+
+ORIENTATION_DECISIONS = Counter(
+    "ekyc_orientation_decisions_total",
+    "Orientation classifier decisions by reason (forced, aspect, exif, probe_<angle>, unknown) and outcome"
+)
+OCR_PASSES = Counter("ekyc_ocr_passes_total", "Adaptive-mode OCR passes by pass (first, retry)")
+RETRY_LINES = Counter("ekyc_ocr_retry_lines_total", "Lines re-recognized by adaptive mode, by whether the retry scored higher")
+DEGRADATIONS = Counter("ekyc_degraded_sides_total", "Sides processed under a request deadline, by degradation level")
+DEADLINES_EXCEEDED = Counter("ekyc_deadline_exceeded_total", "Sides stopped by their request deadline, by stage")
+MRZ_READS = Counter("ekyc_mrz_reads_total", "MRZ-mode reads by outcome (valid, invalid, not_found)")
+QUALITY_REJECTIONS = Counter("ekyc_quality_rejections_total", "Images rejected by the quality gate, by reason")
+REPLAYS = Counter(
+    "ekyc_replayed_images_total",
+    "Images matching a recently seen one with the same identity fields, by outcome (cached: same bytes, "
+    "flagged: processed again)"
+)
+QUALITY_SECONDS_SAVED = Counter(
+    "ekyc_quality_seconds_saved_total",
+    "Estimated processing seconds saved by quality gate rejections, from the mean time per side"
+)
+
+# Per-process options for batch workers, set by _init_batch_worker
+_batch_options = {}
+
+def create_result_cache():
+    """
+    The process_document cache from config, or None when disabled.
+    """
+    if config.RESULT_CACHE_MAX_ENTRIES <= 0:
+        return None
+    return ResultCache(
+        config.RESULT_CACHE_MAX_ENTRIES,
+        config.RESULT_CACHE_TTL_SECONDS,
+        db_path=config.RESULT_CACHE_DB_PATH or None
+    )
+
+
+def create_duplicate_index():
+    """
+    The perceptual-hash index from config, or None when disabled.
+    """
+    if config.DUPLICATE_INDEX_MAX_ENTRIES <= 0:
+        return None
+    return DuplicateIndex(
+        config.DUPLICATE_INDEX_MAX_ENTRIES,
+        config.DUPLICATE_TTL_SECONDS,
+        db_path=config.DUPLICATE_DB_PATH or None
+    )
+
+
+result_cache = create_result_cache()
+duplicate_index = create_duplicate_index()
+
+
+def cache_fingerprint(profile=None, side=None, mode=None, angle_cls=None):
+    """
+    Settings that change what process_document returns for the same image.
+    """
+    mode = mode or config.OCR_MODE
+    fingerprint = {
+        "ocr": engine_config(),
+        "backend": [config.OCR_BACKEND, config.ONNX_INT8],
+        "preprocess": get_profile(profile),
+        "mode": mode,
+        "side": side,
+        "angle_cls": angle_cls or config.ANGLE_CLS
+    }
+    if mode == "adaptive":
+        fingerprint["adaptive"] = _adaptive_settings(profile)
+    return json.dumps(fingerprint, sort_keys=True, default=str)
+
+
+def _cache_key(source, profile=None, side=None, mode=None, angle_cls=None):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        data = source
+    elif isinstance(source, np.ndarray):
+        data = np.ascontiguousarray(source).tobytes() + str(source.shape).encode()
+    else:
+        return None
+    return ResultCache.make_key(data, cache_fingerprint(profile, side, mode, angle_cls))
+
+
+def _process_card_regions(image, side):
+    """
+    ROI mode: rectify the card and recognize only its field zones.
+    Returns None when no card is found or it does not fit the layout.
+    """
+    with span("rectify"):
+        card = rectify_card(image)
+    if card is None:
+        return None
+
+    crops = crop_fields(card, side)
+    with span("ocr"):
+        recognized = run_recognition([crop for _, crop in crops])
+
+    field_lines = {}
+    for (field, _), (text, score) in zip(crops, recognized):
+        field_lines.setdefault(field, []).append((text.strip(), score))
+    fields = {
+        field: (" ".join(text for text, _ in values if text), sum(score for _, score in values) / len(values))
+        for field, values in field_lines.items()
+    }
+    if not validate_fields(fields, side):
+        logger.debug("Card does not match the %s layout, falling back to full-page OCR", side)
+        return None
+
+    with span("extract"):
+        result = detect_from_fields(fields)
+    scores = [score for _, score in recognized]
+    result["confidence"] = round(sum(scores) / len(scores), 2)
+    result["extracted_texts"] = [text for text, _ in recognized if text]
+    # Field zones in rectified-card pixels
+    result["lines"] = OCRLines(
+        [text for text, _ in recognized],
+        [score for _, score in recognized],
+        field_boxes(card, side)
+    ).to_list()
     return result
 
 
+def _process_mrz(image):
+    """
+    MRZ mode: locate a passport's machine readable zone and recognize only
+    its two lines. Returns None when no MRZ is found or a check digit
+    fails, so the page gets full-page OCR instead.
+    """
+    with span("mrz"):
+        fields, recognized = read_mrz(image, run_recognition)
+    if not recognized:
+        outcome = "not_found"
+    else:
+        outcome = "valid" if fields is not None and fields["mrz"]["valid"] else "invalid"
+    MRZ_READS.inc(outcome=outcome)
+    if outcome != "valid":
+        logger.debug("No valid MRZ (%s), falling back to full-page OCR", outcome)
+        return None
+
+    texts = [text for text, _ in recognized]
+    scores = [score for _, score in recognized]
+    fields["confidence"] = round(sum(scores) / len(scores), 2)
+    fields["extracted_texts"] = texts
+    fields["lines"] = OCRLines(texts, scores).to_list()
+    return fields
+
+
+def _orient(image, source, angle_cls=None):
+    """
+    Rotate the image upright when that is cheaply known and pick the
+    orientation classifier options for run_ocr (see orientation.py).
+    """
+    with span("orientation"):
+        image, options, reason = resolve_orientation(
+            image, angle_cls or config.ANGLE_CLS,
+            exif=exif_orientation(source),
+            probe=orientation_probe(),
+            min_score=config.ORIENTATION_PROBE_MIN_SCORE
+        )
+    enabled = options["use_textline_orientation"]
+    ORIENTATION_DECISIONS.inc(reason=reason, classifiers="on" if enabled else "off")
+    return image, options, {"classifiers": enabled, "reason": reason}
+
+
+def _adaptive_settings(profile=None):
+    return {
+        "first": profile or config.ADAPTIVE_FIRST_PROFILE,
+        "retry": config.ADAPTIVE_RETRY_PROFILE,
+        "min_line_confidence": config.ADAPTIVE_MIN_LINE_CONFIDENCE,
+        "max_retry_lines": config.ADAPTIVE_MAX_RETRY_LINES
+    }
+
+
+def _needs_retry(result, side, threshold):
+    """
+    Whether an adaptive first pass left a card field missing or unsure.
+    """
+    field_confidence = result.get("field_confidence", {})
+    if any(score < threshold for score in field_confidence.values()):
+        return True
+    expected = CARD_LAYOUTS.get(side, {})
+    return any(not result.get(field) for field in expected)
+
+
+def _process_adaptive(image, side, profile=None, orientation=None, level=0):
+    """
+    Adaptive mode: OCR a cheaply preprocessed copy of the page, then
+    re-recognize only the weak lines from full-resolution crops enhanced
+    with the retry profile. `image` must be the full-resolution decode.
+    `orientation` holds the orientation classifier options for run_ocr.
+    A degradation `level` above 0 applies to the first pass and skips the
+    retry.
+    """
+    settings = _adaptive_settings(profile)
+    first_profile, _, first_options = degrade(level, settings["first"])
+    threshold = settings["min_line_confidence"]
+    passes = []
+
+    start = time.perf_counter()
+    timings = {}
+    first = preprocess_image(image, first_profile, timings=timings)
+    timings.pop("decode", None)
+    observe_stage("preprocess", sum(timings.values()))
+    with span("ocr"):
+        # The retry crops the original with these boxes: a page rotation is
+        # mapped back (see OCRLines), unwarping could not be
+        lines, _ = run_ocr(first, **first_options, **(orientation or {}), use_doc_unwarping=False)
+    with span("extract"):
+        result = detect_document(lines)
+    OCR_PASSES.inc(**{"pass": "first"})
+    passes.append({"profile": first_profile, "lines": len(lines),
+                   "seconds": round(time.perf_counter() - start, 4)})
+
+    weak = [i for i in np.argsort(lines.scores) if lines.scores[i] < threshold]
+    weak = weak[:settings["max_retry_lines"]]
+    if not level and weak and lines.boxes is not None and _needs_retry(result, side, threshold):
+        start = time.perf_counter()
+        with span("ocr_retry"):
+            # First-pass boxes are in the resized image; crop from the original
+            scale_x = image.shape[1] / first.shape[1]
+            scale_y = image.shape[0] / first.shape[0]
+            crops = []
+            for i in weak:
+                x0, y0, x1, y1 = lines.boxes[i]
+                pad = 0.2 * (y1 - y0)
+                x0 = max(int((x0 - pad) * scale_x), 0)
+                y0 = max(int((y0 - pad) * scale_y), 0)
+                x1 = min(int((x1 + pad) * scale_x), image.shape[1])
+                y1 = min(int((y1 + pad) * scale_y), image.shape[0])
+                crops.append(enhance_line(image[y0:y1, x0:x1], settings["retry"]) if x1 > x0 and y1 > y0 else None)
+            valid = [(i, crop) for i, crop in zip(weak, crops) if crop is not None]
+            recognized = run_recognition([crop for _, crop in valid])
+
+        texts = list(lines.texts)
+        scores = lines.scores.copy()
+        improved = 0
+        for (i, _), (text, score) in zip(valid, recognized):
+            if text and score > scores[i]:
+                texts[i] = text
+                scores[i] = score
+                improved += 1
+        RETRY_LINES.inc(improved, improved="yes")
+        RETRY_LINES.inc(len(valid) - improved, improved="no")
+        OCR_PASSES.inc(**{"pass": "retry"})
+
+        if improved:
+            lines = OCRLines(texts, scores, lines.boxes)
+            with span("extract"):
+                result = detect_document(lines)
+        passes.append({"profile": settings["retry"], "lines": len(valid), "improved": improved,
+                       "seconds": round(time.perf_counter() - start, 4)})
+
+    result["confidence"] = round(lines.mean_score(), 2)
+    result["extracted_texts"] = lines.texts
+    # Boxes are in first-pass image pixels
+    result["lines"] = lines.to_list()
+    result["passes"] = passes
+    return result
+
+
+def _check_deadline(deadline, stage):
+    try:
+        deadline.check(stage)
+    except DeadlineExceeded:
+        DEADLINES_EXCEEDED.inc(stage=stage)
+        raise
+
+
+def _check_quality(image, side, start, page=False):
+    """
+    Raise ImageQualityError for an image the quality gate rejects, counting
+    the processing time the rejection saved.
+    """
+    with span("quality_gate"):
+        reason, message, measurements = assess_quality(image, page)
+    if reason is None:
+        return
+    QUALITY_REJECTIONS.inc(reason=reason)
+    snapshot = SIDE_SECONDS.snapshot(side=side or "unknown")
+    if snapshot["count"]:
+        spent = time.perf_counter() - start
+        QUALITY_SECONDS_SAVED.inc(max(0.0, snapshot["sum"] / snapshot["count"] - spent))
+    logger.debug("Quality gate rejected %s side: %s", side or "unknown", reason)
+    raise ImageQualityError(reason, message, measurements, side)
+
+
+def process_document(source, profile=None, side=None, mode=None, angle_cls=None, page=False, deadline=None):
+    """
+    Run the full pipeline on one image. `source` can be a file path,
+    encoded image bytes or a decoded BGR ndarray; `profile` names a
+    preprocessing profile (see preprocess.PREPROCESS_PROFILES).
+    `side` ("front"/"back") enables ROI mode for Brunei ICs when `mode`
+    (default config.OCR_MODE) is "roi". In "adaptive" mode `profile` is
+    the first-pass profile; "mrz" mode reads a passport from its machine
+    readable zone alone when the check digits pass. `angle_cls` ("auto",
+    "on", "off", default config.ANGLE_CLS) controls the orientation
+    classifiers in full-page OCR.
+    Results for bytes and ndarray input are cached by content hash.
+    Images the quality gate rejects raise ImageQualityError before any
+    preprocessing or OCR; `page` marks a rasterized document page, for
+    which the gate ignores exposure. With the duplicate index, `image_hash`
+    holds the image's perceptual hash and `replay` describes a recently
+    seen image with a close hash and the same identity fields (or is None);
+    the result itself always comes from this image's own OCR.
+    With a `deadline` (see deadline.py), DeadlineExceeded is raised between
+    stages once it has passed, cheaper settings are used when little of it
+    remains, and `degradation` reports the level applied. Degraded results
+    are not cached.
+    """
+    mode = mode or config.OCR_MODE
+    key = _cache_key(source, profile, side, mode, angle_cls) if result_cache is not None else None
+    if key is not None:
+        cached = result_cache.get(key)
+        if cached is not None:
+            if duplicate_index is not None and cached.get("image_hash"):
+                # The same bytes again: still a sighting for replay detection
+                cached["replay"] = duplicate_index.match(int(cached["image_hash"], 16), 0, identity_key(cached))
+                if cached["replay"] is not None:
+                    REPLAYS.inc(outcome="cached")
+            # Only full-budget results are cached
+            cached.pop("degradation", None)
+            if deadline is not None:
+                cached["degradation"] = {"level": 0, "name": DEGRADATION_LEVELS[0]["name"]}
+            return cached
+
+    start = time.perf_counter()
+    level = 0
+    if deadline is not None:
+        _check_deadline(deadline, "queue")
+        level = deadline.level()
+        DEGRADATIONS.inc(level=DEGRADATION_LEVELS[level]["name"])
+    profile, angle_cls, det_options = degrade(level, profile, angle_cls)
+
+    # Adaptive mode crops retried lines from the full-resolution decode
+    decode_profile = config.ADAPTIVE_RETRY_PROFILE if mode == "adaptive" and not level else profile
+    with span("decode"):
+        image = load_image(source, max_side=get_profile(decode_profile)["max_side"])
+    if deadline is not None:
+        _check_deadline(deadline, "decode")
+
+    if config.QUALITY_GATE:
+        _check_quality(image, side, start, page)
+
+    image_hash = None
+    if duplicate_index is not None:
+        with span("phash"):
+            image_hash = perceptual_hash(image)
+
+    result = None
+    if mode == "adaptive":
+        image, orientation, decision = _orient(image, source, angle_cls)
+        result = _process_adaptive(image, side, profile, orientation, level)
+        result["ocr_mode"] = "adaptive"
+        result["orientation"] = decision
+    elif mode == "roi" and side in CARD_LAYOUTS:
+        result = _process_card_regions(image, side)
+        if result is not None:
+            result["ocr_mode"] = "roi"
+    elif mode == "mrz":
+        result = _process_mrz(image)
+        if result is not None:
+            result["ocr_mode"] = "mrz"
+
+    if result is None:
+        image, orientation, decision = _orient(image, source, angle_cls)
+        timings = {}
+        image = preprocess_image(image, profile, timings=timings)
+        timings.pop("decode", None)
+        observe_stage("preprocess", sum(timings.values()))
+        if deadline is not None:
+            _check_deadline(deadline, "preprocess")
+
+        # Detection and recognition run inside one PaddleOCR pipeline call
+        with span("ocr"):
+            lines, confidence = run_ocr(image, **det_options, **orientation)
+        if deadline is not None:
+            _check_deadline(deadline, "ocr")
+
+        with span("extract"):
+            result = detect_document(lines)
+        result["orientation"] = decision
+        result["confidence"] = round(confidence, 2)
+        result["extracted_texts"] = lines.texts  # Add this for debugging
+        # Boxes are in preprocessed-image pixels, mapped back from a page
+        # rotation; if the doc preprocessor unwarped the page they are in
+        # the unwarped frame
+        result["lines"] = lines.to_list()
+        result["ocr_mode"] = "full"
+
+    SIDE_SECONDS.observe(time.perf_counter() - start, side=side or "unknown")
+    OCR_CONFIDENCE.observe(result["confidence"])
+    logger.debug("Detected %s from %d text lines (%s mode)",
+                 result.get("document_type"), len(result["extracted_texts"]), result["ocr_mode"])
+
+    replay = None
+    if image_hash is not None:
+        result["image_hash"] = format(image_hash, "064x")
+        # A close hash alone does not make a replay: cards of one layout
+        # hash a few bits apart, so the identity fields must match too
+        identity = identity_key(result)
+        replay = duplicate_index.match(image_hash, config.DUPLICATE_MAX_DISTANCE, identity)
+        if replay is not None:
+            REPLAYS.inc(outcome="flagged")
+        duplicate_index.add(image_hash, identity)
+    # Cheaper settings must not be served to later full-budget requests
+    if key is not None and not level:
+        result_cache.put(key, result)
+    # Per request, so neither is stored
+    if duplicate_index is not None:
+        result["replay"] = replay
+    if deadline is not None:
+        result["degradation"] = {"level": level, "name": DEGRADATION_LEVELS[level]["name"]}
+
+    return result
+
+
+def process_pages(source, profile=None, mode=None, angle_cls=None, dpi=None):
+    """
+    Run process_document on each page of a PDF or TIFF (path or bytes),
+    rasterizing one page at a time, and yield a record per page as soon as
+    it is done: {"page", "status": "ok", "result"}, or status "rejected"
+    with the quality gate's reason for blank and unusable pages.
+    """
+    decode_profile = config.ADAPTIVE_RETRY_PROFILE if (mode or config.OCR_MODE) == "adaptive" else profile
+    max_side = get_profile(decode_profile)["max_side"]
+    for number, image in iter_pages(source, dpi=dpi, max_side=max_side):
+        try:
+            result = process_document(image, profile, mode=mode, angle_cls=angle_cls, page=True)
+        except ImageQualityError as e:
+            yield {"page": number, "status": "rejected", "reason": e.reason, "error": str(e)}
+            continue
+        yield {"page": number, "status": "ok", "result": result}
+
+
+def process_file(source, profile=None, mode=None, angle_cls=None):
+    """
+    process_document for images; for PDF and TIFF documents, every page
+    plus the documents found in them (ID fronts merged with their backs):
+    {"pages": [...], "documents": [...], "page_count", "truncated"}, where
+    `truncated` means pages past config.PDF_MAX_PAGES were not processed.
+    """
+    if document_kind(source) is None:
+        return process_document(source, profile, mode=mode, angle_cls=angle_cls)
+    pages = list(process_pages(source, profile, mode, angle_cls))
+    documents = group_pages([(page["page"], page["result"]) for page in pages if page["status"] == "ok"])
+    count = page_count(source)
+    return {"pages": pages, "documents": documents, "page_count": count, "truncated": count > len(pages)}
+
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".webp") + DOCUMENT_EXTENSIONS
+
+
+def collect_inputs(inputs, manifest=None):
+    """
+    Expand CLI inputs (files, directories, glob patterns) and an optional
+    manifest file (one path per line) into a sorted, de-duplicated list.
+    """
+    paths = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                paths.update(os.path.join(root, f) for f in files if f.lower().endswith(IMAGE_EXTENSIONS))
+        elif glob.has_magic(item):
+            paths.update(p for p in glob.glob(item, recursive=True) if os.path.isfile(p))
+        else:
+            paths.add(item)
+    if manifest:
+        with open(manifest) as f:
+            paths.update(line.strip() for line in f if line.strip() and not line.startswith("#"))
+    return sorted(paths)
+
+
+def completed_paths(output_path):
+    """
+    Paths already processed successfully in an earlier run of the same output file.
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A line cut short by a crash; that file is simply redone
+                continue
+            if record.get("status") == "ok":
+                done.add(record["path"])
+    return done
+
+
+def _init_batch_worker(profile, mode, angle_cls=None):
+    global _batch_options
+    _batch_options = {"profile": profile, "mode": mode, "angle_cls": angle_cls}
+    logging.basicConfig(level=config.LOG_LEVEL)
+    warmup()
+
+
+def _process_path(path):
+    start = time.perf_counter()
+    try:
+        result = process_file(path, **_batch_options)
+        record = {"path": path, "status": "ok", "result": result}
+    except Exception as e:
+        record = {"path": path, "status": "error", "error": f"{type(e).__name__}: {e}"}
+    record["seconds"] = round(time.perf_counter() - start, 3)
+    return record
+
+
+def run_batch(paths, output_path, workers, profile=None, mode=None, angle_cls=None):
+    """
+    OCR `paths` on a process pool (one OCR engine per worker process) and
+    append one JSON line per image to `output_path` as results arrive.
+    Images already recorded as ok in `output_path` are skipped.
+    """
+    done = completed_paths(output_path)
+    todo = [p for p in paths if p not in done]
+    print(f"{len(paths)} images, {len(paths) - len(todo)} already done, {len(todo)} to process")
+    if not todo:
+        return
+
+    failures = []
+    processed = 0
+    start = time.perf_counter()
+    with open(output_path, "a") as out, \
+            multiprocessing.Pool(workers, initializer=_init_batch_worker, initargs=(profile, mode, angle_cls)) as pool:
+        for record in tqdm(pool.imap_unordered(_process_path, todo), total=len(todo), unit="img"):
+            out.write(json.dumps(record, default=str) + "\n")
+            out.flush()
+            processed += 1
+            if record["status"] != "ok":
+                failures.append(record)
+    elapsed = time.perf_counter() - start
+
+    print(f"Processed {processed} images in {elapsed:.1f}s ({processed / elapsed:.2f} images/s), "
+          f"{len(failures)} failed")
+    for record in failures:
+        print(f"  {record['path']}: {record['error']}")
+
+
+def run_cli(argv=None):
+    parser = argparse.ArgumentParser(description="OCR Brunei ID images.")
+    parser.add_argument("inputs", nargs="*", help="image, PDF or TIFF files, directories or glob patterns")
+    parser.add_argument("--manifest", help="text file with one image path per line")
+    parser.add_argument("-o", "--output", help="JSONL file to append results to; enables batch mode")
+    parser.add_argument("-w", "--workers", type=int, default=max(1, (os.cpu_count() or 2) // 4),
+                        help="worker processes in batch mode")
+    parser.add_argument("--profile", choices=sorted(PREPROCESS_PROFILES), help="preprocessing profile")
+    parser.add_argument("--mode", choices=("full", "roi", "adaptive", "mrz"), help="OCR mode (default from EKYC_OCR_MODE)")
+    parser.add_argument("--angle-cls", choices=ANGLE_CLS_MODES,
+                        help="orientation classifiers (default from EKYC_ANGLE_CLS)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=config.LOG_LEVEL)
+    paths = collect_inputs(args.inputs, args.manifest)
+    if not paths:
+        parser.error("no input images")
+
+    if args.output:
+        run_batch(paths, args.output, args.workers, args.profile, args.mode, args.angle_cls)
+    else:
+        for path in paths:
+            print(json.dumps({"path": path, **process_file(path, args.profile, mode=args.mode, angle_cls=args.angle_cls)},
+                             indent=2, default=str))
+
+
 if __name__ == "__main__":
-    output = process_document(r"images\4.png")
-    print(output)
+    run_cli()
@@ -0,0 +1,183 @@
+import threading
+import time
+from contextlib import contextmanager
+
+REGISTRY = []
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    """
+    Monotonic counter, optionally split by labels.
+    """
+
+    type = "counter"
+
+    def __init__(self, name, description):
+        self.name = name
+        self.description = description
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(_label_key(labels), 0)
+
+    def render(self):
+        with self._lock:
+            return [f"{self.name}{_format_labels(key)} {value}" for key, value in self._values.items()]
+
+
+class Gauge:
+    """
+    Point-in-time value, either set directly or read from `callback`
+    whenever metrics are rendered.
+    """
+
+    type = "gauge"
+
+    def __init__(self, name, description, callback=None):
+        self.name = name
+        self.description = description
+        self.callback = callback
+        self._value = 0
+        REGISTRY.append(self)
+
+    def set(self, value):
+        self._value = value
+
+    def value(self):
+        return self.callback() if self.callback else self._value
+
+    def render(self):
+        return [f"{self.name} {self.value()}"]
+
+
+class Histogram:
+    """
+    Minimal cumulative histogram (Prometheus-style `le` buckets),
+    optionally split by labels.
+    """
+
+    type = "histogram"
+
+    def __init__(self, name, description, buckets):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label key -> [bucket counts, count, sum]
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0, 0.0]
+            series[1] += 1
+            series[2] += value
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+
+    def snapshot(self, **labels):
+        with self._lock:
+            counts, count, total = self._series.get(_label_key(labels), [[0] * len(self.buckets), 0, 0.0])
+            return {
+                "buckets": {str(bound): n for bound, n in zip(self.buckets, counts)},
+                "count": count,
+                "sum": total
+            }
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for key, (counts, count, total) in self._series.items():
+                for bound, n in zip(self.buckets, counts):
+                    lines.append(f"{self.name}_bucket{_format_labels(key, [('le', bound)])} {n}")
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', '+Inf')])} {count}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+        return lines
+
+
+def render_prometheus():
+    """
+    All registered metrics in the Prometheus text exposition format.
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.description}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+STAGE_SECONDS = Histogram(
+    "ekyc_stage_seconds", "Time spent in each pipeline stage",
+    buckets=LATENCY_BUCKETS
+)
+
+
+# Per-thread stage collector used by trace()
+_trace = threading.local()
+
+
+@contextmanager
+def span(stage, timings=None):
+    """
+    Time a pipeline stage into ekyc_stage_seconds{stage=...}, and into
+    `timings[stage]` when a dict is given.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        observe_stage(stage, elapsed)
+        if timings is not None:
+            timings[stage] = elapsed
+
+
+def observe_stage(stage, seconds):
+    """
+    Record a stage timed elsewhere, as span() does.
+    """
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    stages = getattr(_trace, "stages", None)
+    if stages is not None:
+        stages[stage] = stages.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def trace():
+    """
+    Collect the spans finished on this thread inside the block. Yields a
+    dict of stage -> seconds (summed when a stage runs more than once),
+    e.g. to get per-call stage timings of process_document.
+    """
+    previous = getattr(_trace, "stages", None)
+    stages = _trace.stages = {}
+    try:
+        yield stages
+    finally:
+        _trace.stages = previous
@@ -0,0 +1,228 @@
+import re
+from datetime import date
+
+import cv2
+import numpy as np
+
+# TD3 (passport) machine readable zone: two lines of 44 characters
+TD3_LENGTH = 44
+
+# Width the image is reduced to before the MRZ band is searched for
+_LOCATE_WIDTH = 600
+
+_MRZ_LINE_RE = re.compile(r'^[A-Z0-9<]+$')
+
+# Common OCR confusions, fixed by position: digits where the format has
+# digits, letters where it has letters. The passport number is free-form.
+_TO_DIGIT = str.maketrans("OQDIZSBG", "00012586")
+_TO_ALPHA = str.maketrans("01258", "OIZSB")
+
+_CHECK_WEIGHTS = (7, 3, 1)
+
+
+def check_digit(value):
+    """
+    ICAO 9303 check digit: character values (digits as is, A-Z as 10-35,
+    < as 0) weighted 7, 3, 1 repeating, summed modulo 10.
+    """
+    total = 0
+    for i, char in enumerate(value):
+        if char.isdigit():
+            number = int(char)
+        elif char.isalpha():
+            number = ord(char) - ord('A') + 10
+        else:
+            number = 0
+        total += number * _CHECK_WEIGHTS[i % 3]
+    return str(total % 10)
+
+
+def clean_line(text):
+    """
+    An OCR'd MRZ line normalized to TD3 length, or None if it does not look
+    like one: uppercased, spaces dropped, a guillemet read for << expanded,
+    and padded or trimmed with filler to 44 characters.
+    """
+    line = text.upper().replace(" ", "").replace("«", "<<")
+    if not 40 <= len(line) <= 48 or not _MRZ_LINE_RE.match(line):
+        return None
+    return line[:TD3_LENGTH].ljust(TD3_LENGTH, "<")
+
+
+def _date(value, future):
+    # YYMMDD; birth dates are in the past, expiry dates up to ~50 years ahead
+    if not value.isdigit():
+        return None
+    year, month, day = int(value[:2]), int(value[2:4]), int(value[4:])
+    this_year = date.today().year % 100
+    century = 2000 if (year <= this_year + 50 if future else year <= this_year) else 1900
+    try:
+        return date(century + year, month, day).strftime("%d-%m-%Y")
+    except ValueError:
+        return None
+
+
+def _name(field):
+    return " ".join(part for part in field.split("<") if part)
+
+
+def parse_td3(line1, line2):
+    """
+    Fields of a TD3 MRZ, with OCR confusions corrected by position and each
+    check digit validated. Returns None when the lines are not a passport
+    MRZ. `mrz` holds the result of every check and whether all passed.
+    """
+    line1, line2 = clean_line(line1 or ""), clean_line(line2 or "")
+    if line1 is None or line2 is None or line1[0] != "P":
+        return None
+
+    issuing_country = line1[2:5].translate(_TO_ALPHA).replace("<", "")
+    surname, _, given_names = line1[5:].translate(_TO_ALPHA).partition("<<")
+    surname, given_names = _name(surname), _name(given_names)
+
+    number = line2[0:9]
+    number_check = line2[9].translate(_TO_DIGIT)
+    nationality = line2[10:13].translate(_TO_ALPHA).replace("<", "")
+    birth = line2[13:19].translate(_TO_DIGIT)
+    birth_check = line2[19].translate(_TO_DIGIT)
+    sex = line2[20]
+    expiry = line2[21:27].translate(_TO_DIGIT)
+    expiry_check = line2[27].translate(_TO_DIGIT)
+    personal = line2[28:42]
+    personal_check = line2[42].translate(_TO_DIGIT)
+    composite_check = line2[43].translate(_TO_DIGIT)
+
+    checks = {
+        "passport_number": check_digit(number) == number_check,
+        "date_of_birth": check_digit(birth) == birth_check,
+        "date_of_expiry": check_digit(expiry) == expiry_check,
+        # An empty personal number may have < as its check digit
+        "personal_number": check_digit(personal) == personal_check or (personal_check == "<" and not personal.strip("<")),
+        "composite": check_digit(
+            number + number_check + birth + birth_check + expiry + expiry_check + personal + personal_check
+        ) == composite_check
+    }
+    given = given_names.split()
+    full_name = " ".join(part for part in (given_names, surname) if part)
+    return {
+        "document_type": "Passport",
+        "passport_number": number.replace("<", "") or None,
+        "issuing_country": issuing_country or None,
+        "nationality": nationality or None,
+        "full_name": full_name or None,
+        "first_name": given[0] if given else None,
+        "middle_name": " ".join(given[1:]) or None,
+        "last_name": surname or None,
+        "date_of_birth": _date(birth, future=False),
+        "gender": {"M": "Male", "F": "Female"}.get(sex),
+        "date_of_expiry": _date(expiry, future=True),
+        "personal_number": personal.replace("<", "") or None,
+        "mrz": {"valid": all(checks.values()), "checks": checks}
+    }
+
+
+def find_mrz_lines(texts):
+    """
+    The two MRZ lines among OCR'd text lines: a line starting with P and
+    holding a << separator, followed by another MRZ-shaped line. None if
+    the texts have no passport MRZ.
+    """
+    cleaned = [clean_line(text) for text in texts]
+    for first, second in zip(cleaned, cleaned[1:]):
+        if first and second and first[0] == "P" and "<<" in first:
+            return first, second
+    return None
+
+
+def mrz_fields(texts):
+    """
+    parse_td3 of the MRZ lines found in `texts`, or {} without an MRZ.
+    Used as the "mrz" extractor of the document templates.
+    """
+    lines = find_mrz_lines(texts)
+    return (parse_td3(*lines) or {}) if lines else {}
+
+
+def locate_mrz(image):
+    """
+    (x0, y0, x1, y1) of the MRZ band in `image` pixels, or None. On a copy
+    reduced to 600px wide, a blackhat keeps dark text on the light page, a
+    horizontal gradient and closings join the characters of the two lines
+    into one blob, and the largest blob spanning most of the page with a
+    text-band aspect ratio is taken.
+    """
+    height, width = image.shape[:2]
+    scale = _LOCATE_WIDTH / width
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    gray = cv2.resize(gray, (_LOCATE_WIDTH, max(1, round(height * scale))), interpolation=cv2.INTER_AREA)
+    gray = cv2.GaussianBlur(gray, (3, 3), 0)
+
+    rect_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (13, 5))
+    square_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (21, 21))
+    blackhat = cv2.morphologyEx(gray, cv2.MORPH_BLACKHAT, rect_kernel)
+    gradient = np.absolute(cv2.Sobel(blackhat, cv2.CV_32F, 1, 0, ksize=-1))
+    gradient = cv2.normalize(gradient, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+    gradient = cv2.morphologyEx(gradient, cv2.MORPH_CLOSE, rect_kernel)
+    _, mask = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, square_kernel)
+    mask = cv2.erode(mask, None, iterations=2)
+    # Keep page borders from joining the band to the edge
+    mask[:, :5] = 0
+    mask[:, -5:] = 0
+
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    best = None
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        if w < 0.6 * _LOCATE_WIDTH or not 5 < w / h < 30:
+            continue
+        if best is None or w * h > best[2] * best[3]:
+            best = (x, y, w, h)
+    if best is None:
+        return None
+
+    x, y, w, h = best
+    pad_x, pad_y = round(0.03 * w), round(0.15 * h)
+    x0, y0 = max(0, x - pad_x), max(0, y - pad_y)
+    x1, y1 = min(_LOCATE_WIDTH, x + w + pad_x), min(gray.shape[0], y + h + pad_y)
+    return (round(x0 / scale), round(y0 / scale), min(width, round(x1 / scale)), min(height, round(y1 / scale)))
+
+
+def split_lines(band):
+    """
+    The two text-line crops of an MRZ band, split in the middle of the
+    emptiest rows of its middle part.
+    """
+    gray = cv2.cvtColor(band, cv2.COLOR_BGR2GRAY) if band.ndim == 3 else band
+    _, ink = cv2.threshold(gray, 0, 1, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    rows = ink.sum(axis=1)
+    top, bottom = len(rows) * 3 // 10, len(rows) * 7 // 10
+    if bottom > top:
+        middle = rows[top:bottom]
+        emptiest = np.flatnonzero(middle == middle.min())
+        split = top + int(emptiest[len(emptiest) // 2])
+    else:
+        split = len(rows) // 2
+    return [band[:split], band[split:]]
+
+
+def read_mrz(image, recognize):
+    """
+    Locate the MRZ and recognize only its two lines with `recognize`
+    (crops -> [(text, score)], like ocr_engine.run_recognition).
+    Returns (parse_td3 fields or None, [(text, score)] of the lines).
+    An upside-down page is read again with the band rotated.
+    """
+    box = locate_mrz(image)
+    if box is None:
+        return None, []
+    x0, y0, x1, y1 = box
+    band = image[y0:y1, x0:x1]
+    recognized = recognize(split_lines(band))
+    fields = parse_td3(*[text for text, _ in recognized])
+    if fields is None:
+        rotated = recognize(split_lines(cv2.rotate(band, cv2.ROTATE_180)))
+        fields = parse_td3(*[text for text, _ in rotated])
+        if fields is not None:
+            recognized = rotated
+    return fields, recognized
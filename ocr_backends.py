@@ -0,0 +1,390 @@
+import logging
+import math
+import os
+import cv2
+import numpy as np
+import config
+
+logger = logging.getLogger(__name__)
+
+# EKYC_OCR_BACKEND values. "onnx" and "openvino" both run the exported
+# models on ONNX Runtime; "openvino" puts the OpenVINO execution provider
+# (onnxruntime-openvino) first and falls back to the default CPU one.
+BACKENDS = ("paddle", "onnx", "openvino")
+
+_PROVIDERS = {
+    "onnx": [("CPUExecutionProvider", {})],
+    "openvino": [("OpenVINOExecutionProvider", {"device_type": "CPU"}), ("CPUExecutionProvider", {})]
+}
+
+# PaddleOCR constructor kwargs (ocr_engine.OCR_CONFIG uses the 2.x names)
+# mapped to the predict() option names used by both backends
+_OPTION_ALIASES = {
+    "use_angle_cls": "use_textline_orientation",
+    "det_db_thresh": "text_det_thresh",
+    "det_db_box_thresh": "text_det_box_thresh",
+    "det_db_unclip_ratio": "text_det_unclip_ratio",
+    "det_limit_side_len": "text_det_limit_side_len",
+    "det_limit_type": "text_det_limit_type",
+    "drop_score": "text_rec_score_thresh"
+}
+
+_PREDICT_DEFAULTS = {
+    "use_textline_orientation": False,
+    "text_det_limit_side_len": 960,
+    "text_det_limit_type": "min",
+    "text_det_thresh": 0.3,
+    "text_det_box_thresh": 0.6,
+    "text_det_unclip_ratio": 1.5,
+    "text_rec_score_thresh": 0.0
+}
+
+_DET_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+_DET_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+# Longest side the detector input may have, as in PaddleX
+_DET_MAX_SIDE = 4000
+_REC_BATCH_SIZE = 6
+_CLS_THRESH = 0.9
+
+
+def predict_options(ocr_config):
+    """
+    The predict() options set by a PaddleOCR constructor config.
+    """
+    options = {}
+    for name, value in ocr_config.items():
+        name = _OPTION_ALIASES.get(name, name)
+        if name in _PREDICT_DEFAULTS:
+            options[name] = value
+    return options
+
+
+def quantize_model(path):
+    """
+    Dynamic INT8 quantization: MatMul/Gemm weights are stored as int8 and
+    activations are quantized at run time. Convolutions are left in float
+    because ONNX Runtime's ConvInteger is slower than its float kernels on
+    CPU. The model is written next to the source as `<name>.int8.onnx` and
+    reused until the source changes.
+    """
+    target = os.path.splitext(path)[0] + ".int8.onnx"
+    if not os.path.exists(target) or os.path.getmtime(target) < os.path.getmtime(path):
+        # Needs the onnx package, only imported when quantizing
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        logger.info("Quantizing %s", path)
+        quantize_dynamic(path, target, op_types_to_quantize=["MatMul", "Gemm"], weight_type=QuantType.QInt8)
+    return target
+
+
+def create_session(path, backend="onnx", int8=False, intra_op_threads=0, inter_op_threads=0):
+    import onnxruntime as ort
+
+    if int8:
+        path = quantize_model(path)
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if intra_op_threads:
+        options.intra_op_num_threads = intra_op_threads
+    if inter_op_threads:
+        options.inter_op_num_threads = inter_op_threads
+
+    available = ort.get_available_providers()
+    providers = [(name, opts) for name, opts in _PROVIDERS[backend] if name in available]
+    if len(providers) < len(_PROVIDERS[backend]):
+        logger.warning("Execution providers %s not available, using %s",
+                       [name for name, _ in _PROVIDERS[backend]], [name for name, _ in providers])
+    return ort.InferenceSession(
+        path, options,
+        providers=[name for name, _ in providers],
+        provider_options=[opts for _, opts in providers]
+    )
+
+
+def _load_model_config(model_dir):
+    import yaml
+    path = os.path.join(model_dir, "inference.yml")
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return yaml.safe_load(f) or {}
+
+
+def _find_op(model_config, name):
+    """
+    Settings of a named transform in an exported inference.yml.
+    """
+    for op in model_config.get("PreProcess", {}).get("transform_ops", []):
+        if name in op:
+            return op[name] or {}
+    return {}
+
+
+def det_resize(image, limit_side_len, limit_type):
+    """
+    Resize for the text detector like PaddleOCR's DetResizeForTest: scale
+    by the side limit, then round both sides to multiples of 32.
+    """
+    height, width = image.shape[:2]
+    if limit_type == "min":
+        ratio = limit_side_len / min(height, width) if min(height, width) < limit_side_len else 1.0
+    elif limit_type == "resize_long":
+        ratio = limit_side_len / max(height, width)
+    else:
+        ratio = limit_side_len / max(height, width) if max(height, width) > limit_side_len else 1.0
+    if max(height, width) * ratio > _DET_MAX_SIDE:
+        ratio = _DET_MAX_SIDE / max(height, width)
+    new_height = max(int(round(height * ratio / 32) * 32), 32)
+    new_width = max(int(round(width * ratio / 32) * 32), 32)
+    return cv2.resize(image, (new_width, new_height))
+
+
+def _mini_box(contour):
+    """
+    Minimum-area rectangle of a contour as 4 ordered points and its short side.
+    """
+    rect = cv2.minAreaRect(contour)
+    points = sorted(cv2.boxPoints(rect).tolist(), key=lambda p: p[0])
+    left = sorted(points[:2], key=lambda p: p[1])
+    right = sorted(points[2:], key=lambda p: p[1])
+    box = np.array([left[0], right[0], right[1], left[1]], dtype=np.float32)
+    return box, min(rect[1])
+
+
+def _box_score(prob, box):
+    """
+    Mean probability inside the box (PaddleOCR's "fast" score mode).
+    """
+    height, width = prob.shape
+    x0 = int(np.clip(np.floor(box[:, 0].min()), 0, width - 1))
+    x1 = int(np.clip(np.ceil(box[:, 0].max()), 0, width - 1))
+    y0 = int(np.clip(np.floor(box[:, 1].min()), 0, height - 1))
+    y1 = int(np.clip(np.ceil(box[:, 1].max()), 0, height - 1))
+    mask = np.zeros((y1 - y0 + 1, x1 - x0 + 1), dtype=np.uint8)
+    cv2.fillPoly(mask, [(box - [x0, y0]).astype(np.int32)], 1)
+    return cv2.mean(prob[y0:y1 + 1, x0:x1 + 1], mask)[0]
+
+
+def _unclip(box, ratio):
+    import pyclipper
+
+    distance = cv2.contourArea(box) * ratio / max(cv2.arcLength(box, True), 1e-6)
+    offset = pyclipper.PyclipperOffset()
+    offset.AddPath(box.astype(np.int64).tolist(), pyclipper.JT_ROUND, pyclipper.ET_CLOSEDPOLYGON)
+    expanded = offset.Execute(distance)
+    if not expanded:
+        return None
+    return np.array(expanded[0], dtype=np.float32).reshape(-1, 1, 2)
+
+
+def db_boxes(prob, src_height, src_width, thresh, box_thresh, unclip_ratio, max_candidates=1000):
+    """
+    DB post-processing of a detector probability map: threshold, take the
+    minimum-area rectangle of each region, drop low-scoring ones and expand
+    the rest by `unclip_ratio`. Returns an (n, 4, 2) int array of quads in
+    source image pixels and their scores.
+    """
+    height, width = prob.shape
+    bitmap = (prob > thresh).astype(np.uint8) * 255
+    contours, _ = cv2.findContours(bitmap, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+
+    boxes = []
+    scores = []
+    for contour in contours[:max_candidates]:
+        box, short_side = _mini_box(contour)
+        if short_side < 3:
+            continue
+        score = _box_score(prob, box)
+        if score < box_thresh:
+            continue
+        expanded = _unclip(box, unclip_ratio)
+        if expanded is None:
+            continue
+        box, short_side = _mini_box(expanded)
+        if short_side < 5:
+            continue
+        box[:, 0] = np.clip(np.round(box[:, 0] / width * src_width), 0, src_width)
+        box[:, 1] = np.clip(np.round(box[:, 1] / height * src_height), 0, src_height)
+        boxes.append(box.astype(np.int32))
+        scores.append(score)
+    return np.array(boxes, dtype=np.int32).reshape(-1, 4, 2), scores
+
+
+def sort_boxes(boxes):
+    """
+    Reading order: top to bottom, left to right within a 10px line band.
+    """
+    order = sorted(range(len(boxes)), key=lambda i: (boxes[i][0][1], boxes[i][0][0]))
+    for i in range(len(order) - 1):
+        for j in range(i, -1, -1):
+            a, b = boxes[order[j]][0], boxes[order[j + 1]][0]
+            if abs(int(b[1]) - int(a[1])) < 10 and b[0] < a[0]:
+                order[j], order[j + 1] = order[j + 1], order[j]
+            else:
+                break
+    return [boxes[i] for i in order]
+
+
+def crop_quad(image, quad):
+    """
+    Perspective-crop a text quad; tall crops are rotated to horizontal.
+    """
+    quad = quad.astype(np.float32)
+    width = int(max(np.linalg.norm(quad[0] - quad[1]), np.linalg.norm(quad[2] - quad[3])))
+    height = int(max(np.linalg.norm(quad[0] - quad[3]), np.linalg.norm(quad[1] - quad[2])))
+    width, height = max(width, 1), max(height, 1)
+    target = np.array([[0, 0], [width, 0], [width, height], [0, height]], dtype=np.float32)
+    matrix = cv2.getPerspectiveTransform(quad, target)
+    crop = cv2.warpPerspective(image, matrix, (width, height),
+                               borderMode=cv2.BORDER_REPLICATE, flags=cv2.INTER_CUBIC)
+    if height / width >= 1.5:
+        crop = np.rot90(crop)
+    return crop
+
+
+def ctc_decode(probs, characters):
+    """
+    Greedy CTC decoding of (batch, steps, classes) recognizer output.
+    Class 0 is the blank; `characters[i - 1]` is the text of class i.
+    Returns [(text, mean probability of the kept steps)].
+    """
+    indices = probs.argmax(axis=-1)
+    maxima = probs.max(axis=-1)
+    results = []
+    for idx, prob in zip(indices, maxima):
+        keep = idx != 0
+        keep[1:] &= idx[1:] != idx[:-1]
+        text = "".join(characters[i - 1] for i in idx[keep])
+        results.append((text, float(prob[keep].mean()) if keep.any() else 0.0))
+    return results
+
+
+class ONNXOCR:
+    """
+    Text detection, optional textline orientation and recognition on ONNX
+    Runtime, with the same predict() interface and result keys as the
+    PaddleOCR pipeline (document orientation and unwarping are not
+    supported and their options are ignored).
+
+    `model_dir` holds det/, rec/ and optionally cls/ sub-directories, each
+    with an exported inference.onnx and the inference.yml of the Paddle
+    model. Remaining keyword arguments are PaddleOCR constructor options
+    (see ocr_engine.OCR_CONFIG) and become predict() defaults.
+    """
+
+    def __init__(self, model_dir, backend="onnx", int8=False, intra_op_threads=0, inter_op_threads=0, **ocr_config):
+        self.defaults = dict(_PREDICT_DEFAULTS, **predict_options(ocr_config))
+
+        def session(name):
+            path = os.path.join(model_dir, name, "inference.onnx")
+            if not os.path.exists(path):
+                return None
+            return create_session(path, backend, int8, intra_op_threads, inter_op_threads)
+
+        self.det = session("det")
+        self.rec = session("rec")
+        if self.det is None or self.rec is None:
+            raise FileNotFoundError(f"No det/inference.onnx and rec/inference.onnx under {model_dir}")
+        self.cls = session("cls")
+
+        rec_config = _load_model_config(os.path.join(model_dir, "rec"))
+        characters = rec_config.get("PostProcess", {}).get("character_dict")
+        if not characters:
+            raise ValueError(f"No character_dict in {model_dir}/rec/inference.yml")
+        self.characters = list(characters) + [" "]
+        self.rec_shape = _find_op(rec_config, "RecResizeImg").get("image_shape", [3, 48, 320])
+
+        cls_config = _load_model_config(os.path.join(model_dir, "cls"))
+        self.cls_size = _find_op(cls_config, "ResizeImage").get("size", [160, 80])
+        self.cls_labels = cls_config.get("PostProcess", {}).get("label_list", ["0_degree", "180_degree"])
+
+    def predict(self, input, **options):
+        """
+        OCR one BGR image or a list of them. Returns one result dict per
+        image with rec_texts, rec_scores, rec_polys and rec_boxes.
+        """
+        opts = dict(self.defaults)
+        opts.update((key, value) for key, value in options.items() if value is not None)
+        images = input if isinstance(input, (list, tuple)) else [input]
+        return [self._predict_one(image, opts) for image in images]
+
+    def recognize(self, crops):
+        """
+        Recognize text-line crops. Returns [(text, score)] in input order.
+        """
+        if not crops:
+            return []
+        order = sorted(range(len(crops)), key=lambda i: crops[i].shape[1] / max(crops[i].shape[0], 1))
+        results = [None] * len(crops)
+        _, rec_height, rec_width = self.rec_shape
+        for start in range(0, len(order), _REC_BATCH_SIZE):
+            batch = order[start:start + _REC_BATCH_SIZE]
+            max_ratio = max([rec_width / rec_height] + [crops[i].shape[1] / max(crops[i].shape[0], 1) for i in batch])
+            width = int(rec_height * max_ratio)
+            inputs = np.zeros((len(batch), 3, rec_height, width), dtype=np.float32)
+            for row, i in enumerate(batch):
+                crop = crops[i]
+                resized_width = min(width, int(math.ceil(rec_height * crop.shape[1] / max(crop.shape[0], 1))))
+                resized = cv2.resize(crop, (max(resized_width, 1), rec_height)).astype(np.float32)
+                inputs[row, :, :, :resized.shape[1]] = (resized.transpose(2, 0, 1) / 255 - 0.5) / 0.5
+            probs = self.rec.run(None, {self.rec.get_inputs()[0].name: inputs})[0]
+            for i, decoded in zip(batch, ctc_decode(probs, self.characters)):
+                results[i] = decoded
+        return results
+
+    def _detect(self, image, opts):
+        resized = det_resize(image, opts["text_det_limit_side_len"], opts["text_det_limit_type"])
+        inputs = ((resized.astype(np.float32) / 255 - _DET_MEAN) / _DET_STD).transpose(2, 0, 1)[None]
+        prob = self.det.run(None, {self.det.get_inputs()[0].name: inputs})[0][0, 0]
+        boxes, _ = db_boxes(prob, image.shape[0], image.shape[1], opts["text_det_thresh"],
+                            opts["text_det_box_thresh"], opts["text_det_unclip_ratio"])
+        return sort_boxes(list(boxes))
+
+    def _rotate_upside_down(self, crops):
+        width, height = self.cls_size
+        inputs = np.stack([
+            ((cv2.resize(crop, (width, height)).astype(np.float32) / 255 - _DET_MEAN) / _DET_STD).transpose(2, 0, 1)
+            for crop in crops
+        ])
+        probs = self.cls.run(None, {self.cls.get_inputs()[0].name: inputs})[0]
+        for i, prob in enumerate(probs):
+            label = self.cls_labels[int(prob.argmax())]
+            if "180" in str(label) and prob.max() > _CLS_THRESH:
+                crops[i] = cv2.rotate(crops[i], cv2.ROTATE_180)
+        return crops
+
+    def _predict_one(self, image, opts):
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        quads = self._detect(image, opts)
+        crops = [np.ascontiguousarray(crop_quad(image, quad)) for quad in quads]
+        if crops and opts["use_textline_orientation"] and self.cls is not None:
+            crops = self._rotate_upside_down(crops)
+
+        texts, scores, polys = [], [], []
+        for quad, (text, score) in zip(quads, self.recognize(crops)):
+            if score >= opts["text_rec_score_thresh"]:
+                texts.append(text)
+                scores.append(score)
+                polys.append(quad)
+        polys = np.array(polys, dtype=np.int16).reshape(-1, 4, 2)
+        boxes = np.concatenate([polys.min(axis=1), polys.max(axis=1)], axis=1)
+        return {
+            "rec_texts": texts,
+            "rec_scores": scores,
+            "rec_polys": list(polys),
+            "rec_boxes": boxes
+        }
+
+
+def create_onnx_ocr(ocr_config, backend=None):
+    """
+    Build an ONNXOCR from the EKYC_ONNX_* settings and a PaddleOCR config.
+    """
+    return ONNXOCR(
+        config.ONNX_MODEL_DIR,
+        backend=backend or config.OCR_BACKEND,
+        int8=config.ONNX_INT8,
+        intra_op_threads=config.ONNX_INTRA_OP_THREADS,
+        inter_op_threads=config.ONNX_INTER_OP_THREADS,
+        **ocr_config
+    )
@@ -1,8 +1,16 @@
-import paddle
-paddle.set_device('cpu')
-from paddleocr import PaddleOCR
+import logging
+import threading
+import time
+import cv2
+import numpy as np
+import config
+from batcher import OCRBatcher
+from metrics import Counter, Gauge
+from ocr_lines import OCRLines
 
-ocr = PaddleOCR(
+logger = logging.getLogger(__name__)
+
+OCR_CONFIG = dict(
     use_angle_cls=True,
     lang='en', # Combined English and numbers
     det_db_thresh=0.3,  # Lower threshold to detect smaller text regions
@@ -11,31 +19,236 @@ ocr = PaddleOCR(
     det_limit_type='min'  # Use min for detailed detection
 )
 
-def run_ocr(image):
-    result = ocr.predict(image)
+# Recognition-only model for pre-cropped text lines (ROI mode). With
+# lang='en' the full pipeline uses the same default recognition model.
+REC_CONFIG = {"model_name": config.REC_MODEL_NAME or None}
+
+# Same model the PaddleOCR pipeline uses for use_doc_orientation_classify
+ORIENTATION_MODEL = "PP-LCNet_x1_0_doc_ori"
+# After a failure the probe is skipped for this long, then tried again
+PROBE_RETRY_SECONDS = 300
+_probe_disabled_until = 0.0
+
+PROBE_FAILURES = Counter("ekyc_orientation_probe_failures_total", "Orientation probe calls that failed")
+Gauge(
+    "ekyc_orientation_probe_available", "1 while the orientation probe is in use, 0 while it is backing off",
+    callback=lambda: int(time.monotonic() >= _probe_disabled_until)
+)
+
+# Engine registry: name -> (generation, PaddleOCR kwargs). Models are only
+# built when first used (or by warmup), so importing this module is cheap.
+_engine_configs = {'default': (0, OCR_CONFIG)}
+_registry_lock = threading.Lock()
+_device_set = False
+
+# PaddleOCR predictors are not safe to share between threads, so each
+# thread (e.g. each worker of the /ekyc pool) owns its own instances.
+_thread_local = threading.local()
+
+# Engines built by preload() before the server forks its worker processes;
+# each worker thread adopts one instead of building its own (see serve.py).
+_preloaded = []
+
+
+# Cross-request batcher; when enabled all run_ocr calls go through its
+# single PaddleOCR instance instead of the per-thread ones.
+batcher = None
+
+
+def register_engine(name, config):
+    """
+    Add or replace an engine config. Threads rebuild their instance of a
+    replaced engine on next use.
+    """
+    with _registry_lock:
+        generation = _engine_configs[name][0] + 1 if name in _engine_configs else 0
+        _engine_configs[name] = (generation, dict(config))
+
+
+def engine_config(name='default'):
+    return _engine_configs[name][1]
+
+
+def _init_paddle():
+    global _device_set
+    # Deferred so that importing the app, CLI or tests does not load paddle
+    import paddle
+    with _registry_lock:
+        if not _device_set:
+            paddle.set_device('cpu')
+            _device_set = True
+
+
+def _batched_pipeline_config(batch_size):
+    # The PaddleX OCR pipeline samples a predict() input list one image at
+    # a time unless its config says otherwise. With a larger batch the text
+    # lines of all its images go through the textline classifier together.
+    # The detector keeps batch size 1: it stacks its resized inputs, which
+    # only works for images of the same shape.
+    from paddlex.inference import load_pipeline_config
+    pipeline_config = load_pipeline_config("OCR")
+    pipeline_config["batch_size"] = batch_size
+    return pipeline_config
+
+
+def create_ocr(name='default', batch_size=None):
+    """
+    Build the engine for a registered config on the configured backend.
+    All backends share PaddleOCR's predict() interface and result keys.
+    With `batch_size`, a paddle engine takes up to that many images of one
+    predict() call through its pipeline together (see OCRBatcher).
+    """
+    if config.OCR_BACKEND != 'paddle':
+        from ocr_backends import create_onnx_ocr
+        return create_onnx_ocr(engine_config(name))
+    _init_paddle()
+    from paddleocr import PaddleOCR
+    if batch_size and batch_size > 1:
+        return PaddleOCR(paddlex_config=_batched_pipeline_config(batch_size), **engine_config(name))
+    return PaddleOCR(**engine_config(name))
+
 
-    texts = []
-    confidences = []
+def preload(count, batch_size=None):
+    """
+    Build `count` default engines (for `batch_size`, see create_ocr) in this
+    process without running them, so that processes forked afterwards
+    share their weights copy-on-write.
+    No inference runs here: thread pools started by a first predict call do
+    not survive a fork.
+    """
+    generation = _engine_configs['default'][0]
+    for _ in range(count):
+        _preloaded.append((generation, batch_size, create_ocr('default', batch_size)))
 
-    print(f"DEBUG - Raw OCR result type: {type(result)}")
+
+def adopt_or_create_ocr(name='default', batch_size=None):
+    """
+    A preloaded engine of the current default config and batch size if one
+    is left, otherwise a new one.
+    """
+    if name == 'default':
+        with _registry_lock:
+            generation = _engine_configs[name][0]
+            while _preloaded:
+                built_for, built_batch_size, ocr = _preloaded.pop()
+                if built_for == generation and built_batch_size == batch_size:
+                    return ocr
+    return create_ocr(name, batch_size)
+
+
+def get_ocr(name='default'):
+    engines = getattr(_thread_local, 'engines', None)
+    if engines is None:
+        engines = _thread_local.engines = {}
+    generation = _engine_configs[name][0]
+    cached = engines.get(name)
+    if cached is None or cached[0] != generation:
+        cached = engines[name] = (generation, adopt_or_create_ocr(name))
+    return cached[1]
+
+
+def get_recognizer():
+    recognizer = getattr(_thread_local, 'recognizer', None)
+    if recognizer is None:
+        _init_paddle()
+        from paddleocr import TextRecognition
+        recognizer = _thread_local.recognizer = TextRecognition(**REC_CONFIG)
+    return recognizer
+
+
+def classify_orientation(image):
+    """
+    Whole-image orientation from PaddleOCR's document orientation model,
+    run once on a thumbnail. Returns (counter-clockwise angle, score), or
+    None if the model cannot be used.
+    """
+    try:
+        classifier = getattr(_thread_local, 'orientation', None)
+        if classifier is None:
+            _init_paddle()
+            from paddleocr import DocImgOrientationClassification
+            classifier = _thread_local.orientation = DocImgOrientationClassification(model_name=ORIENTATION_MODEL)
+        scale = min(1.0, 448 / max(image.shape[:2]))
+        thumbnail = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else image
+        result = classifier.predict(thumbnail, batch_size=1)[0]
+    except Exception:
+        # The probe only saves time; let the classifiers run for a while
+        global _probe_disabled_until
+        _probe_disabled_until = time.monotonic() + PROBE_RETRY_SECONDS
+        PROBE_FAILURES.inc()
+        logger.warning("Orientation probe failed, skipping it for %ds", PROBE_RETRY_SECONDS, exc_info=True)
+        return None
+    return int(result['label_names'][0]), float(result['scores'][0])
+
+
+def orientation_probe():
+    """
+    classify_orientation when this configuration can use it, else None.
+    """
+    if config.ORIENTATION_PROBE and config.OCR_BACKEND == 'paddle' and time.monotonic() >= _probe_disabled_until:
+        return classify_orientation
+    return None
+
+
+def run_recognition(crops):
+    """
+    Recognize single text-line crops without running detection.
+    Returns a list of (text, score) in the same order as `crops`.
+    """
+    if not crops:
+        return []
+    if config.OCR_BACKEND != 'paddle':
+        # The ONNX engine has its own recognizer
+        return get_ocr().recognize(crops)
+    results = get_recognizer().predict(crops, batch_size=len(crops))
+    return [(r.get('rec_text', ''), float(r.get('rec_score', 0.0))) for r in results]
+
+
+def enable_batching(max_batch_size, max_wait_ms):
+    global batcher
+    if batcher is None:
+        batcher = OCRBatcher(
+            max_batch_size, max_wait_ms, ocr_factory=lambda: adopt_or_create_ocr(batch_size=max_batch_size)
+        )
+        batcher.start()
+    return batcher
+
+
+def warmup():
+    """
+    Build the engine used by this thread and run one dummy inference so
+    the first real request does not pay for model loading.
+    """
+    image = np.full((320, 640, 3), 255, dtype=np.uint8)
+    image[140:180, 40:600] = 0
+    run_ocr(image)
+    if config.OCR_MODE in ('roi', 'adaptive', 'mrz'):
+        run_recognition([image[120:200]])
+
+
+def run_ocr(image, **options):
+    """
+    OCR one image. `options` are passed to PaddleOCR predict for this call
+    only, e.g. text_det_limit_side_len.
+    Returns (OCRLines with per-line text, score and box, mean score).
+    """
+    if batcher is not None:
+        result = [batcher.submit(image, options).result()]
+    else:
+        result = get_ocr().predict(image, **options)
+
+    lines = OCRLines([], [])
 
     # Handle the new result format - it's a list with a dict inside
     if result and len(result) > 0:
         result_dict = result[0]
 
-        # Extract rec_texts and rec_scores from the dictionary
+        # Texts, scores and boxes are kept as parallel arrays
         if isinstance(result_dict, dict):
-            rec_texts = result_dict.get('rec_texts', [])
-            rec_scores = result_dict.get('rec_scores', [])
-
-            print(f"DEBUG - rec_texts: {rec_texts}")
-            print(f"DEBUG - rec_scores: {rec_scores}")
-
-            texts = rec_texts
-            confidences = rec_scores
+            lines = OCRLines.from_paddle(result_dict)
 
-    avg_confidence = sum(confidences) / len(confidences) if confidences else 0.0
-    print(f"DEBUG - Extracted texts: {texts}")
-    print(f"DEBUG - Average confidence: {avg_confidence}")
+    avg_confidence = lines.mean_score()
+    # Only counts are logged: the recognized text is personal data
+    logger.debug("Recognized %d lines, average confidence %.3f", len(lines), avg_confidence)
 
-    return texts, avg_confidence
+    return lines, avg_confidence
@@ -0,0 +1,113 @@
+import cv2
+import numpy as np
+
+
+def _page_rotation(preprocessor):
+    """
+    The 2x3 affine matrix PaddleX's doc preprocessor rotated the page with
+    (counter-clockwise by its classified angle, canvas grown to fit), or
+    None when the page was not rotated.
+    """
+    if not preprocessor or preprocessor.get('input_img') is None:
+        return None
+    angle = preprocessor.get('angle', -1)
+    if angle is None or angle <= 0:
+        return None
+    height, width = preprocessor['input_img'].shape[:2]
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    cos, sin = abs(matrix[0, 0]), abs(matrix[0, 1])
+    matrix[0, 2] += (height * sin + width * cos - width) / 2
+    matrix[1, 2] += (height * cos + width * sin - height) / 2
+    return matrix
+
+
+def to_input_frame(boxes, preprocessor):
+    """
+    x0, y0, x1, y1 boxes detected on the doc preprocessor's rotated page
+    mapped back to the pixels of the image passed to predict().
+    """
+    matrix = _page_rotation(preprocessor)
+    if matrix is None or boxes is None or not len(boxes):
+        return boxes
+    inverse = cv2.invertAffineTransform(matrix)
+    x0, y0, x1, y1 = boxes.T
+    corners = np.stack([np.stack([x0, y0], 1), np.stack([x1, y0], 1), np.stack([x1, y1], 1), np.stack([x0, y1], 1)], 1)
+    mapped = corners @ inverse[:, :2].T + inverse[:, 2]
+    height, width = preprocessor['input_img'].shape[:2]
+    mins, maxs = mapped.min(axis=1), mapped.max(axis=1)
+    return np.stack([
+        np.clip(mins[:, 0], 0, width), np.clip(mins[:, 1], 0, height),
+        np.clip(maxs[:, 0], 0, width), np.clip(maxs[:, 1], 0, height)
+    ], axis=1).astype(np.float32)
+
+
+class OCRLines:
+    """
+    Recognized text lines of one image, in PaddleOCR's reading order,
+    stored as parallel arrays instead of one dict per line:
+
+    texts  - list of str
+    scores - float32 array (n,) of recognition scores
+    boxes  - float32 array (n, 4) of x0, y0, x1, y1 in pixels of the image
+             passed to predict(), or None when the engine returned no
+             geometry. A page the doc preprocessor rotated is mapped back;
+             an unwarped page cannot be, so its boxes stay in the
+             unwarped frame (run_ocr callers that crop from the input
+             pass use_doc_unwarping=False).
+
+    Iterating yields the texts, so an OCRLines can be passed anywhere a
+    list of texts is expected (detect_document, the utils extractors).
+    """
+
+    __slots__ = ("texts", "scores", "boxes")
+
+    def __init__(self, texts, scores, boxes=None):
+        self.texts = list(texts)
+        self.scores = np.asarray(scores, dtype=np.float32).reshape(-1)
+        self.boxes = None if boxes is None else np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        if len(self.scores) != len(self.texts) or (self.boxes is not None and len(self.boxes) != len(self.texts)):
+            raise ValueError("texts, scores and boxes must have the same length")
+
+    @classmethod
+    def from_paddle(cls, result):
+        """
+        Build from one PaddleOCR predict result (rec_texts, rec_scores and
+        rec_boxes, or rec_polys when rec_boxes is missing), with the boxes
+        mapped back through the doc preprocessor's page rotation.
+        """
+        texts = result.get('rec_texts', [])
+        boxes = result.get('rec_boxes')
+        if boxes is None or len(boxes) != len(texts):
+            polys = result.get('rec_polys')
+            if polys is not None and len(polys) == len(texts) and len(texts):
+                polys = np.asarray(polys, dtype=np.float32)
+                boxes = np.concatenate([polys.min(axis=1), polys.max(axis=1)], axis=1)
+            else:
+                boxes = None
+        if boxes is not None:
+            boxes = to_input_frame(np.asarray(boxes, dtype=np.float32).reshape(-1, 4), result.get('doc_preprocessor_res'))
+        return cls(texts, result.get('rec_scores', []), boxes)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def __iter__(self):
+        return iter(self.texts)
+
+    def __getitem__(self, index):
+        return self.texts[index]
+
+    def mean_score(self):
+        return float(self.scores.mean()) if len(self.texts) else 0.0
+
+    def to_list(self):
+        """
+        JSON-friendly form: [{"text", "score", "box": [x0, y0, x1, y1] or None}, ...]
+        """
+        # Rounded as float64 so the JSON shows 0.9 rather than 0.8999999761581421
+        scores = np.round(self.scores.astype(np.float64), 3).tolist()
+        boxes = np.round(self.boxes, 1).tolist() if self.boxes is not None else [None] * len(self.texts)
+        return [
+            {"text": text, "score": score, "box": box}
+            for text, score, box in zip(self.texts, scores, boxes)
+        ]
@@ -0,0 +1,94 @@
+import io
+import logging
+import numpy as np
+from PIL import Image, UnidentifiedImageError
+from card_layout import find_card_quad
+
+logger = logging.getLogger(__name__)
+
+# Request / EKYC_ANGLE_CLS values: "on" and "off" force PaddleOCR's
+# orientation classifiers, "auto" decides per image with resolve_orientation
+ANGLE_CLS_MODES = ("auto", "on", "off")
+
+_EXIF_ORIENTATION = 0x0112
+
+
+def exif_orientation(source):
+    """
+    EXIF orientation tag of encoded image bytes or a file path, or None.
+    cv2 applies the tag when decoding, so a tagged image is already
+    upright as the camera was held.
+    """
+    try:
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            header = Image.open(io.BytesIO(source))
+        elif isinstance(source, str):
+            header = Image.open(source)
+        else:
+            return None
+        with header:
+            return header.getexif().get(_EXIF_ORIENTATION)
+    except (UnidentifiedImageError, OSError):
+        return None
+
+
+def classifier_options(enabled, textline=None):
+    """
+    PaddleOCR predict() options switching the page and per-line
+    orientation classifiers on or off; `textline` sets the per-line one
+    on its own.
+    """
+    return {"use_doc_orientation_classify": enabled, "use_textline_orientation": enabled if textline is None else textline}
+
+
+def _probe(image, probe, min_score):
+    """
+    Rotate the image upright from one whole-image orientation prediction.
+    Returns None when the probe is unavailable or not confident.
+    """
+    if probe is None:
+        return None
+    prediction = probe(image)
+    if prediction is None:
+        return None
+    angle, score = prediction
+    if score < min_score:
+        return None
+    if angle:
+        # The angle is counter-clockwise, as in PaddleOCR's doc preprocessor
+        image = np.ascontiguousarray(np.rot90(image, angle // 90))
+    return image, angle
+
+
+def resolve_orientation(image, mode="auto", exif=None, probe=None, min_score=0.9):
+    """
+    Decide whether an image needs PaddleOCR's orientation classifiers:
+
+    - `probe(image) -> (angle, score)`, one whole-image orientation
+      prediction, catches rotated and upside-down images; when it is
+      confident the image is rotated upright here and both classifiers
+      are skipped
+    - otherwise an EXIF orientation tag (cv2 decoded the image as the
+      camera was held) or a landscape card outline rule out a quarter
+      turn but not an upside-down card, so only the page classifier is
+      skipped unless the outline is portrait
+    - with neither, both classifiers run as before
+
+    Returns (image, predict options, reason).
+    """
+    if mode in ("on", "off"):
+        return image, classifier_options(mode == "on"), "forced"
+
+    probed = _probe(image, probe, min_score)
+    if probed is not None:
+        return probed[0], classifier_options(False), f"probe_{probed[1]}"
+
+    landscape = None
+    quad = find_card_quad(image)
+    if quad is not None:
+        landscape = np.linalg.norm(quad[1] - quad[0]) >= np.linalg.norm(quad[3] - quad[0])
+    if exif is not None and landscape is not False:
+        return image, classifier_options(False, textline=True), "exif"
+    if landscape:
+        return image, classifier_options(False, textline=True), "aspect"
+    return image, classifier_options(True), "unknown"
@@ -0,0 +1,203 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+# DCT coefficients per side kept by perceptual_hash: 16 gives a 256-bit
+# hash (less the DC term), enough to tell apart different cards that share
+# the same printed layout.
+HASH_SIZE = 16
+
+
+def perceptual_hash(image, hash_size=HASH_SIZE):
+    """
+    pHash of a BGR or grayscale image as an int: the low-frequency DCT
+    coefficients of a 4 * hash_size square thumbnail, each compared with
+    their median. Re-encoding or resizing an image changes a few bits;
+    different photos differ in about half of them.
+    """
+    side = 4 * hash_size
+    # Bilinear to 8x the thumbnail, then an exact 8x area reduction: ~1 ms
+    # for any input size, and a half-size copy still hashes within a few bits
+    small = cv2.resize(image, (8 * side, 8 * side), interpolation=cv2.INTER_LINEAR)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+    gray = cv2.resize(gray, (side, side), interpolation=cv2.INTER_AREA)
+    coefficients = cv2.dct(gray.astype(np.float32))[:hash_size, :hash_size].ravel()[1:]
+    bits = coefficients > np.median(coefficients)
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+# Fields that tell one card holder from another. Cards of the same layout
+# can hash only a few bits apart, so a perceptual match alone never proves
+# that an image shows the same card.
+IDENTITY_FIELDS = (
+    "document_type", "id_number", "passport_number", "full_name",
+    "date_of_birth", "date_of_issue", "date_of_expiry"
+)
+
+
+def identity_key(result):
+    """
+    SHA-256 of the identity fields of a process_document result, or None
+    when none of them (besides the document type) was read.
+    """
+    values = [str(result.get(field) or "").upper().replace(" ", "") for field in IDENTITY_FIELDS]
+    if not any(values[1:]):
+        return None
+    return hashlib.sha256("|".join(values).encode()).hexdigest()
+
+
+class DuplicateIndex:
+    """
+    Recently seen images by perceptual hash and identity key, for replay
+    detection. An image is a replay of an earlier one when their hashes
+    are close and the same identity fields were read from both (see
+    identity_key); without identity fields only an identical hash counts.
+    The index only flags replays, it never stands in for OCR.
+
+    Each entry records when the image was first and last seen and how
+    often. Entries expire `ttl_seconds` after they were last seen and the
+    least recently seen are evicted beyond `max_entries`. An optional
+    SQLite file keeps the index across restarts, like ResultCache.
+    """
+
+    def __init__(self, max_entries, ttl_seconds, db_path=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # (hash, identity key) -> entry dict, least recently seen first
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.matches = 0
+        self.evictions = 0
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sightings "
+                "(id TEXT PRIMARY KEY, last_seen REAL, entry TEXT)"
+            )
+            self._db.commit()
+            self._load()
+
+    def match(self, image_hash, max_distance, key=None):
+        """
+        Find the closest recent image within `max_distance` bits that had
+        the same identity `key` (within 0 bits when `key` is None) and
+        count this sighting. Returns None or
+        {"distance", "first_seen", "times_seen"}.
+        """
+        if key is None:
+            max_distance = 0
+        now = time.time()
+        with self._lock:
+            self.lookups += 1
+            self._expire(now)
+            best, distance = None, max_distance + 1
+            for known_hash, known_key in self._entries:
+                if known_key != key:
+                    continue
+                d = hamming(image_hash, known_hash)
+                if d < distance:
+                    best, distance = (known_hash, known_key), d
+                    if d == 0:
+                        break
+            if best is None:
+                return None
+
+            self.matches += 1
+            entry = self._entries[best]
+            entry["last_seen"] = now
+            entry["times_seen"] += 1
+            self._entries.move_to_end(best)
+            self._save(best, entry)
+            return {"distance": distance, "first_seen": entry["first_seen"], "times_seen": entry["times_seen"]}
+
+    def add(self, image_hash, key=None):
+        """
+        Record a processed image, unless it is already known.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get((image_hash, key))
+            if entry is None:
+                entry = self._entries[(image_hash, key)] = {"first_seen": now, "last_seen": now, "times_seen": 1}
+            entry["last_seen"] = now
+            self._entries.move_to_end((image_hash, key))
+            self._save((image_hash, key), entry)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._delete(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            cleared = len(self._entries)
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM sightings")
+                self._db.commit()
+            return cleared
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "persistent": self._db is not None,
+                "lookups": self.lookups,
+                "matches": self.matches,
+                "evictions": self.evictions
+            }
+
+    def _expire(self, now):
+        # Caller holds the lock; entries are ordered by last_seen
+        cutoff = now - self.ttl_seconds
+        while self._entries:
+            entry_id, entry = next(iter(self._entries.items()))
+            if entry["last_seen"] > cutoff:
+                break
+            del self._entries[entry_id]
+            self._delete(entry_id)
+
+    @staticmethod
+    def _row_id(entry_id):
+        image_hash, key = entry_id
+        return f"{image_hash:x}:{key or ''}"
+
+    def _load(self):
+        cutoff = time.time() - self.ttl_seconds
+        self._db.execute("DELETE FROM sightings WHERE last_seen <= ?", (cutoff,))
+        rows = self._db.execute(
+            "SELECT id, entry FROM sightings ORDER BY last_seen DESC LIMIT ?", (self.max_entries,)
+        ).fetchall()
+        for row_id, entry in reversed(rows):
+            image_hash, key = row_id.split(":")
+            self._entries[(int(image_hash, 16), key or None)] = json.loads(entry)
+        self._db.commit()
+
+    def _save(self, entry_id, entry):
+        # Caller holds the lock
+        if self._db is not None:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sightings (id, last_seen, entry) VALUES (?, ?, ?)",
+                (self._row_id(entry_id), entry["last_seen"], json.dumps(entry))
+            )
+            self._db.commit()
+
+    def _delete(self, entry_id):
+        # Caller holds the lock
+        if self._db is not None:
+            self._db.execute("DELETE FROM sightings WHERE id = ?", (self._row_id(entry_id),))
+            self._db.commit()
@@ -1,40 +1,249 @@
+import io
+import logging
+import threading
+import time
+import warnings
 import cv2
 import numpy as np
+from PIL import Image, UnidentifiedImageError
+import config
 
-def preprocess_image(image_path):
-    img = cv2.imread(image_path)
-    
+logger = logging.getLogger(__name__)
+
+
+# Preprocessing profiles; the selected profile is also part of the result
+# cache key. `max_side` is the working resolution that filtering runs at,
+# `bilateral` is (d, sigmaColor, sigmaSpace) or None to skip denoising, and
+# `contrast` picks CLAHE on the LAB L channel or on a grayscale copy.
+# The det_limit_* values are passed to PaddleOCR's text detector for this
+# profile; None keeps the engine default (960 / 'min', which upscales).
+PREPROCESS_PROFILES = {
+    "quality": {
+        "max_side": 4000,
+        "upscale_below": 600,
+        "upscale_factor": 2.0,
+        "bilateral": (9, 75, 75),
+        "clahe_clip_limit": 2.0,
+        "clahe_tile_grid": (8, 8),
+        "contrast": "lab",
+        "det_limit_side_len": None,
+        "det_limit_type": None
+    },
+    "balanced": {
+        "max_side": 2000,
+        "upscale_below": 600,
+        "upscale_factor": 2.0,
+        "bilateral": (5, 50, 50),
+        "clahe_clip_limit": 2.0,
+        "clahe_tile_grid": (8, 8),
+        "contrast": "lab",
+        "det_limit_side_len": 1280,
+        "det_limit_type": "max"
+    },
+    "fast": {
+        "max_side": 1280,
+        "upscale_below": 480,
+        "upscale_factor": 1.5,
+        "bilateral": None,
+        "clahe_clip_limit": 2.0,
+        "clahe_tile_grid": (8, 8),
+        "contrast": "gray",
+        "det_limit_side_len": 960,
+        "det_limit_type": "max"
+    }
+}
+
+# CLAHE objects keep internal buffers, so reuse one per thread and setting
+# rather than one per call (or one shared across threads).
+_clahe_cache = threading.local()
+
+
+def get_profile(name=None):
+    name = name or config.PREPROCESS_PROFILE
+    if name not in PREPROCESS_PROFILES:
+        raise ValueError(f"Unknown preprocessing profile: {name}")
+    return PREPROCESS_PROFILES[name]
+
+
+def detection_options(profile=None):
+    """
+    PaddleOCR predict() overrides for the text detector of a profile.
+    """
+    cfg = get_profile(profile)
+    options = {}
+    if cfg["det_limit_side_len"] is not None:
+        options["text_det_limit_side_len"] = cfg["det_limit_side_len"]
+    if cfg["det_limit_type"] is not None:
+        options["text_det_limit_type"] = cfg["det_limit_type"]
+    return options
+
+
+def _get_clahe(clip_limit, tile_grid):
+    cache = getattr(_clahe_cache, "objects", None)
+    if cache is None:
+        cache = _clahe_cache.objects = {}
+    key = (clip_limit, tuple(tile_grid))
+    if key not in cache:
+        cache[key] = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=tuple(tile_grid))
+    return cache[key]
+
+
+class ImageTooLargeError(ValueError):
+    """Raised when an upload exceeds the byte or pixel limits."""
+
+
+# warnings.catch_warnings swaps process-wide state, so header reads take turns
+_open_lock = threading.Lock()
+
+
+def open_image(fp):
+    """
+    Image.open, raising ImageTooLargeError for decompression bombs. PIL
+    only warns about headers above Image.MAX_IMAGE_PIXELS (and raises
+    above twice that); here the warning is an error too.
+    """
+    with _open_lock, warnings.catch_warnings():
+        warnings.simplefilter("error", Image.DecompressionBombWarning)
+        try:
+            return Image.open(fp)
+        except (Image.DecompressionBombError, Image.DecompressionBombWarning) as e:
+            raise ImageTooLargeError(str(e)) from e
+
+
+def check_image_size(data):
+    """
+    Reject encoded images that are too big, reading only the header
+    so oversized images are never decoded. Returns (width, height) when
+    the header could be read, otherwise None.
+    """
+    if len(data) > config.MAX_UPLOAD_BYTES:
+        raise ImageTooLargeError(f"Image is {len(data)} bytes, limit is {config.MAX_UPLOAD_BYTES}")
+    try:
+        with open_image(io.BytesIO(data)) as header:
+            width, height = header.size
+    except UnidentifiedImageError:
+        # Unknown container; cv2.imdecode will reject it if it is not an image
+        return None
+    if width * height > config.MAX_IMAGE_PIXELS:
+        raise ImageTooLargeError(f"Image is {width}x{height} pixels, limit is {config.MAX_IMAGE_PIXELS}")
+    return width, height
+
+
+# cv2 can decode JPEGs directly at 1/2, 1/4 or 1/8 size, which is much
+# cheaper than a full decode followed by a resize.
+_REDUCED_DECODE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2)
+)
+
+
+def _decode_flag(size, max_side):
+    if size is None or max_side is None:
+        return cv2.IMREAD_COLOR
+    for factor, flag in _REDUCED_DECODE_FLAGS:
+        if max(size) / factor >= max_side:
+            return flag
+    return cv2.IMREAD_COLOR
+
+
+def load_image(source, max_side=None):
+    """
+    Load a BGR image from a file path, encoded bytes, a file-like object
+    or an already decoded ndarray. With `max_side`, encoded images that are
+    at least twice that size are decoded at a reduced scale that still
+    keeps the long side >= max_side.
+    """
+    if isinstance(source, np.ndarray):
+        return source
+
+    if hasattr(source, 'read'):
+        source = source.read()
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        if not len(source):
+            raise ValueError("Empty image data")
+        size = check_image_size(source)
+        img = cv2.imdecode(np.frombuffer(source, dtype=np.uint8), _decode_flag(size, max_side))
+        if img is None:
+            raise ValueError("Could not decode image data")
+        return img
+
+    img = cv2.imread(str(source))
     if img is None:
-        raise ValueError(f"Could not read image: {image_path}")
+        raise ValueError(f"Could not read image: {source}")
+    return img
+
+
+def preprocess_image(source, profile=None, timings=None):
+    """
+    Load and enhance an image for OCR using the named profile (defaults to
+    config.PREPROCESS_PROFILE). If `timings` is a dict, the seconds spent
+    in each stage are stored in it.
+    """
+    cfg = get_profile(profile)
+    if timings is None:
+        timings = {}
+    
+    start = time.perf_counter()
+    img = load_image(source, max_side=cfg["max_side"])
+    timings["decode"] = time.perf_counter() - start
     
     # Get image dimensions
     height, width = img.shape[:2]
-    print(f"DEBUG - Original image size: {width}x{height}")
+    logger.debug("Original image size: %dx%d", width, height)
     
-    # Only resize if image is too large
-    if max(height, width) > 4000:
-        scale = 4000 / max(height, width)
+    # Bring the image to the profile's working resolution before filtering
+    start = time.perf_counter()
+    if max(height, width) > cfg["max_side"]:
+        scale = cfg["max_side"] / max(height, width)
         new_width = int(width * scale)
         new_height = int(height * scale)
         img = cv2.resize(img, (new_width, new_height), interpolation=cv2.INTER_AREA)
-        print(f"DEBUG - Resized to: {new_width}x{new_height}")
-    elif max(height, width) < 600:
+        logger.debug("Resized to: %dx%d", new_width, new_height)
+    elif max(height, width) < cfg["upscale_below"]:
         # Upscale small images for better OCR of small text
-        img = cv2.resize(img, None, fx=2.0, fy=2.0, interpolation=cv2.INTER_CUBIC)
-        print(f"DEBUG - Upscaled image for small text")
+        factor = cfg["upscale_factor"]
+        img = cv2.resize(img, None, fx=factor, fy=factor, interpolation=cv2.INTER_CUBIC)
+        logger.debug("Upscaled image for small text")
+    timings["resize"] = time.perf_counter() - start
     
+    return _enhance(img, cfg, timings)
+
+
+def _enhance(img, cfg, timings):
     # Apply bilateral filter to preserve edges while reducing noise
-    img = cv2.bilateralFilter(img, 9, 75, 75)
-    
-    # Convert to LAB and boost L channel for better contrast
-    lab = cv2.cvtColor(img, cv2.COLOR_BGR2LAB)
-    l, a, b = cv2.split(lab)
+    start = time.perf_counter()
+    if cfg["bilateral"]:
+        img = cv2.bilateralFilter(img, *cfg["bilateral"])
+    timings["denoise"] = time.perf_counter() - start
     
     # Use CLAHE for better small text visibility
-    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-    l = clahe.apply(l)
-    
-    enhanced = cv2.merge([l, a, b])
-    result = cv2.cvtColor(enhanced, cv2.COLOR_LAB2BGR)
+    start = time.perf_counter()
+    clahe = _get_clahe(cfg["clahe_clip_limit"], cfg["clahe_tile_grid"])
+    if cfg["contrast"] == "gray":
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        result = cv2.cvtColor(clahe.apply(gray), cv2.COLOR_GRAY2BGR)
+    else:
+        # Convert to LAB and boost L channel for better contrast
+        lab = cv2.cvtColor(img, cv2.COLOR_BGR2LAB)
+        l, a, b = cv2.split(lab)
+        l = clahe.apply(l)
+        enhanced = cv2.merge([l, a, b])
+        result = cv2.cvtColor(enhanced, cv2.COLOR_LAB2BGR)
+    timings["contrast"] = time.perf_counter() - start
     
     return result
+
+
+def enhance_line(crop, profile=None, min_height=48):
+    """
+    Enhance one text-line crop for recognition with a profile's denoise and
+    contrast settings, upscaling (cubic) lines shorter than `min_height`.
+    """
+    cfg = get_profile(profile)
+    height = crop.shape[0]
+    if 0 < height < min_height:
+        factor = min_height / height
+        crop = cv2.resize(crop, None, fx=factor, fy=factor, interpolation=cv2.INTER_CUBIC)
+    return _enhance(crop, cfg, {})
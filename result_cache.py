@@ -0,0 +1,123 @@
+import copy
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResultCache:
+    """
+    LRU + TTL cache of process_document results keyed by a hash of the
+    image bytes and the OCR/preprocessing config. An optional SQLite file
+    acts as a second, persistent tier that survives restarts; results are
+    stored there as JSON, never pickled, so the file cannot run code.
+    """
+
+    def __init__(self, max_entries, ttl_seconds, db_path=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (expires_at, result)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            # Rows of the earlier pickled table are dropped unread
+            self._db.execute("DROP TABLE IF EXISTS results")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS json_results "
+                "(key TEXT PRIMARY KEY, expires_at REAL, result TEXT)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(data, fingerprint):
+        digest = hashlib.sha256(fingerprint.encode("utf-8"))
+        digest.update(data)
+        return digest.hexdigest()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, result = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return copy.deepcopy(result)
+                del self._entries[key]
+                self.expired += 1
+
+            result = self._db_get(key, now)
+            if result is not None:
+                self._store(key, now + self.ttl_seconds, result)
+                self.hits += 1
+                return copy.deepcopy(result)
+
+            self.misses += 1
+            return None
+
+    def put(self, key, result):
+        expires_at = time.time() + self.ttl_seconds
+        result = copy.deepcopy(result)
+        with self._lock:
+            self._store(key, expires_at, result)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO json_results (key, expires_at, result) VALUES (?, ?, ?)",
+                    (key, expires_at, json.dumps(result))
+                )
+                self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            cleared = len(self._entries)
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM json_results")
+                self._db.commit()
+            return cleared
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "persistent": self._db is not None,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expired": self.expired
+            }
+
+    def _store(self, key, expires_at, result):
+        # Caller holds the lock
+        self._entries[key] = (expires_at, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _db_get(self, key, now):
+        # Caller holds the lock
+        if self._db is None:
+            return None
+        row = self._db.execute(
+            "SELECT expires_at, result FROM json_results WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[0] <= now:
+            self._db.execute("DELETE FROM json_results WHERE key = ?", (key,))
+            self._db.commit()
+            self.expired += 1
+            return None
+        return json.loads(row[1])
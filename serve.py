@@ -0,0 +1,135 @@
+"""
+Multi-process API server that loads the OCR models once.
+
+    python serve.py [--workers 2] [--host 0.0.0.0] [--port 8000]
+
+`uvicorn app:app --workers N` starts N independent processes that each
+import paddle and build their own engines. Here the parent process imports
+the app and builds every worker thread's engine (EKYC_PRELOAD_MODELS),
+binds the listening socket, freezes the garbage collector and only then
+forks the server processes. The model weights, the Python modules and
+everything else loaded before the fork stay shared copy-on-write, and each
+process pays only for its own inference buffers and requests.
+
+The parent restarts a server process that dies and stops them all on
+SIGINT/SIGTERM.
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+def preload():
+    """
+    Import the app and build the engines every server process will adopt.
+    """
+    import app  # noqa: F401 - imported for its side effects
+    import ocr_engine
+    if config.PRELOAD_MODELS:
+        # With batching, the batcher's thread is the only one running predict
+        batching = config.OCR_BATCH_MAX_SIZE > 1
+        try:
+            if batching:
+                ocr_engine.preload(1, config.OCR_BATCH_MAX_SIZE)
+            else:
+                ocr_engine.preload(config.OCR_WORKERS)
+        except Exception:
+            logger.exception("Preloading models failed, each process builds its own")
+    # Objects that exist now are never collected, so the collector does
+    # not write to (and un-share) their pages in the forked processes
+    gc.collect()
+    gc.freeze()
+
+
+def bind(host, port):
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_server(sock):
+    """
+    Serve the app on the shared socket; runs in a forked process.
+    """
+    import uvicorn
+    import app
+    import main
+
+    # A SQLite connection must not be used across a fork
+    main.result_cache = main.create_result_cache()
+    main.duplicate_index = main.create_duplicate_index()
+    server = uvicorn.Server(uvicorn.Config(app.app, log_level=config.LOG_LEVEL.lower()))
+    server.run(sockets=[sock])
+
+
+def spawn(sock):
+    pid = os.fork()
+    if pid == 0:
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        code = 0
+        try:
+            run_server(sock)
+        except BaseException:
+            logger.exception("Server process failed")
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=config.SERVER_WORKERS, help="server processes")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=config.LOG_LEVEL)
+    preload()
+    sock = bind(args.host, args.port)
+    children = {spawn(sock) for _ in range(args.workers)}
+    logger.warning("Serving on %s:%d with %d processes: %s", args.host, args.port, len(children), sorted(children))
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if not stopping:
+            logger.warning("Server process %d exited with status %d, restarting", pid, os.waitstatus_to_exitcode(status))
+            time.sleep(1)
+            children.add(spawn(sock))
+    sock.close()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
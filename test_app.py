@@ -1,67 +1,272 @@
-import requests
-import os
+"""
+Offline API tests: the OCR pipeline is replaced by golden OCR texts so
+the endpoints run without models or a live server.
+"""
+import hashlib
+import json
+import struct
+import threading
+import time
+import zlib
 
-BASE_URL = "http://127.0.0.1:8000"
-IMAGES_DIR = "images"
+import pytest
+from fastapi.testclient import TestClient
 
-def test_home():
-    try:
-        response = requests.get(f"{BASE_URL}/")
-        print(f"GET /: {response.status_code}")
-        print(response.json())
-    except Exception as e:
-        print(f"Failed to connect to {BASE_URL}: {e}")
-
-def test_ekyc_identical():
-    print("\n--- Testing Identical Images (Fraud Check) ---")
-    img_path = os.path.join(IMAGES_DIR, "4.png") # Using 4.png as it was used in original main.py
-    
-    if not os.path.exists(img_path):
-        print(f"File not found: {img_path}")
-        return
-
-    files = {
-        'id_front': ('id_front.png', open(img_path, 'rb'), 'image/png'),
-        'id_back': ('id_back.png', open(img_path, 'rb'), 'image/png'), # Using same image for back for now
-        'selfie': ('selfie.png', open(img_path, 'rb'), 'image/png')
-    }
-    
-    try:
-        response = requests.post(f"{BASE_URL}/ekyc", files=files)
-        print(f"POST /ekyc status: {response.status_code}")
-        print("Result:", response.json())
-            
-    except Exception as e:
-        print(f"Error: {e}")
-    finally:
-        for f in files.values():
-            f[1].close()
-
-def test_ekyc_different():
-    print("\n--- Testing Different Images (Verification) ---")
-    img1_path = os.path.join(IMAGES_DIR, "4.png")
-    img2_path = os.path.join(IMAGES_DIR, "5.png") # Assuming 5.png exists and is different
-    
-    if not os.path.exists(img1_path) or not os.path.exists(img2_path):
-        print(f"One of the files not found: {img1_path}, {img2_path}")
-        return
-
-    files = {
-        'id_card': ('id_card.png', open(img1_path, 'rb'), 'image/png'),
-        'selfie': ('selfie.png', open(img2_path, 'rb'), 'image/png')
+import app
+import config
+import main
+from document_detector import detect_document
+from preprocess import ImageTooLargeError
+from quality_gate import ImageQualityError
+from result_cache import ResultCache
+from worker_pool import OCRWorkerPool
+from test_utils import GOLDEN_TEXTS
+
+
+def fake_process_document(data, profile=None, side=None, **kwargs):
+    # The upload content names the golden texts to "recognize"
+    if data == b"blurry":
+        raise ImageQualityError("blurry", "Image is too blurry", {"sharpness": 3.0}, side)
+    result = detect_document(GOLDEN_TEXTS[data.decode()])
+    result["confidence"] = 0.95
+    result["extracted_texts"] = GOLDEN_TEXTS[data.decode()]
+    result["image_hash"] = hashlib.sha256(data).hexdigest()
+    result["replay"] = None
+    return result
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(app, "process_document", fake_process_document)
+    monkeypatch.setattr(app.ocr_pool, "_initializer", None)
+    monkeypatch.setattr(config, "BACK_SIDE_POLICY", "always")
+    with TestClient(app.app) as client:
+        yield client
+
+
+def upload(front="ic_front", back="ic_back"):
+    return {
+        "id_front": ("front.png", front.encode(), "image/png"),
+        "id_back": ("back.png", back.encode(), "image/png")
     }
-    
+
+
+def test_home(client):
+    assert client.get("/").status_code == 200
+
+
+def test_ekyc_merges_both_sides(client):
+    response = client.post("/ekyc", files=upload())
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "success"
+    assert body["sides_processed"] == ["front", "back"]
+    assert body["ocr_data"]["id_number"] == "00-127039"
+    assert body["ocr_data"]["date_of_issue"] == "01-02-2015"
+
+
+def test_ekyc_flags_front_matching_back(client):
+    checks = client.post("/ekyc", files=upload()).json()["ocr_data"]["duplicate_checks"]
+    assert checks["front_matches_back"] is False
+    checks = client.post("/ekyc", files=upload(back="ic_front")).json()["ocr_data"]["duplicate_checks"]
+    assert checks["front_matches_back"] is True
+
+
+@pytest.mark.parametrize("policy", ["sequential", "speculative"])
+@pytest.mark.parametrize("required, sides", [
+    (("id_number", "full_name", "date_of_birth"), ["front"]),
+    (("id_number", "date_of_issue"), ["front", "back"])
+])
+def test_back_side_policy_skips_back_only_when_front_is_complete(client, monkeypatch, policy, required, sides):
+    def slow_back(data, profile=None, side=None, **kwargs):
+        # A speculative back must not finish before the front decides
+        if side == "back":
+            time.sleep(0.1)
+        return fake_process_document(data, profile, side)
+
+    monkeypatch.setattr(app, "process_document", slow_back)
+    monkeypatch.setattr(config, "BACK_SIDE_POLICY", policy)
+    monkeypatch.setattr(config, "REQUIRED_FIELDS", required)
+    body = client.post("/ekyc", files=upload()).json()
+    assert body["sides_processed"] == sides
+    # The back is only read for date_of_issue
+    assert (body["ocr_data"].get("date_of_issue") is not None) == (sides == ["front", "back"])
+
+
+def test_ekyc_rejects_unknown_profile(client):
+    response = client.post("/ekyc", files=upload(), data={"profile": "nope"})
+    assert response.status_code == 400
+
+
+def test_ekyc_rejects_oversized_upload(client, monkeypatch):
+    monkeypatch.setattr(config, "MAX_UPLOAD_BYTES", 4)
+    response = client.post("/ekyc", files=upload())
+    assert response.status_code == 413
+
+
+def png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def png_header(width, height):
+    # A few bytes claiming a huge image: PIL reads the size from IHDR alone
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + png_chunk(b"IHDR", ihdr) + png_chunk(b"IDAT", zlib.compress(b"")) + png_chunk(b"IEND", b"")
+
+
+@pytest.mark.parametrize("size", [15000, 10000])
+def test_ekyc_rejects_decompression_bomb_header(client, monkeypatch, size):
+    # 15000x15000 makes PIL raise DecompressionBombError, 10000x10000 warn
+    monkeypatch.setattr(app, "process_document", main.process_document)
+    monkeypatch.setattr(main, "result_cache", None)
+    files = {side: (side + ".png", png_header(size, size), "image/png") for side in ("id_front", "id_back")}
+    response = client.post("/ekyc", files=files)
+    assert response.status_code == 413
+
+
+def test_admin_cache_reports_and_clears(client, monkeypatch):
+    monkeypatch.setattr(config, "ADMIN_TOKEN", "secret")
+    admin = {"X-Admin-Token": "secret"}
+    monkeypatch.setattr(main, "result_cache", None)
+    assert client.get("/admin/cache", headers=admin).json() == {"enabled": False}
+
+    monkeypatch.setattr(main, "result_cache", ResultCache(max_entries=4, ttl_seconds=60))
+    main.result_cache.put("a", {"n": 1})
+    main.result_cache.put("b", {"n": 2})
+    stats = client.get("/admin/cache", headers=admin).json()
+    assert stats["enabled"] and stats["entries"] == 2
+    assert client.post("/admin/cache/clear", headers=admin).json() == {"enabled": True, "cleared": 2}
+    assert main.result_cache.get("a") is None
+
+
+@pytest.mark.parametrize("path", ["/admin/cache/clear", "/admin/duplicates/clear"])
+def test_admin_routes_need_the_admin_token(client, monkeypatch, path):
+    monkeypatch.setattr(main, "result_cache", ResultCache(max_entries=4, ttl_seconds=60))
+    main.result_cache.put("a", {"n": 1})
+    # Disabled by default
+    assert client.post(path).status_code == 404
+    monkeypatch.setattr(config, "ADMIN_TOKEN", "secret")
+    assert client.post(path).status_code == 403
+    assert client.post(path, headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert main.result_cache.get("a") == {"n": 1}
+
+
+def test_ekyc_answers_503_with_retry_after_when_the_pool_is_full(client):
+    release = threading.Event()
+    pool = OCRWorkerPool(1, 1)
+    pool.start()
+    # Swapped back before the client's shutdown stops the app's own pool
+    app.ocr_pool, serving_pool = pool, app.ocr_pool
     try:
-        response = requests.post(f"{BASE_URL}/ekyc", files=files)
-        print(f"POST /ekyc status: {response.status_code}")
-        print("Result:", response.json())
-    except Exception as e:
-        print(f"Error: {e}")
+        # One side running, one queued: the pool takes nothing more
+        pool.submit(release.wait)
+        time.sleep(0.05)
+        pool.submit(release.wait)
+        response = client.post("/ekyc", files=upload())
     finally:
-        for f in files.values():
-            f[1].close()
+        app.ocr_pool = serving_pool
+        release.set()
+        pool.shutdown()
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(config.RETRY_AFTER_SECONDS)
+    assert "queue is full" in response.json()["message"]
+
+
+def test_pool_shutdown_cancels_queued_work_instead_of_blocking():
+    release = threading.Event()
+    pool = OCRWorkerPool(1, 2)
+    pool.start()
+    running = pool.submit(release.wait)
+    time.sleep(0.05)
+    queued = [pool.submit(lambda: "late") for _ in range(2)]
+
+    # The queue is full, so a blocking put of the stop marker would hang here
+    start = time.monotonic()
+    pool.shutdown(wait=False)
+    assert time.monotonic() - start < 0.5
+    assert all(future.cancelled() for future in queued)
+    with pytest.raises(RuntimeError, match="shut down"):
+        pool.submit(lambda: None)
+    release.set()
+    assert running.result(timeout=1) is True
+
+
+def test_ekyc_reports_quality_rejection(client):
+    response = client.post("/ekyc", files=upload(back="blurry"))
+    assert response.status_code == 422
+    assert response.json()["reason"] == "blurry" and response.json()["side"] == "back"
+
+
+def test_ekyc_answers_504_when_the_deadline_passes(client, monkeypatch):
+    def slow_process_document(data, profile=None, side=None, **kwargs):
+        time.sleep(0.3)
+        return fake_process_document(data, profile, side)
+
+    monkeypatch.setattr(app, "process_document", slow_process_document)
+    monkeypatch.setattr(config, "REQUEST_DEADLINE_SECONDS", 0.1)
+    response = client.post("/ekyc", files=upload())
+    assert response.status_code == 504
+
+
+def test_document_streams_pages_then_merged_documents(client, monkeypatch):
+    def fake_process_pages(data, profile=None, mode=None, angle_cls=None):
+        for number, name in enumerate(("ic_back", "ic_front"), 1):
+            yield {"page": number, "status": "ok", "result": fake_process_document(name.encode())}
+        yield {"page": 3, "status": "rejected", "reason": "blank", "error": "Image is blank"}
+
+    monkeypatch.setattr(app, "process_pages", fake_process_pages)
+    monkeypatch.setattr(app, "page_count", lambda data: 3)
+    response = client.post("/ekyc/document", files={"document": ("scan.pdf", b"%PDF-1.7", "application/pdf")})
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line.get("status") for line in lines] == ["ok", "ok", "rejected", None]
+    assert lines[-1]["page_count"] == 3 and lines[-1]["truncated"] is False
+    (document,) = lines[-1]["documents"]
+    assert document["pages"] == [2, 1]
+    assert document["result"]["id_number"] == "00-127039" and document["result"]["date_of_issue"] == "01-02-2015"
+
+
+def test_document_rejects_plain_images(client):
+    response = client.post("/ekyc/document", files={"document": ("card.png", b"ic_front", "image/png")})
+    assert response.status_code == 415
+
+
+def test_passport_uses_mrz_mode(client, monkeypatch):
+    calls = []
+
+    def fake_passport(data, profile=None, side=None, **kwargs):
+        calls.append((side, kwargs["mode"]))
+        return fake_process_document(data, profile, side)
+
+    monkeypatch.setattr(app, "process_document", fake_passport)
+    response = client.post("/ekyc/passport", files={"passport": ("passport.png", b"passport", "image/png")})
+    assert response.status_code == 200 and calls == [("passport", "mrz")]
+    assert response.json()["ocr_data"]["raw_text"].startswith("PASSPORT")
+
+
+def finished_job(client, response):
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    for _ in range(100):
+        job = client.get(f"/ekyc/jobs/{job_id}").json()
+        if job["status"] in ("done", "failed"):
+            break
+        time.sleep(0.02)
+    return job
+
+
+def test_job_completes(client):
+    job = finished_job(client, client.post("/ekyc/jobs", files=upload()))
+    assert job["status"] == "done"
+    assert job["result"]["id_number"] == "00-127039"
+
+
+def test_job_fails_on_decompression_bomb(client, monkeypatch):
+    def too_large(data, profile=None, side=None, **kwargs):
+        raise ImageTooLargeError("image.png is 225000000 pixels, over the decompression bomb limit")
 
-if __name__ == "__main__":
-    test_home()
-    test_ekyc_identical()
-    # test_ekyc_different() # Optional, might differ too much
+    monkeypatch.setattr(app, "process_document", too_large)
+    before = app.ERRORS.value(type="too_large")
+    job = finished_job(client, client.post("/ekyc/jobs", files=upload()))
+    assert job["status"] == "failed"
+    assert "decompression bomb" in job["error"]
+    assert app.ERRORS.value(type="too_large") == before + 1
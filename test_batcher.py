@@ -0,0 +1,102 @@
+"""
+Cross-request OCR batching with a fake engine in place of PaddleOCR.
+"""
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from batcher import OCRBatcher
+
+
+class FakeOCR:
+    def __init__(self, gate=None):
+        self.calls = []
+        self.gate = gate
+
+    def predict(self, images, **options):
+        if self.gate is not None:
+            self.gate.wait()
+        self.calls.append((list(images), options))
+        return [{"image": image, **options} for image in images]
+
+
+def item(image, key=()):
+    return (Future(), image, time.monotonic(), key)
+
+
+def test_collect_fills_a_batch_and_backlogs_other_options():
+    batcher = OCRBatcher(3, 50, ocr_factory=FakeOCR)
+    small = (("text_det_limit_side_len", 640),)
+    for queued in (item("b"), item("c", small), item("d"), item("e")):
+        batcher._queue.put(queued)
+
+    batch = batcher._collect(item("a"))
+    assert [queued[1] for queued in batch] == ["a", "b", "d"]
+    assert [queued[1] for queued in batcher._backlog] == ["c"]
+
+    # The backlog is drained first, by options
+    batcher._backlog.append(item("f", small))
+    batch = batcher._collect(batcher._backlog.popleft())
+    assert [queued[1] for queued in batch] == ["c", "f"]
+
+
+def test_collect_stops_waiting_after_max_wait():
+    batcher = OCRBatcher(8, 20, ocr_factory=FakeOCR)
+    start = time.monotonic()
+    assert len(batcher._collect(item("a"))) == 1
+    assert time.monotonic() - start < 0.5
+
+
+def test_concurrent_submits_share_predict_calls_per_options():
+    gate = threading.Event()
+    ocr = FakeOCR(gate)
+    batcher = OCRBatcher(4, 50, ocr_factory=lambda: ocr)
+    batcher.start()
+    try:
+        # The first image blocks the engine while the rest queue up
+        first = batcher.submit("a")
+        time.sleep(0.1)
+        futures = [batcher.submit(image) for image in "bcd"]
+        futures.append(batcher.submit("e", {"use_textline_orientation": False}))
+        gate.set()
+        results = [future.result(timeout=5) for future in [first] + futures]
+    finally:
+        batcher.shutdown()
+
+    assert [result["image"] for result in results] == list("abcde")
+    assert results[-1]["use_textline_orientation"] is False
+    assert ocr.calls == [
+        (["a"], {}),
+        (["b", "c", "d"], {}),
+        (["e"], {"use_textline_orientation": False})
+    ]
+
+
+def test_predict_errors_fail_every_image_of_the_batch():
+    class BrokenOCR:
+        def predict(self, images, **options):
+            return []
+
+    batcher = OCRBatcher(2, 20, ocr_factory=BrokenOCR)
+    batcher.start()
+    try:
+        with pytest.raises(RuntimeError, match="0 results for 1 images"):
+            batcher.submit("a").result(timeout=5)
+    finally:
+        batcher.shutdown()
+
+
+def test_engine_build_failure_fails_submits_instead_of_hanging():
+    def broken_factory():
+        raise RuntimeError("model download failed")
+
+    batcher = OCRBatcher(2, 20, ocr_factory=broken_factory)
+    batcher.start()
+    try:
+        for image in "ab":
+            with pytest.raises(RuntimeError, match="model download failed"):
+                batcher.submit(image).result(timeout=5)
+    finally:
+        batcher.shutdown()
@@ -0,0 +1,79 @@
+"""
+Request deadlines: degradation levels, stage checks and load shedding.
+"""
+import threading
+import time
+
+import cv2
+import pytest
+
+import config
+import main
+from tests_support import card_photo
+from deadline import Deadline, DeadlineExceeded, degrade
+from ocr_lines import OCRLines
+from result_cache import ResultCache
+from worker_pool import OCRWorkerPool, OverloadedError
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    calls = []
+
+    def fake_run_ocr(image, **options):
+        calls.append(options)
+        return OCRLines(["KAD PENGENALAN", "00-127039"], [0.9, 0.9]), 0.9
+
+    monkeypatch.setattr(main, "run_ocr", fake_run_ocr)
+    monkeypatch.setattr(main, "result_cache", None)
+    monkeypatch.setattr(main, "duplicate_index", None)
+    monkeypatch.setattr(config, "ORIENTATION_PROBE", False)
+    monkeypatch.setattr(config, "OCR_MODE", "full")
+    return calls
+
+
+def test_low_budget_uses_cheaper_settings(pipeline, monkeypatch):
+    monkeypatch.setattr(config, "DEGRADE_REDUCED_BELOW_SECONDS", 10.0)
+    monkeypatch.setattr(config, "DEGRADE_MINIMAL_BELOW_SECONDS", 5.0)
+    assert [Deadline(seconds).level() for seconds in (20, 8, 2)] == [0, 1, 2]
+    assert degrade(0, "quality", "auto") == ("quality", "auto", {})
+
+    image = cv2.imencode(".jpg", card_photo())[1].tobytes()
+    result = main.process_document(image, deadline=Deadline(2))
+    assert result["degradation"] == {"level": 2, "name": "minimal"}
+    assert pipeline[-1]["text_det_limit_side_len"] == 640 and pipeline[-1]["text_det_limit_type"] == "max"
+    assert pipeline[-1]["use_textline_orientation"] is False
+    assert "degradation" not in main.process_document(image)
+
+
+def test_cached_results_only_report_the_callers_degradation(pipeline, monkeypatch):
+    monkeypatch.setattr(main, "result_cache", ResultCache(max_entries=4, ttl_seconds=60))
+    image = cv2.imencode(".jpg", card_photo())[1].tobytes()
+    assert main.process_document(image, deadline=Deadline(20))["degradation"]["level"] == 0
+    assert "degradation" not in main.process_document(image)
+    assert main.process_document(image, deadline=Deadline(20))["degradation"]["level"] == 0
+    assert len(pipeline) == 1
+
+
+def test_expired_deadline_stops_before_any_work(pipeline):
+    with pytest.raises(DeadlineExceeded) as error:
+        main.process_document(cv2.imencode(".jpg", card_photo())[1].tobytes(), deadline=Deadline(0))
+    assert error.value.stage == "queue" and not pipeline
+
+
+def test_pool_sheds_when_queue_wait_exceeds_target():
+    release = threading.Event()
+    pool = OCRWorkerPool(1, 4, max_queue_wait=0.05)
+    pool.start()
+    try:
+        pool.submit(release.wait)
+        queued = pool.submit(lambda: "done")
+        time.sleep(0.1)
+        assert pool.queue_wait > 0.05
+        with pytest.raises(OverloadedError):
+            pool.submit(lambda: None)
+        release.set()
+        assert queued.result(timeout=1) == "done" and pool.queue_wait == 0.0
+    finally:
+        release.set()
+        pool.shutdown()
@@ -0,0 +1,39 @@
+"""
+Template registry: keyword scoring across templates and YAML loading.
+"""
+import pytest
+
+from document_detector import detect_document
+from document_templates import load_templates
+
+
+def test_most_keywords_win_within_a_priority():
+    result = detect_document(["KAD PENGENALAN MALAYSIA", "MyKad", "800101-14-5678", "TAN AH KOW"])
+    assert result["document_type"] == "National ID" and result["issuing_country"] == "Malaysia"
+    assert result["id_number"] == "800101-14-5678"
+    brunei = detect_document(["KAD PENGENALAN", "NEGARA BRUNEI DARUSSALAM", "00-127039"])
+    assert "issuing_country" not in brunei and brunei["card_color"] == "Yellow"
+
+
+def test_new_template_is_loaded_from_yaml(tmp_path):
+    (tmp_path / "permit.yaml").write_text(
+        "name: work_permit\n"
+        "document_type: Work Permit\n"
+        "keywords: [pas kerja, work pass]\n"
+        "fields:\n"
+        "  permit_number: {pattern: '\\bWP\\d{6}\\b', nospace: true}\n"
+        "classify:\n"
+        "  field: permit_number\n"
+        "  rules: [{prefixes: [WP9], set: {category: Skilled}}]\n"
+        "  default: {category: General}\n"
+    )
+    registry = load_templates(str(tmp_path))
+    result = registry.detect(["PAS KERJA", "WP 912345"])
+    assert result == {"permit_number": "WP912345", "document_type": "Work Permit", "category": "Skilled"}
+    assert registry.detect(["RECEIPT"])["document_type"] == "Unknown"
+
+
+def test_invalid_template_names_its_file(tmp_path):
+    (tmp_path / "bad.yaml").write_text("name: bad\ndocument_type: X\nkeyword: [typo]\n")
+    with pytest.raises(ValueError, match="bad.yaml"):
+        load_templates(str(tmp_path))
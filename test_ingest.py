@@ -0,0 +1,60 @@
+"""
+Page rasterization for PDF and TIFF input, and grouping pages into documents.
+"""
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import config
+import main
+from document_detector import detect_document, group_pages
+from ingest import document_kind, iter_pages, page_count
+from test_utils import GOLDEN_TEXTS
+
+
+def test_pdf_pages_are_rendered_lazily_within_max_side():
+    pymupdf = pytest.importorskip("pymupdf")
+    document = pymupdf.open()
+    for _ in range(3):
+        document.new_page(width=595, height=842)
+    data = document.tobytes()
+
+    assert document_kind(data) == "pdf"
+    pages = iter_pages(data, dpi=300, max_side=1000)
+    number, image = next(pages)
+    assert number == 1 and max(image.shape[:2]) == 1000 and image.shape[2] == 3
+    assert [number for number, _ in pages] == [2, 3]
+
+
+def test_only_multi_page_tiffs_are_documents():
+    frames = [Image.fromarray(np.full((40, 60, 3), value, dtype=np.uint8)) for value in (0, 255)]
+    single, multi = io.BytesIO(), io.BytesIO()
+    frames[0].save(single, format="TIFF")
+    frames[0].save(multi, format="TIFF", save_all=True, append_images=frames[1:])
+    assert document_kind(single.getvalue()) is None
+    assert document_kind(multi.getvalue()) == "tiff"
+    assert [image[0, 0, 0] for _, image in iter_pages(multi.getvalue())] == [0, 255]
+
+
+def test_pages_past_the_limit_are_reported_as_truncated(monkeypatch):
+    frames = [Image.fromarray(np.full((40, 60, 3), value, dtype=np.uint8)) for value in (0, 100, 255)]
+    multi = io.BytesIO()
+    frames[0].save(multi, format="TIFF", save_all=True, append_images=frames[1:])
+    monkeypatch.setattr(config, "PDF_MAX_PAGES", 2)
+    monkeypatch.setattr(main, "process_document", lambda image, *args, **kwargs: detect_document(GOLDEN_TEXTS["ic_front"]))
+
+    result = main.process_file(multi.getvalue())
+    assert page_count(multi.getvalue()) == 3
+    assert [page["page"] for page in result["pages"]] == [1, 2]
+    assert result["page_count"] == 3 and result["truncated"] is True
+
+
+def test_id_backs_are_merged_with_their_fronts():
+    pages = [(number, detect_document(GOLDEN_TEXTS[name]))
+             for number, name in enumerate(("ic_front", "unknown", "ic_back", "ic_front_no_label"), 1)]
+    documents = group_pages(pages)
+    assert [document["pages"] for document in documents] == [[1, 3], [2], [4]]
+    assert documents[0]["result"]["date_of_issue"] == "01-02-2015"
+    assert documents[1]["document_type"] == pages[1][1]["document_type"]
@@ -0,0 +1,64 @@
+"""
+TD3 parsing and check digits on the ICAO 9303 specimen, and MRZ location
+on a synthetic passport page.
+"""
+import cv2
+import numpy as np
+
+from document_detector import detect_document
+from mrz import check_digit, locate_mrz, parse_td3, read_mrz
+
+LINE1 = "P<UTOERIKSSON<<ANNA<MARIA<<<<<<<<<<<<<<<<<<<"
+LINE2 = "L898902C36UTO7408122F1204159ZE184226B<<<<<10"
+
+
+def passport_page():
+    image = np.full((880, 1250, 3), 225, dtype=np.uint8)
+    cv2.rectangle(image, (60, 120), (330, 480), (150, 140, 130), -1)
+    for row, text in enumerate(["PASSPORT", "Surname ERIKSSON", "Given names ANNA MARIA", "Date of birth 12 AUG 1974"]):
+        cv2.putText(image, text, (380, 150 + row * 60), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (40, 40, 40), 2)
+    for row, text in enumerate((LINE1, LINE2)):
+        cv2.putText(image, text, (50, 750 + row * 60), cv2.FONT_HERSHEY_PLAIN, 2.6, (20, 20, 20), 2)
+    return image
+
+
+def test_specimen_fields_and_check_digits():
+    assert check_digit("L898902C3") == "6" and check_digit("740812") == "2"
+    fields = parse_td3(LINE1, LINE2)
+    assert fields["mrz"]["valid"]
+    assert fields["passport_number"] == "L898902C3" and fields["nationality"] == "UTO"
+    assert fields["full_name"] == "ANNA MARIA ERIKSSON" and fields["last_name"] == "ERIKSSON"
+    assert fields["date_of_birth"] == "12-08-1974" and fields["date_of_expiry"] == "15-04-2012"
+    assert fields["gender"] == "Female"
+
+
+def test_ocr_confusions_are_fixed_and_misreads_fail_their_check():
+    # O for 0 in the birth date and a guillemet for << are common misreads
+    fields = parse_td3(LINE1.replace("<<<<<<<<", "««««"), LINE2.replace("7408122", "74O8122"))
+    assert fields["mrz"]["valid"] and fields["date_of_birth"] == "12-08-1974"
+    fields = parse_td3(LINE1, LINE2.replace("L898902C3", "L898902C8"))
+    assert not fields["mrz"]["checks"]["passport_number"] and not fields["mrz"]["valid"]
+    assert parse_td3("RECEIPT", LINE2) is None
+
+
+def test_only_the_two_mrz_lines_are_recognized():
+    image = passport_page()
+    x0, y0, x1, y1 = locate_mrz(image)
+    assert y0 > 0.7 * image.shape[0] and x1 - x0 > 0.8 * image.shape[1]
+
+    crops = []
+
+    def recognize(lines):
+        crops.extend(lines)
+        return [(LINE1, 0.98), (LINE2, 0.97)]
+
+    fields, recognized = read_mrz(image, recognize)
+    assert len(crops) == 2 and crops[0].shape[0] < 2 * crops[1].shape[0]
+    assert fields["passport_number"] == "L898902C3" and len(recognized) == 2
+    assert locate_mrz(np.full((600, 900, 3), 225, dtype=np.uint8)) is None
+
+
+def test_full_page_texts_with_an_mrz_are_passports():
+    result = detect_document(["PASPORT", "NEGARA BRUNEI DARUSSALAM", "ERIKSSON", LINE1, LINE2])
+    assert result["document_type"] == "Passport" and result["mrz"]["valid"]
+    assert result["passport_number"] == "L898902C3"
@@ -0,0 +1,83 @@
+"""
+ONNX backend post-processing, plus a parity check against the Paddle
+backend that runs when exported models and fixtures are available:
+
+    EKYC_ONNX_MODEL_DIR=models/onnx EKYC_PARITY_FIXTURES=fixtures/ pytest test_ocr_backends.py
+"""
+import difflib
+import glob
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+import config
+from ocr_backends import ctc_decode, db_boxes, sort_boxes
+
+PARITY_FIXTURES = os.environ.get("EKYC_PARITY_FIXTURES")
+PARITY_FIELDS = ("id_number", "full_name", "date_of_birth", "gender", "date_of_issue", "date_of_expiry")
+
+
+def test_unknown_backend_is_rejected_at_startup():
+    env = dict(os.environ, EKYC_OCR_BACKEND="onxx")
+    proc = subprocess.run([sys.executable, "-c", "import config"], env=env, capture_output=True, text=True,
+                          cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert proc.returncode != 0
+    assert "EKYC_OCR_BACKEND='onxx' is not one of paddle, onnx, openvino" in proc.stderr
+
+
+def test_ctc_decode_merges_repeats_and_drops_blanks():
+    probs = np.eye(4, dtype=np.float32)[[0, 1, 1, 0, 1, 2, 2, 3, 0]][None]
+    assert ctc_decode(probs, "abc") == [("aabc", 1.0)]
+    assert ctc_decode(np.eye(4, dtype=np.float32)[[0, 0]][None], "abc") == [("", 0.0)]
+
+
+def test_db_boxes_finds_text_regions_in_reading_order():
+    prob = np.zeros((100, 200), dtype=np.float32)
+    prob[60:70, 20:180] = 0.9
+    prob[10:20, 110:180] = 0.9
+    prob[12:22, 20:100] = 0.9
+    # Source image is twice the size of the probability map
+    boxes, scores = db_boxes(prob, 200, 400, thresh=0.3, box_thresh=0.5, unclip_ratio=1.5)
+    assert len(boxes) == 3 and min(scores) > 0.8
+    ordered = sort_boxes(list(boxes))
+    assert [int(box[:, 0].min() < 200) for box in ordered] == [1, 0, 1]
+    assert ordered[2][:, 1].min() > 100
+
+
+def _parity_images():
+    if not PARITY_FIXTURES:
+        return []
+    return sorted(p for p in glob.glob(os.path.join(PARITY_FIXTURES, "*")) if p.lower().endswith((".png", ".jpg", ".jpeg")))
+
+
+@pytest.mark.skipif(
+    not _parity_images() or not os.path.exists(os.path.join(config.ONNX_MODEL_DIR, "rec", "inference.onnx")),
+    reason="needs EKYC_PARITY_FIXTURES images and exported models in EKYC_ONNX_MODEL_DIR"
+)
+@pytest.mark.parametrize("backend", ["onnx", "openvino"])
+def test_onnx_backend_matches_paddle(backend):
+    from paddleocr import PaddleOCR
+    from document_detector import detect_document
+    from ocr_backends import create_onnx_ocr
+    from ocr_engine import OCR_CONFIG
+    from ocr_lines import OCRLines
+    from preprocess import preprocess_image
+
+    paddle_ocr = PaddleOCR(**OCR_CONFIG)
+    onnx_ocr = create_onnx_ocr(OCR_CONFIG, backend=backend)
+    for path in _parity_images():
+        image = preprocess_image(path)
+        # The ONNX backend has no document orientation / unwarping stage
+        expected = OCRLines.from_paddle(paddle_ocr.predict(
+            image, use_doc_orientation_classify=False, use_doc_unwarping=False)[0])
+        actual = OCRLines.from_paddle(onnx_ocr.predict(image)[0])
+
+        similarity = difflib.SequenceMatcher(None, " ".join(expected), " ".join(actual)).ratio()
+        assert similarity >= 0.95, f"{path}: texts differ ({similarity:.3f})"
+        expected_fields = detect_document(expected)
+        actual_fields = detect_document(actual)
+        for field in PARITY_FIELDS:
+            assert actual_fields.get(field) == expected_fields.get(field), f"{path}: {field}"
@@ -0,0 +1,57 @@
+"""
+Orientation classifier decisions on synthetic card photos.
+"""
+import numpy as np
+
+import config
+import ocr_engine
+from tests_support import card_photo
+from orientation import resolve_orientation
+
+
+def test_landscape_card_skips_page_classifier_without_probe():
+    _, options, reason = resolve_orientation(card_photo())
+    assert reason == "aspect" and not options["use_doc_orientation_classify"]
+    # A landscape card may still be upside down
+    assert options["use_textline_orientation"]
+
+
+def test_exif_tag_does_not_skip_the_probe():
+    # EXIF orientation 1 on an upside-down phone photo
+    upside_down = np.ascontiguousarray(np.rot90(card_photo(), 2))
+    image, options, reason = resolve_orientation(upside_down, exif=1, probe=lambda image: (180, 0.97))
+    assert reason == "probe_180" and np.array_equal(image, card_photo())
+    _, options, reason = resolve_orientation(upside_down, exif=1)
+    assert reason == "exif" and options["use_textline_orientation"]
+
+
+def test_confident_probe_rotates_image_upright():
+    rotated = np.ascontiguousarray(np.rot90(card_photo()))
+    image, options, reason = resolve_orientation(rotated, probe=lambda image: (270, 0.98))
+    assert reason == "probe_270" and image.shape == (600, 900, 3)
+    assert not options["use_doc_orientation_classify"]
+
+
+def test_unsure_images_keep_classifiers():
+    rotated = np.ascontiguousarray(np.rot90(card_photo()))
+    assert resolve_orientation(rotated)[2] == "unknown"
+    assert resolve_orientation(rotated, probe=lambda image: (180, 0.5))[1]["use_textline_orientation"]
+    assert resolve_orientation(card_photo(), mode="on")[1]["use_textline_orientation"]
+
+
+def test_failed_probe_backs_off_then_retries(monkeypatch):
+    class BrokenClassifier:
+        def predict(self, image, batch_size=1):
+            raise RuntimeError("model unavailable")
+
+    monkeypatch.setattr(config, "ORIENTATION_PROBE", True)
+    monkeypatch.setattr(config, "OCR_BACKEND", "paddle")
+    monkeypatch.setattr(ocr_engine._thread_local, "orientation", BrokenClassifier(), raising=False)
+    monkeypatch.setattr(ocr_engine, "_probe_disabled_until", 0.0)
+    failures = ocr_engine.PROBE_FAILURES.value()
+
+    assert ocr_engine.classify_orientation(card_photo()) is None
+    assert ocr_engine.orientation_probe() is None
+    assert ocr_engine.PROBE_FAILURES.value() == failures + 1
+    monkeypatch.setattr(ocr_engine, "_probe_disabled_until", 0.0)
+    assert ocr_engine.orientation_probe() is ocr_engine.classify_orientation
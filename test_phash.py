@@ -0,0 +1,76 @@
+"""
+Perceptual hashes and the duplicate index.
+"""
+import cv2
+import numpy as np
+
+import config
+import main
+from tests_support import card_photo
+from ocr_lines import OCRLines
+from phash import DuplicateIndex, hamming, perceptual_hash
+
+
+def id_card(id_number="00-127039", name="AHMAD BIN ALI"):
+    return card_photo(lines=[id_number, name], font_scale=1.5)
+
+
+def test_hash_survives_reencoding_but_not_a_different_card():
+    image = id_card()
+    recompressed = cv2.imdecode(cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 40])[1], cv2.IMREAD_COLOR)
+    resized = cv2.resize(image, None, fx=0.5, fy=0.5, interpolation=cv2.INTER_AREA)
+    assert hamming(perceptual_hash(image), perceptual_hash(recompressed)) <= 6
+    assert hamming(perceptual_hash(image), perceptual_hash(resized)) <= 6
+    assert hamming(perceptual_hash(image), perceptual_hash(id_card("51-000123", "SITI AMINAH"))) > 16
+
+
+def test_index_flags_replays_of_the_same_identity_only():
+    index = DuplicateIndex(max_entries=4, ttl_seconds=60)
+    image_hash = perceptual_hash(id_card())
+    assert index.match(image_hash, 16, "a") is None
+    index.add(image_hash, "a")
+
+    replay = index.match(image_hash, 16, "a")
+    assert replay["distance"] == 0 and replay["times_seen"] == 2
+    assert index.match(image_hash ^ 0b111, 16, "a")["distance"] == 3
+    # A close hash with other identity fields is another card
+    assert index.match(image_hash, 16, "b") is None
+    # Without identity fields only the identical hash counts
+    index.add(image_hash, None)
+    assert index.match(image_hash ^ 1, 16) is None
+    assert index.match(image_hash, 16)["distance"] == 0
+
+
+def test_close_cards_are_neither_flagged_nor_given_each_others_result(monkeypatch):
+    # Two holders' cards one digit apart hash only a few bits apart
+    first, second = id_card("00-127039"), id_card("00-127038")
+    assert hamming(perceptual_hash(first), perceptual_hash(second)) <= 6
+
+    def fake_run_ocr(image, **options):
+        id_number = "00-127039" if np.array_equal(image, first) else "00-127038"
+        return OCRLines(["KAD PENGENALAN", id_number, "AHMAD BIN ALI"], [0.9, 0.9, 0.9]), 0.9
+
+    monkeypatch.setattr(main, "run_ocr", fake_run_ocr)
+    monkeypatch.setattr(main, "preprocess_image", lambda image, profile=None, **kwargs: image)
+    monkeypatch.setattr(main, "result_cache", None)
+    monkeypatch.setattr(main, "duplicate_index", DuplicateIndex(max_entries=8, ttl_seconds=60))
+    monkeypatch.setattr(config, "ORIENTATION_PROBE", False)
+    monkeypatch.setattr(config, "QUALITY_GATE", False)
+    monkeypatch.setattr(config, "OCR_MODE", "full")
+
+    assert main.process_document(first)["replay"] is None
+    result = main.process_document(second)
+    assert result["replay"] is None and result["id_number"] == "00-127038"
+    assert main.process_document(first)["replay"]["times_seen"] == 2
+
+
+def test_index_evicts_least_recently_seen_and_persists(tmp_path):
+    path = str(tmp_path / "duplicates.db")
+    index = DuplicateIndex(max_entries=2, ttl_seconds=60, db_path=path)
+    for image_hash in (1, 2, 3):
+        index.add(image_hash << 100, "a")
+    assert index.stats()["evictions"] == 1
+
+    reopened = DuplicateIndex(max_entries=2, ttl_seconds=60, db_path=path)
+    assert reopened.match(1 << 100, 0, "a") is None
+    assert reopened.match(3 << 100, 0, "a")["times_seen"] == 2
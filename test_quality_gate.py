@@ -0,0 +1,51 @@
+"""
+Quality gate decisions on synthetic card photos.
+"""
+import cv2
+import numpy as np
+import pytest
+
+import config
+from tests_support import card_photo
+from quality_gate import ImageQualityError, assess_quality, check_quality
+
+
+def test_sharp_card_passes():
+    assert assess_quality(card_photo())[0] is None
+
+
+def text_on(background, color):
+    image = np.full((600, 900, 3), background, dtype=np.uint8)
+    for row in range(100, 600, 100):
+        cv2.putText(image, "NEGARA BRUNEI", (100, row), cv2.FONT_HERSHEY_SIMPLEX, 2, color, 4)
+    return image
+
+
+@pytest.mark.parametrize("image, reason", [
+    (card_photo(320, 200), "too_small"),
+    (np.full((600, 900, 3), 250, dtype=np.uint8), "blank"),
+    (text_on(5, (60, 60, 60)), "underexposed"),
+    (text_on(250, (120, 120, 120)), "overexposed"),
+    (cv2.GaussianBlur(card_photo(), (51, 51), 0), "blurry")
+])
+def test_unusable_images_are_rejected(image, reason):
+    with pytest.raises(ImageQualityError) as error:
+        check_quality(image, side="front")
+    assert error.value.reason == reason and error.value.side == "front"
+
+
+def test_card_outline_is_only_required_when_configured(monkeypatch):
+    # Square and sharp, but without a card in it
+    image = np.full((900, 900, 3), 90, dtype=np.uint8)
+    cv2.putText(image, "RECEIPT", (100, 450), cv2.FONT_HERSHEY_SIMPLEX, 4, (20, 20, 20), 8)
+    assert assess_quality(image)[0] is None
+    monkeypatch.setattr(config, "QUALITY_REQUIRE_CARD", True)
+    assert assess_quality(image)[0] == "no_card"
+    padded = cv2.copyMakeBorder(card_photo(), 150, 150, 0, 0, cv2.BORDER_CONSTANT, value=(90, 90, 90))
+    assert assess_quality(padded)[0] is None
+
+
+def test_document_pages_ignore_exposure():
+    page = text_on(250, (20, 20, 20))
+    assert assess_quality(page)[0] == "overexposed"
+    assert assess_quality(page, page=True)[0] is None
@@ -0,0 +1,60 @@
+"""
+The OCR result cache: LRU, TTL, the SQLite tier and copy isolation.
+"""
+import json
+import sqlite3
+
+import result_cache
+from result_cache import ResultCache
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResultCache(max_entries=2, ttl_seconds=60)
+    cache.put("a", {"n": 1})
+    cache.put("b", {"n": 2})
+    assert cache.get("a") == {"n": 1}
+    cache.put("c", {"n": 3})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"n": 1} and cache.get("c") == {"n": 3}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(result_cache.time, "time", lambda: now[0])
+    cache = ResultCache(max_entries=4, ttl_seconds=60)
+    cache.put("a", {"n": 1})
+    now[0] += 59
+    assert cache.get("a") == {"n": 1}
+    now[0] += 2
+    assert cache.get("a") is None
+    assert cache.stats()["expired"] == 1
+
+
+def test_sqlite_tier_survives_a_new_instance(tmp_path, monkeypatch):
+    path = str(tmp_path / "results.db")
+    ResultCache(max_entries=4, ttl_seconds=60, db_path=path).put("a", {"n": 1})
+
+    # Stored as JSON text: loading the file never unpickles anything
+    (stored,) = sqlite3.connect(path).execute("SELECT result FROM json_results").fetchone()
+    assert json.loads(stored) == {"n": 1}
+    reopened = ResultCache(max_entries=4, ttl_seconds=60, db_path=path)
+    assert reopened.get("a") == {"n": 1}
+    assert reopened.stats()["entries"] == 1
+    reopened.clear()
+    assert ResultCache(max_entries=4, ttl_seconds=60, db_path=path).get("a") is None
+
+    now = [1000.0]
+    monkeypatch.setattr(result_cache.time, "time", lambda: now[0])
+    ResultCache(max_entries=4, ttl_seconds=60, db_path=path).put("b", {"n": 2})
+    now[0] += 61
+    assert ResultCache(max_entries=4, ttl_seconds=60, db_path=path).get("b") is None
+
+
+def test_callers_cannot_change_cached_results():
+    cache = ResultCache(max_entries=4, ttl_seconds=60)
+    result = {"fields": {"id_number": "00-127039"}}
+    cache.put("a", result)
+    result["fields"]["id_number"] = "changed"
+    cache.get("a")["fields"]["id_number"] = "changed"
+    assert cache.get("a") == {"fields": {"id_number": "00-127039"}}
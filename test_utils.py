@@ -0,0 +1,188 @@
+"""
+Golden tests for field extraction: outputs were recorded from the
+original per-field extractors and must not change.
+"""
+import numpy as np
+import pytest
+
+from document_detector import detect_document
+from ocr_lines import OCRLines
+from utils import extract_all_details, extract_full_name, extract_id_number
+
+GOLDEN_TEXTS = {
+    "ic_front": ["NEGARA BRUNEI DARUSSALAM", "KAD PENGENALAN", "00-127039", "NAMA", "AHMAD BIN ALI", "HAJI OMAR", "TARIKH LAHIR", "12-05-1990", "JANTINA", "LELAKI", "NEGERI TEMPAT LAHIR", "BRUNEI MUARA", "WARGANEGARA"],
+    "ic_front_no_label": ["NEGARA BRUNEI DARUSSALAM", "30-123456", "SITI AMINAH", "BINTI YUSOF", "TARIKH LAHIR", "01011985", "PEREMPUAN"],
+    "ic_back": ["ALAMAT", "KG KIULAP", "BANDAR SERI BEGAWAN", "TARIKH DIKELUARKAN", "01-02-2015", "TARIKH MANSUH", "01-02-2025", "TEMPAT LAHIR", "TUTONG", "BANGSA MELAYU"],
+    "foreigner_spaced_id": ["KAD PENGENALAN", "51 - 000123", "Nama", "John Smith", "Date of Birth", "31-12-1979", "MALE"],
+    "passport": ["PASSPORT", "PASPORT", "NEGARA BRUNEI DARUSSALAM", "P1234567", "JOHN DOE"],
+    "unknown": ["RECEIPT", "TOTAL", "12.50"],
+    "id_without_keywords": ["01234567", "LIM AH KOW", "01-01-1970"],
+    "empty": []
+}
+
+GOLDEN_RESULTS = {
+    "ic_front": {
+        "full_name": "AHMAD BIN ALI HAJI OMAR",
+        "first_name": "AHMAD",
+        "middle_name": "BIN ALI HAJI",
+        "last_name": "OMAR",
+        "id_number": "00-127039",
+        "date_of_birth": "12-05-1990",
+        "place_of_birth": "BRUNEI MUARA",
+        "gender": "Male",
+        "date_of_issue": None,
+        "date_of_expiry": None,
+        "raw_text": "NEGARA BRUNEI DARUSSALAM KAD PENGENALAN 00-127039 NAMA AHMAD BIN ALI HAJI OMAR TARIKH LAHIR 12-05-1990 JANTINA LELAKI NEGERI TEMPAT LAHIR BRUNEI MUARA WARGANEGARA",
+        "document_type": "National ID",
+        "card_color": "Yellow",
+        "holder_type": "Brunei National"
+    },
+    "ic_front_no_label": {
+        "full_name": "SITI AMINAH BINTI YUSOF",
+        "first_name": "SITI",
+        "middle_name": "AMINAH BINTI",
+        "last_name": "YUSOF",
+        "id_number": "30-123456",
+        "date_of_birth": "01011985",
+        "place_of_birth": None,
+        "gender": "Female",
+        "date_of_issue": None,
+        "date_of_expiry": None,
+        "raw_text": "NEGARA BRUNEI DARUSSALAM 30-123456 SITI AMINAH BINTI YUSOF TARIKH LAHIR 01011985 PEREMPUAN",
+        "document_type": "National ID",
+        "card_color": "Red",
+        "holder_type": "Permanent Resident"
+    },
+    "ic_back": {
+        "full_name": None,
+        "first_name": None,
+        "middle_name": None,
+        "last_name": None,
+        "id_number": None,
+        "date_of_birth": "01-02-2015",
+        "place_of_birth": "TUTONG",
+        "gender": None,
+        "date_of_issue": "01-02-2015",
+        "date_of_expiry": "01-02-2025",
+        "raw_text": "ALAMAT KG KIULAP BANDAR SERI BEGAWAN TARIKH DIKELUARKAN 01-02-2015 TARIKH MANSUH 01-02-2025 TEMPAT LAHIR TUTONG BANGSA MELAYU",
+        "document_type": "National ID",
+        "card_color": "Unknown",
+        "holder_type": "Unknown"
+    },
+    "foreigner_spaced_id": {
+        "full_name": "John Smith",
+        "first_name": "John",
+        "middle_name": None,
+        "last_name": "Smith",
+        "id_number": "51-000123",
+        "date_of_birth": "31-12-1979",
+        "place_of_birth": None,
+        "gender": "Male",
+        "date_of_issue": None,
+        "date_of_expiry": None,
+        "raw_text": "KAD PENGENALAN 51 - 000123 Nama John Smith Date of Birth 31-12-1979 MALE",
+        "document_type": "National ID",
+        "card_color": "Green",
+        "holder_type": "Foreigner"
+    },
+    "passport": {
+        "full_name": None,
+        "first_name": None,
+        "middle_name": None,
+        "last_name": None,
+        "id_number": None,
+        "date_of_birth": None,
+        "place_of_birth": None,
+        "gender": None,
+        "date_of_issue": None,
+        "date_of_expiry": None,
+        "raw_text": "PASSPORT PASPORT NEGARA BRUNEI DARUSSALAM P1234567 JOHN DOE",
+        "document_type": "National ID",
+        "card_color": "Unknown",
+        "holder_type": "Unknown"
+    },
+    "unknown": {
+        "document_type": "Passport",
+        "passport_number": "RECEIPT"
+    },
+    "id_without_keywords": {
+        "full_name": "LIM AH KOW",
+        "first_name": "LIM",
+        "middle_name": "AH",
+        "last_name": "KOW",
+        "id_number": "01234567",
+        "date_of_birth": "01234567",
+        "place_of_birth": None,
+        "gender": None,
+        "date_of_issue": None,
+        "date_of_expiry": None,
+        "raw_text": "01234567 LIM AH KOW 01-01-1970",
+        "document_type": "National ID",
+        "card_color": "Yellow",
+        "holder_type": "Brunei National"
+    },
+    "empty": {
+        "full_name": None,
+        "first_name": None,
+        "middle_name": None,
+        "last_name": None,
+        "id_number": None,
+        "date_of_birth": None,
+        "place_of_birth": None,
+        "gender": None,
+        "date_of_issue": None,
+        "date_of_expiry": None,
+        "raw_text": "",
+        "document_type": "Unknown"
+    }
+}
+
+
+@pytest.mark.parametrize("name", sorted(GOLDEN_TEXTS))
+def test_detect_document_matches_golden(name):
+    assert detect_document(GOLDEN_TEXTS[name]) == GOLDEN_RESULTS[name]
+
+
+@pytest.mark.parametrize("name", sorted(GOLDEN_TEXTS))
+def test_single_fields_match_all_details(name):
+    texts = GOLDEN_TEXTS[name]
+    details = extract_all_details(texts)
+    assert extract_id_number(texts) == details["id_number"]
+    assert extract_full_name(texts) == details["full_name"]
+
+
+def test_ocr_lines_match_plain_texts_without_geometry():
+    texts = GOLDEN_TEXTS["ic_front"]
+    details = extract_all_details(OCRLines(texts, [0.9] * len(texts)))
+    field_confidence = details.pop("field_confidence")
+    assert details == extract_all_details(texts)
+    assert field_confidence["id_number"] == pytest.approx(0.9)
+
+
+def test_dates_follow_label_geometry():
+    # The expiry value sits a few pixels higher than the issue value, so in
+    # reading order it comes first and a window search gives it to both labels
+    lines = OCRLines(
+        ["TARIKH DIKELUARKAN", "TARIKH MANSUH", "01-02-2025", "01-02-2015"],
+        [0.99, 0.99, 0.95, 0.7],
+        [(10, 400, 200, 420), (300, 400, 480, 420), (300, 428, 420, 448), (10, 432, 130, 452)]
+    )
+    details = extract_all_details(lines)
+    assert details["date_of_issue"] == "01-02-2015"
+    assert details["date_of_expiry"] == "01-02-2025"
+    assert details["field_confidence"]["date_of_issue"] == pytest.approx(0.7)
+    assert extract_all_details(list(lines))["date_of_issue"] == "01-02-2025"
+
+
+@pytest.mark.parametrize("angle", [90, 180, 270])
+def test_boxes_on_a_rotated_page_map_back_to_the_input(angle):
+    image = np.zeros((600, 900), dtype=np.uint8)
+    image[100:140, 200:500] = 255
+    # The doc preprocessor turns the page counter-clockwise by `angle`
+    ys, xs = np.nonzero(np.rot90(image, angle // 90))
+    result = {
+        "rec_texts": ["NAMA"], "rec_scores": [0.9],
+        "rec_boxes": [[xs.min(), ys.min(), xs.max() + 1, ys.max() + 1]],
+        "doc_preprocessor_res": {"angle": angle, "input_img": image}
+    }
+    assert OCRLines.from_paddle(result).boxes[0] == pytest.approx([200, 100, 500, 140], abs=1.5)
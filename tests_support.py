@@ -0,0 +1,25 @@
+"""
+Shared test helpers.
+"""
+import cv2
+import numpy as np
+
+
+def card_photo(width=900, height=600, lines=None, font_scale=0.9):
+    """
+    A synthetic card photo: a light card on a darker background with
+    `lines` of dark text spread down it. By default a date line is
+    repeated every 40px, enough texture for the quality gate.
+    """
+    image = np.full((height, width, 3), 90, dtype=np.uint8)
+    x0, y0, x1, y1 = width // 6, height // 4, width * 5 // 6, height * 7 // 8
+    cv2.rectangle(image, (x0, y0), (x1, y1), (200, 220, 235), -1)
+    if lines is None:
+        rows = range(y0 + 30, y1 - 20, 40)
+        lines = ["TARIKH LAHIR 12-05-1990"] * len(rows)
+    else:
+        step = (y1 - y0) // (len(lines) + 1)
+        rows = [y0 + step * (i + 1) for i in range(len(lines))]
+    for text, row in zip(lines, rows):
+        cv2.putText(image, text, (x0 + 20, row), cv2.FONT_HERSHEY_SIMPLEX, font_scale, (20, 20, 20), max(1, round(font_scale * 2)))
+    return image
@@ -1,36 +1,269 @@
 import re
+from collections import namedtuple
+from itertools import repeat
+from ocr_lines import OCRLines
+
+# Brunei ID: XX-XXXXXX (with dash) or 8-12 continuous digits
+ID_PATTERNS = (
+    re.compile(r'\b\d{2}-\d{6}\b'),
+    re.compile(r'\b\d{8,12}\b')
+)
+VALID_ID_PREFIXES = (
+    '00', '01',  # Brunei National
+    '30', '31',  # Permanent Resident
+    '50', '51'   # Foreigner
+)
+DATE_RE = re.compile(r'\b\d{2}-\d{2}-\d{4}\b|\b\d{8}\b')
+DIGIT_RE = re.compile(r'\d')
+PASSPORT_RE = re.compile(r'\b[A-Z0-9]{6,9}\b')
+
+# Every label/keyword the extractors look for as a substring. None of them
+# is a prefix of another, so the overlapping lookahead scan below finds all
+# keywords contained in a line in one pass.
+KEYWORDS = (
+    'NAMA', 'NAME', 'JANTINA', 'TARIKH', 'LAHIR', 'TEMPAT', 'NEGERI', 'WARGANEGARA',
+    'GENDER', 'DATE', 'MUKIM', 'ALAMAT', 'KAD', 'PENGENALAN', 'NEGARA', 'BRUNEI',
+    'DARUSSALAM', 'BANGSA', 'DIKELUARKAN', 'ISSUE', 'MANSUH', 'EXPIRY'
+)
+KEYWORD_SCAN = re.compile('(?=(' + '|'.join(KEYWORDS) + '))')
+
+NAME_STOP_KEYWORDS = {'JANTINA', 'TARIKH', 'LAHIR', 'TEMPAT', 'NEGERI', 'WARGANEGARA', 'GENDER', 'DATE', 'MUKIM', 'ALAMAT'}
+NAME_SKIP_KEYWORDS = {'KAD', 'PENGENALAN', 'NEGARA', 'BRUNEI', 'DARUSSALAM', 'NAMA'}
+BIRTHPLACE_STOP_KEYWORDS = {'WARGANEGARA', 'KAD', 'PENGENALAN', 'JANTINA', 'TARIKH', 'BANGSA', 'ALAMAT'}
+DOB_LABELS = {'TARIKH LAHIR', 'TARIKH', 'DATE OF BIRTH'}
+
+GENDER_MAP = {
+    'LELAKI': 'Male',
+    'PEREMPUAN': 'Female',
+    'MALE': 'Male',
+    'FEMALE': 'Female'
+}
+
+# Words to exclude from passport numbers (common document terms)
+PASSPORT_EXCLUDE_WORDS = {'NEGARA', 'KAD', 'PENGENALAN', 'NAMA', 'JANTINA', 'TARIKH', 'LAHIR',
+                          'WARGANEGARA', 'BRUNEI', 'DARUSSALAM', 'LELAKI', 'PEREMPUAN',
+                          'TEMPAT', 'NEGERI', 'BANGSA'}
+
+# One OCR line, normalized once: uppercased text, text without spaces, the
+# keywords it contains, whether it has a digit / a date, the valid Brunei ID
+# number in it (if any), and its recognition score and (x0, y0, x1, y1) box
+# when the input is an OCRLines (None for plain texts).
+Line = namedtuple('Line', 'text upper nospace keywords has_digit has_date id_number score box')
+
+# Private extractors return (value, score); score is None for plain texts
+_MISSING = (None, None)
+
+
+def _line_id_number(nospace):
+    clean = nospace.strip()
+    for pattern in ID_PATTERNS:
+        match = pattern.search(clean)
+        if match:
+            id_num = match.group()
+            if id_num.startswith(VALID_ID_PREFIXES):
+                return id_num
+    return None
+
+
+def index_texts(texts):
+    """
+    Normalize OCR lines in a single pass; every extractor works off this.
+    `texts` is a list of strings or an OCRLines.
+    """
+    if isinstance(texts, OCRLines):
+        scores = texts.scores.tolist()
+        boxes = texts.boxes.tolist() if texts.boxes is not None else repeat(None)
+    else:
+        scores = boxes = repeat(None)
+
+    lines = []
+    for text, score, box in zip(texts, scores, boxes):
+        upper = text.upper()
+        nospace = text.replace(" ", "")
+        keywords = frozenset(KEYWORD_SCAN.findall(upper))
+        # IDs and dates need digits; most lines are labels or names
+        if DIGIT_RE.search(text):
+            lines.append(Line(text, upper, nospace, keywords, True,
+                              DATE_RE.search(text) is not None, _line_id_number(nospace), score, box))
+        else:
+            lines.append(Line(text, upper, nospace, keywords, False, False, None, score, box))
+    return lines
+
+
+def _joined(parts):
+    """
+    Join multi-line values; the value is only as confident as its weakest line.
+    """
+    if not parts:
+        return _MISSING
+    scores = [part.score for part in parts if part.score is not None]
+    return ' '.join(part.text for part in parts), (min(scores) if scores else None)
+
+
+def _value_near_label(label, lines, accept):
+    """
+    The accepted line closest to `label` on the card: to its right on the
+    same row, or just below it (within three label heights) and overlapping
+    it horizontally. None when the lines carry no geometry or nothing fits.
+    """
+    if label.box is None:
+        return None
+    lx0, ly0, lx1, ly1 = label.box
+    height = max(ly1 - ly0, 1.0)
+    best = None
+    best_distance = None
+    for line in lines:
+        if line is label or line.box is None or not accept(line):
+            continue
+        x0, y0, x1, y1 = line.box
+        same_row = min(y1, ly1) - max(y0, ly0) > 0.5 * min(y1 - y0, height)
+        if same_row and x0 >= lx1 - 0.5 * height:
+            distance = x0 - lx1
+        elif y0 >= ly0 + 0.5 * height and y0 - ly1 <= 3 * height and min(x1, lx1) > max(x0, lx0):
+            distance = y0 - ly1
+        else:
+            continue
+        if best is None or distance < best_distance:
+            best = line
+            best_distance = distance
+    return best
+
+
+def _id_number(lines):
+    for line in lines:
+        if line.id_number:
+            return line.id_number, line.score
+    return _MISSING
+
+
+def _full_name(lines, id_num):
+    name_parts = []
+    capture = False
+
+    # Check if 'NAMA' keyword exists
+    has_nama = any('NAMA' in line.keywords or 'NAME' in line.keywords for line in lines)
+
+    start_index = 0
+    if not has_nama and id_num:
+        # Fallback: Find index of ID number and start capturing after it
+        for i, line in enumerate(lines):
+            if id_num in line.text:
+                start_index = i + 1
+                capture = True
+                break
+
+    for line in lines[start_index:]:
+        if not capture and (line.upper in ('NAMA', 'NAME') or 'NAMA' in line.keywords):
+            capture = True
+            continue
+
+        if capture:
+            # Stop if we hit another label
+            if line.keywords & NAME_STOP_KEYWORDS:
+                break
+
+            # Skip document labels and filter small tokens
+            if len(line.text) > 2 and not line.keywords & NAME_SKIP_KEYWORDS:
+                # Exclude if it looks like the ID number we found or generally looks like digits
+                if id_num and line.nospace in id_num.replace(" ", ""):
+                    continue
+                if line.has_digit:  # Name shouldn't typically have digits
+                    continue
+
+                name_parts.append(line)
+
+    return _joined(name_parts)
+
+
+def _has_date(line):
+    return line.has_date
+
+
+def _date_after_label(lines, is_label):
+    """
+    Date belonging to a label line: the date next to or below it when the
+    lines carry geometry, else the first date within the three lines
+    following it. Side-by-side labels (issue / expiry) have their values
+    interleaved in reading order, which only geometry can untangle.
+    """
+    for i, line in enumerate(lines):
+        if is_label(line):
+            if line.box is not None:
+                value = _value_near_label(line, lines, _has_date)
+                if value:
+                    return value.text, value.score
+            for following in lines[i + 1:i + 4]:
+                if following.has_date:
+                    return following.text, following.score
+    return _MISSING
+
+
+def _date_of_birth(lines):
+    date = _date_after_label(lines, lambda line: line.upper in DOB_LABELS)
+    if date[0]:
+        return date
+
+    # Also check all texts for date pattern
+    for line in lines:
+        if line.has_date:
+            return line.text, line.score
+    return _MISSING
+
+
+def _gender(lines):
+    for line in lines:
+        if line.upper in GENDER_MAP:
+            return GENDER_MAP[line.upper], line.score
+    return _MISSING
+
+
+def _birthplace(lines):
+    birthplace_parts = []
+    capture = False
+
+    for line in lines:
+        # Stop capturing if we hit other fields
+        if capture and line.keywords & BIRTHPLACE_STOP_KEYWORDS:
+            break
+
+        # Start capturing only on "TEMPAT LAHIR" or "NEGERI", avoid "TARIKH LAHIR"
+        if 'TARIKH' in line.keywords:
+            continue
+
+        if 'TEMPAT' in line.keywords or ('NEGERI' in line.keywords and 'LAHIR' in line.keywords):
+            capture = True
+            continue
+
+        if capture:
+            # Exclude dates
+            if line.has_date:
+                continue
+
+            if len(line.text) > 2 and line.upper != 'NEGARA':
+                birthplace_parts.append(line)
+
+    return _joined(birthplace_parts)
+
+
+def _date_of_issue(lines):
+    return _date_after_label(lines, lambda line: 'DIKELUARKAN' in line.keywords or 'ISSUE' in line.keywords)
+
+
+def _date_of_expiry(lines):
+    return _date_after_label(lines, lambda line: 'MANSUH' in line.keywords or 'EXPIRY' in line.keywords)
+
 
 def extract_id_number(texts):
     """
     Extract Brunei National ID number (8-12 digits format: XX-XXXXXX or XXXXXXXX)
     Common format: 00-127039, 30-XXXXXX, 50-XXXXXX
-    
+
     Prefixes:
     - 00-01: Brunei National
     - 30-31: Permanent Resident
     - 50-51: Foreigner
     """
-    # Patterns for Brunei ID: can have dash or be continuous digits
-    patterns = [
-        r'\b\d{2}-\d{6}\b',  # Format: XX-XXXXXX (with dash)
-        r'\b\d{8,12}\b'  # Format: continuous 8-12 digits
-    ]
-    
-    for text in texts:
-        clean = text.replace(" ", "").strip()
-        for pattern in patterns:
-            match = re.search(pattern, clean)
-            if match:
-                id_num = match.group()
-                # Validate: Check valid Brunei ID prefixes
-                valid_prefixes = (
-                    ('00', '01'),  # Brunei National
-                    ('30', '31'),  # Permanent Resident
-                    ('50', '51')   # Foreigner
-                )
-                if any(id_num.startswith(prefix) for prefix in valid_prefixes):
-                    return id_num
-    return None
+    return _id_number(index_texts(texts))[0]
 
 
 def extract_passport_number(texts):
@@ -38,19 +271,12 @@ def extract_passport_number(texts):
     Extract passport number from texts.
     Filter out common words that shouldn't be passport numbers.
     """
-    # Words to exclude (common document terms)
-    exclude_words = {'NEGARA', 'KAD', 'PENGENALAN', 'NAMA', 'JANTINA', 'TARIKH', 'LAHIR', 
-                     'WARGANEGARA', 'BRUNEI', 'DARUSSALAM', 'LELAKI', 'PEREMPUAN', 
-                     'TEMPAT', 'NEGERI', 'BANGSA'}
-    
-    pattern = r'\b[A-Z0-9]{6,9}\b'
-    
     for text in texts:
-        match = re.search(pattern, text)
+        match = PASSPORT_RE.search(text)
         if match:
             candidate = match.group()
             # Skip if it's a known exclude word
-            if candidate not in exclude_words:
+            if candidate not in PASSPORT_EXCLUDE_WORDS:
                 # Passport numbers typically have letters
                 if any(c.isalpha() for c in candidate):
                     return candidate
@@ -63,50 +289,8 @@ def extract_full_name(texts):
     Usually comes after 'NAMA' or similar label.
     Fallback: Look for text after ID number if NAMA is missing.
     """
-    name_parts = []
-    capture = False
-    
-    # Pre-calculate ID number to exclude it from name
-    id_num = extract_id_number(texts)
-    
-    # Check if 'NAMA' keyword exists
-    has_nama = any('NAMA' in t.upper() or 'NAME' in t.upper() for t in texts)
-    
-    start_index = 0
-    if not has_nama and id_num:
-        # Fallback: Find index of ID number and start capturing after it
-        for i, text in enumerate(texts):
-            if id_num in text:
-                start_index = i + 1
-                capture = True
-                break
-    
-    for i, text in enumerate(texts):
-        if i < start_index:
-            continue
-
-        if not capture and (text.upper() in ['NAMA', 'NAME'] or 'NAMA' in text.upper()):
-            capture = True
-            continue
-        
-        if capture:
-            # Stop if we hit another label
-            if any(keyword in text.upper() for keyword in ['JANTINA', 'TARIKH', 'LAHIR', 'TEMPAT', 'NEGERI', 'WARGANEGARA', 'GENDER', 'DATE', 'MUKIM', 'ALAMAT']):
-                break
-            
-            # Skip document labels and filter small tokens
-            if len(text) > 2 and not any(keyword in text.upper() for keyword in 
-                                         ['KAD', 'PENGENALAN', 'NEGARA', 'BRUNEI', 'DARUSSALAM', 'NAMA']):
-                
-                # Exclude if it looks like the ID number we found or generally looks like digits
-                if id_num and text.replace(" ","") in id_num.replace(" ",""):
-                    continue
-                if re.search(r'\d', text): # Name shouldn't typically have digits
-                    continue
-                    
-                name_parts.append(text)
-    
-    return ' '.join(name_parts) if name_parts else None
+    lines = index_texts(texts)
+    return _full_name(lines, _id_number(lines)[0])[0]
 
 
 def extract_date_of_birth(texts):
@@ -114,21 +298,7 @@ def extract_date_of_birth(texts):
     Extract date of birth from TARIKH LAHIR field
     Usually format: DD-MM-YYYY or DDMMYYYY
     """
-    date_pattern = r'\b\d{2}-\d{2}-\d{4}\b|\b\d{8}\b'
-    
-    for i, text in enumerate(texts):
-        if text.upper() in ['TARIKH LAHIR', 'TARIKH', 'DATE OF BIRTH']:
-            # Check next few texts for date format
-            for j in range(i+1, min(i+4, len(texts))):
-                if re.search(date_pattern, texts[j]):
-                    return texts[j]
-    
-    # Also check all texts for date pattern
-    for text in texts:
-        if re.search(date_pattern, text):
-            return text
-    
-    return None
+    return _date_of_birth(index_texts(texts))[0]
 
 
 def extract_gender(texts):
@@ -137,17 +307,9 @@ def extract_gender(texts):
     Malay: LELAKI (male), PEREMPUAN (female)
     English: MALE, FEMALE
     """
-    gender_map = {
-        'LELAKI': 'Male',
-        'PEREMPUAN': 'Female',
-        'MALE': 'Male',
-        'FEMALE': 'Female'
-    }
-    
     for text in texts:
-        if text.upper() in gender_map:
-            return gender_map[text.upper()]
-    
+        if text.upper() in GENDER_MAP:
+            return GENDER_MAP[text.upper()]
     return None
 
 
@@ -155,41 +317,16 @@ def extract_birthplace(texts):
     """
     Extract birthplace from NEGERI TEMPAT LAHIR or TEMPAT LAHIR
     """
-    birthplace_parts = []
-    capture = False
-    
-    date_pattern = r'\b\d{2}-\d{2}-\d{4}\b|\b\d{8}\b'
-    
-    for text in texts:
-        # Stop capturing if we hit other fields
-        if any(keyword in text.upper() for keyword in ['WARGANEGARA', 'KAD', 'PENGENALAN', 'JANTINA', 'TARIKH', 'BANGSA', 'ALAMAT']):
-            if capture:
-                break
-        
-        # Start capturing only on "TEMPAT LAHIR" or "NEGERI", avoid "TARIKH LAHIR"
-        if 'TARIKH' in text.upper():
-            continue
+    return _birthplace(index_texts(texts))[0]
+
 
-        if 'TEMPAT' in text.upper() or ('NEGERI' in text.upper() and 'LAHIR' in text.upper()):
-            capture = True
-            continue
-        
-        if capture:
-            # Exclude dates
-            if re.search(date_pattern, text):
-                continue
-                
-            if len(text) > 2 and text.upper() != 'NEGARA':
-                birthplace_parts.append(text)
-    
-    return ' '.join(birthplace_parts) if birthplace_parts else None
 def split_name(full_name):
     """
     Split full name into First, Middle, and Last Name
     """
     if not full_name:
         return {"first_name": None, "middle_name": None, "last_name": None}
-    
+
     parts = full_name.split()
     if len(parts) == 1:
         return {"first_name": parts[0], "middle_name": None, "last_name": None}
@@ -202,51 +339,57 @@ def split_name(full_name):
             "last_name": parts[-1]
         }
 
+
 def extract_date_of_issue(texts):
     """
     Extract Date of Issue (DIKELUARKAN)
     """
-    date_pattern = r'\b\d{2}-\d{2}-\d{4}\b|\b\d{8}\b'
-    
-    for i, text in enumerate(texts):
-        if 'DIKELUARKAN' in text.upper() or 'ISSUE' in text.upper():
-             # Check next few texts for date format
-            for j in range(i+1, min(i+4, len(texts))):
-                if re.search(date_pattern, texts[j]):
-                    return texts[j]
-    return None
+    return _date_of_issue(index_texts(texts))[0]
+
 
 def extract_date_of_expiry(texts):
     """
     Extract Date of Expiry (MANSUH)
     """
-    date_pattern = r'\b\d{2}-\d{2}-\d{4}\b|\b\d{8}\b'
-    
-    for i, text in enumerate(texts):
-        if 'MANSUH' in text.upper() or 'EXPIRY' in text.upper():
-             # Check next few texts for date format
-            for j in range(i+1, min(i+4, len(texts))):
-                if re.search(date_pattern, texts[j]):
-                    return texts[j]
-    return None
+    return _date_of_expiry(index_texts(texts))[0]
+
 
 def extract_all_details(texts):
     """
-    Extract all possible details from texts
+    Extract all possible details from texts, indexing them only once.
+    When `texts` is an OCRLines, labels are matched to values by position
+    and a `field_confidence` dict gives each found field's recognition score.
     """
-    full_name = extract_full_name(texts)
+    lines = index_texts(texts)
+    id_number = _id_number(lines)
+    fields = {
+        "full_name": _full_name(lines, id_number[0]),
+        "id_number": id_number,
+        "date_of_birth": _date_of_birth(lines),
+        "place_of_birth": _birthplace(lines),
+        "gender": _gender(lines),
+        "date_of_issue": _date_of_issue(lines),
+        "date_of_expiry": _date_of_expiry(lines)
+    }
+    full_name = fields["full_name"][0]
     name_details = split_name(full_name)
-    
-    return {
+
+    details = {
         "full_name": full_name,
         "first_name": name_details["first_name"],
         "middle_name": name_details["middle_name"],
         "last_name": name_details["last_name"],
-        "id_number": extract_id_number(texts),
-        "date_of_birth": extract_date_of_birth(texts),
-        "place_of_birth": extract_birthplace(texts),
-        "gender": extract_gender(texts),
-        "date_of_issue": extract_date_of_issue(texts),
-        "date_of_expiry": extract_date_of_expiry(texts),
+        "id_number": fields["id_number"][0],
+        "date_of_birth": fields["date_of_birth"][0],
+        "place_of_birth": fields["place_of_birth"][0],
+        "gender": fields["gender"][0],
+        "date_of_issue": fields["date_of_issue"][0],
+        "date_of_expiry": fields["date_of_expiry"][0],
         "raw_text": " ".join(texts)
     }
+    if isinstance(texts, OCRLines):
+        details["field_confidence"] = {
+            field: round(score, 3) for field, (value, score) in fields.items()
+            if value is not None and score is not None
+        }
+    return details
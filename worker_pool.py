@@ -0,0 +1,125 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised when the pool cannot accept more work."""
+
+
+class OverloadedError(QueueFullError):
+    """Raised when queued work already waits longer than the pool's target."""
+
+
+class OCRWorkerPool:
+    """
+    Fixed set of worker threads fed from a bounded queue.
+    Each worker runs `initializer` once before taking work, which is where
+    it builds and warms its own PaddleOCR instance (see ocr_engine.warmup).
+    The pool is `ready` once every worker has finished its initializer.
+    With `max_queue_wait` seconds, submit() sheds new work while the oldest
+    queued item has waited longer than that. shutdown() never blocks: queued
+    work is cancelled and only work already running finishes.
+    """
+
+    def __init__(self, num_workers, queue_depth, initializer=None, max_queue_wait=0):
+        self.num_workers = num_workers
+        self.queue_depth = queue_depth
+        self._initializer = initializer
+        self.max_queue_wait = max_queue_wait
+        self._queue = queue.Queue(maxsize=queue_depth)
+        self._threads = []
+        self._initialized = 0
+        self._init_lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def start(self):
+        self._stopping.clear()
+        for i in range(self.num_workers):
+            thread = threading.Thread(target=self._worker, name=f"ocr-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def shutdown(self, wait=True):
+        self._stopping.set()
+        self._cancel_queued()
+        for _ in self._threads:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                # Filled by racing submits; the workers they wake see the flag
+                break
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        self._threads = []
+        self._initialized = 0
+
+    @property
+    def ready(self):
+        return bool(self._threads) and self._initialized == self.num_workers
+
+    @property
+    def pending(self):
+        return self._queue.qsize()
+
+    @property
+    def queue_wait(self):
+        """
+        Seconds the oldest queued item has been waiting, 0 when none is.
+        """
+        with self._queue.mutex:
+            oldest = next((item for item in self._queue.queue if item is not None and not item[0].cancelled()), None)
+        return time.monotonic() - oldest[4] if oldest else 0.0
+
+    def submit(self, fn, *args, **kwargs):
+        if self._stopping.is_set():
+            raise RuntimeError("OCR worker pool is shut down")
+        if self.max_queue_wait:
+            wait = self.queue_wait
+            if wait > self.max_queue_wait:
+                raise OverloadedError(f"OCR queue wait is {wait:.1f}s, target is {self.max_queue_wait:g}s")
+        future = Future()
+        try:
+            self._queue.put_nowait((future, fn, args, kwargs, time.monotonic()))
+        except queue.Full:
+            raise QueueFullError(f"OCR queue is full ({self.queue_depth} pending)")
+        return future
+
+    def _worker(self):
+        if self._initializer:
+            try:
+                self._initializer()
+            except Exception:
+                # The worker still serves requests; its engine is built lazily instead
+                logger.exception("Worker initializer failed")
+        with self._init_lock:
+            self._initialized += 1
+        while True:
+            item = self._queue.get()
+            if item is None or self._stopping.is_set():
+                if item is not None:
+                    item[0].cancel()
+                break
+            future, fn, args, kwargs, _ = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+    def _cancel_queued(self):
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None:
+                item[0].cancel()